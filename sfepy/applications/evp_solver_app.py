@@ -28,12 +28,16 @@ class EVPSolverApp(PDESolverApp):
         eigs_only = get('eigs_only', False)
         return Struct(evps=get('evps', None, 'missing "evps" in options!'),
                       n_eigs=n_eigs,
-                      eigs_only=eigs_only)
+                      eigs_only=eigs_only,
+                      warm_start=get('evp_warm_start', False))
 
     def __init__(self, conf, options, output_prefix, **kwargs):
         PDESolverApp.__init__(self, conf, options, output_prefix,
                               init_equations=False)
 
+        self.eig_solver = None
+        self.eig_solver_name = None
+
     def setup_options(self):
         PDESolverApp.setup_options(self)
         opts = EVPSolverApp.process_options(self.conf.options)
@@ -95,7 +99,7 @@ class EVPSolverApp(PDESolverApp):
         _n_eigs = get_default(opts.n_eigs, mtx_a.shape[0])
 
         output('solving eigenvalue problem for {} values...'.format(_n_eigs))
-        eig = Solver.any_from_conf(pb.get_solver_conf(opts.evps))
+        eig = self.get_eig_solver()
         if opts.eigs_only:
             eigs = eig(mtx_a, mtx_b, opts.n_eigs, eigenvectors=False)
             svecs = None
@@ -110,6 +114,28 @@ class EVPSolverApp(PDESolverApp):
 
         return Struct(pb=pb, eigs=eigs, vecs=vecs)
 
+    def get_eig_solver(self):
+        """
+        Create the eigenvalue solver given by the `evps` option.
+
+        If the `evp_warm_start` option is True, the solver instance is kept
+        between the calls, e.g. in parametric studies, and its `warm_start`
+        parameter is set, so that it starts from the eigenvectors of the
+        previous call (and reuses its preconditioner, if supported).
+        """
+        opts = self.app_options
+        conf = self.problem.get_solver_conf(opts.evps)
+        if not opts.warm_start:
+            return Solver.any_from_conf(conf)
+
+        if (self.eig_solver is None) or (self.eig_solver_name != opts.evps):
+            conf = conf.copy()
+            conf.warm_start = True
+            self.eig_solver = Solver.any_from_conf(conf)
+            self.eig_solver_name = opts.evps
+
+        return self.eig_solver
+
     def make_full(self, svecs):
         if svecs is None: return None
 
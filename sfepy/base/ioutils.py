@@ -5,6 +5,8 @@ import os.path as op
 import fnmatch
 import shutil
 import glob
+import threading
+import queue
 from .base import output, ordered_iteritems, Struct
 import pickle
 import warnings
@@ -926,6 +928,79 @@ class HDF5ContextManager:
            self.file.close()
            self.file = None
 
+class BackgroundWriter(Struct):
+    """
+    Call (file writing) functions sequentially in a background thread.
+
+    The calls are queued in a bounded queue, so that :func:`put()` blocks when
+    `max_size` calls are pending. An exception raised in the background
+    thread is re-raised in the next :func:`put()`, :func:`flush()` or
+    :func:`close()` call, and the remaining pending calls are skipped.
+
+    The arguments of the calls are not copied - the caller has to ensure that
+    they are not modified until the call is done.
+    """
+
+    def __init__(self, max_size=4, name='background_writer'):
+        Struct.__init__(self, name=name, max_size=max_size, error=None,
+                        queue=queue.Queue(maxsize=max_size))
+
+        self.thread = threading.Thread(target=self._run, name=name,
+                                       daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while 1:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+
+            fun, args, kwargs = item
+            if self.error is None:
+                try:
+                    fun(*args, **kwargs)
+
+                except Exception as exc:
+                    self.error = exc
+
+            self.queue.task_done()
+
+    def check(self):
+        """
+        Re-raise an exception raised in the background thread, if any.
+        """
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def put(self, fun, *args, **kwargs):
+        """
+        Queue the call ``fun(*args, **kwargs)``.
+        """
+        self.check()
+        if not self.thread.is_alive():
+            raise ValueError('%s is closed!' % self.name)
+
+        self.queue.put((fun, args, kwargs))
+
+    def flush(self):
+        """
+        Wait until all queued calls are done.
+        """
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        """
+        Finish all queued calls and stop the background thread.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+        self.check()
+
 def get_or_create_hdf5_group(fd, path, from_group=None):
     if from_group is None:
        from_group = fd.root
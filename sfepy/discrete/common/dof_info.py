@@ -520,6 +520,27 @@ class EquationMap(Struct):
 
         return active_bcs
 
+    def reorder_equations(self, perm):
+        """
+        Renumber the active equations to follow the given permutation of
+        field nodes. The DOFs of a node remain adjacent.
+
+        Parameters
+        ----------
+        perm : array
+            The node permutation: `perm[i]` is the node at the new position
+            `i`.
+        """
+        dpn = self.dpn
+
+        iperm = nm.empty_like(perm)
+        iperm[perm] = nm.arange(perm.shape[0], dtype=perm.dtype)
+
+        keys = dpn * iperm[self.eqi // dpn] + self.eqi % dpn
+        self.eqi = self.eqi[nm.argsort(keys, kind='stable')]
+        self.eq[self.eqi] = nm.arange(self.eqi.shape[0], dtype=nm.int32)
+        self.eq[self.master] = self.eq[self.slave]
+
     def get_operator(self):
         """
         Get the matrix operator :math:`R` corresponding to the equation
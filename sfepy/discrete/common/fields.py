@@ -246,6 +246,75 @@ class Field(Struct):
 
         return out
 
+    def get_node_graph(self):
+        """
+        Get the graph of field nodes connected by cells as a CSR array.
+        """
+        import scipy.sparse as sps
+
+        econn = self.econn
+        n_cell, n_ep = econn.shape
+        rows = nm.repeat(nm.arange(n_cell), n_ep)
+        ones = nm.ones(econn.size, dtype=nm.int32)
+        incidence = sps.csr_array((ones, (rows, econn.ravel())),
+                                  shape=(n_cell, self.n_nod))
+
+        return sps.csr_array(incidence.T @ incidence)
+
+    def get_node_ordering(self, method='rcm', verbose=True):
+        """
+        Get a permutation of field nodes improving the locality of DOFs. The
+        permutations are cached.
+
+        Parameters
+        ----------
+        method : 'rcm', 'morton' or 'hilbert'
+            The reordering method: the reverse Cuthill-McKee ordering of the
+            node graph, or the order of nodes along the Morton or Hilbert
+            space-filling curves.
+        verbose : bool
+            If True, print the node graph bandwidth before and after the
+            reordering.
+
+        Returns
+        -------
+        perm : array
+            The permutation: `perm[i]` is the node at the new position `i`.
+        """
+        orderings = self.__dict__.setdefault('node_orderings', {})
+        perm = orderings.get(method)
+        if perm is not None:
+            return perm
+
+        from scipy.sparse.csgraph import reverse_cuthill_mckee
+        from sfepy.linalg.sparse import get_bandwidth
+        from sfepy.linalg.geometry import get_morton_codes, get_hilbert_codes
+
+        timer = Timer(start=True)
+        graph = self.get_node_graph()
+        if method == 'rcm':
+            perm = reverse_cuthill_mckee(graph, symmetric_mode=True)
+
+        elif method == 'morton':
+            perm = nm.argsort(get_morton_codes(self.get_coor()),
+                              kind='stable')
+
+        elif method == 'hilbert':
+            perm = nm.argsort(get_hilbert_codes(self.get_coor()),
+                              kind='stable')
+
+        else:
+            raise ValueError('unknown node reordering method! (%s)' % method)
+
+        perm = perm.astype(nm.int32)
+        orderings[method] = perm
+
+        output('field %s: %s node reordering: bandwidth %d -> %d (%.2f [s])'
+               % (self.name, method, get_bandwidth(graph),
+                  get_bandwidth(graph, perm), timer.stop()), verbose=verbose)
+
+        return perm
+
     def set_dofs(self, fun=0.0, region=None, dpn=None, warn=None):
         """
         Set the values of DOFs in a given `region` using a function of space
@@ -367,7 +367,7 @@ class Equations(Container):
 
     def time_update(self, ts, ebcs=None, epbcs=None, lcbcs=None,
                     functions=None, problem=None, active_only=True,
-                    regions_changed=None, verbose=True):
+                    regions_changed=None, dof_reordering=None, verbose=True):
         """
         Update the equations for current time step.
 
@@ -396,6 +396,10 @@ class Equations(Container):
             numbering.
         regions_changed : str or iterable of str or None
             Name(s) of changed regions that need new active connectivities.
+        dof_reordering : 'rcm' or 'morton', optional
+            If given, renumber the active DOFs to improve their locality, see
+            :func:`Variables.equation_mapping()
+            <sfepy.discrete.variables.Variables.equation_mapping()>`.
         verbose : bool
             If False, reduce verbosity.
 
@@ -411,9 +415,10 @@ class Equations(Container):
 
         self.variables.time_update(ts, functions, verbose=verbose)
 
-        active_bcs = self.variables.equation_mapping(ebcs, epbcs, ts, functions,
-                                                     problem=problem,
-                                                     active_only=active_only)
+        active_bcs = self.variables.equation_mapping(
+            ebcs, epbcs, ts, functions, problem=problem,
+            active_only=active_only, dof_reordering=dof_reordering,
+        )
         graph_changed = active_bcs != self.active_bcs
         self.active_bcs = active_bcs
 
@@ -710,6 +715,31 @@ class Equations(Container):
         self.variables.set_state(vec, reduced=reduced, force=force,
                                  preserve_caches=preserve_caches)
 
+    def set_trial_state(self, vec, reuse_caches=False):
+        """
+        Set the full DOF vector `vec` as the state, in which the equations are
+        to be evaluated.
+
+        If `reuse_caches` is True and `vec` is equal to the current state,
+        the evaluate caches of variables are preserved. This allows reusing
+        the data computed during a residual evaluation at an accepted
+        line-search trial point in the subsequent tangent matrix evaluation
+        (and vice versa).
+
+        Returns
+        -------
+        is_same : bool
+            True, if the caches were preserved.
+        """
+        variables = self.variables
+        is_same = (reuse_caches
+                   and (variables.vec is not None)
+                   and (vec.shape == variables.vec.shape)
+                   and nm.array_equal(vec, variables.vec))
+        self.set_state(vec, force=True, preserve_caches=is_same)
+
+        return is_same
+
     def get_lcbc_operator(self):
         return self.variables.get_lcbc_operator()
 
@@ -794,7 +824,7 @@ class Equations(Container):
 
     def eval_residuals(self, state, by_blocks=False, names=None,
                        by_terms=False, select_term=None,
-                       assemble=None):
+                       assemble=None, reuse_caches=False):
         """
         Evaluate (assemble) residual vectors.
 
@@ -823,6 +853,10 @@ class Equations(Container):
             `term` is the evaluated term, `it` is the term's order in the
             `equation` and (asm_obj, vals, iels, mode=, diff_var=) are the
             Term.assemble_to() arguments.
+        reuse_caches : bool
+            If True and `state` is equal to the current state of variables,
+            the evaluate caches of variables (e.g. the hyperelastic family
+            data) are preserved, see :func:`Equations.set_trial_state()`.
 
         Returns
         -------
@@ -831,7 +865,7 @@ class Equations(Container):
             dictionary is returned instead, with keys given by
             `block_name` part of the individual equation names.
         """
-        self.set_state(state, force=True)
+        self.set_trial_state(state, reuse_caches=reuse_caches)
 
         if by_blocks:
             names = get_default(names, self.names)
@@ -860,10 +894,10 @@ class Equations(Container):
                 for it, term in enumerate(eq.terms):
                     if select_term:
                         _select_term = (lambda x: select_term(x)
-                                        and (x.name == term.name))
+                                        and (x is term))
 
                     else:
-                        _select_term = lambda x: x.name == term.name
+                        _select_term = lambda x: x is term
 
                     ir = get_indx(term.get_virtual_name(),
                                   reduced=True, allow_dual=True)
@@ -885,7 +919,7 @@ class Equations(Container):
     def eval_tangent_matrices(self, state, tangent_matrix,
                               by_blocks=False, names=None,
                               by_terms=False, select_term=None,
-                              assemble=None):
+                              assemble=None, reuse_caches=False):
         """
         Evaluate (assemble) tangent matrices.
 
@@ -916,6 +950,10 @@ class Equations(Container):
             `term` is the evaluated term, `it` is the term's order in the
             `equation` and (asm_obj, vals, iels, mode=, diff_var=) are the
             Term.assemble_to() arguments.
+        reuse_caches : bool
+            If True and `state` is equal to the current state of variables,
+            the evaluate caches of variables (e.g. the hyperelastic family
+            data) are preserved, see :func:`Equations.set_trial_state()`.
 
         Returns
         -------
@@ -924,7 +962,7 @@ class Equations(Container):
             is returned instead, with keys given by `block_name` part
             of the individual equation names.
         """
-        self.set_state(state, force=True)
+        self.set_trial_state(state, reuse_caches=reuse_caches)
 
         if by_blocks:
             names = get_default(names, self.names)
@@ -956,10 +994,10 @@ class Equations(Container):
                 for it, term in enumerate(eq.terms):
                     if select_term:
                         _select_term = (lambda x: select_term(x)
-                                        and (x.name == term.name))
+                                        and (x is term))
 
                     else:
-                        _select_term = lambda x: x.name == term.name
+                        _select_term = lambda x: x is term
 
                     ir = get_indx(term.get_virtual_name(),
                                   reduced=True, allow_dual=True)
@@ -46,9 +46,10 @@ class Evaluator(Struct):
     given problem.
     """
 
-    def __init__(self, problem, matrix_hook=None, assemble=None):
+    def __init__(self, problem, matrix_hook=None, assemble=None,
+                 reuse_caches=False):
         Struct.__init__(self, problem=problem, matrix_hook=matrix_hook,
-                        assemble=assemble)
+                        assemble=assemble, reuse_caches=reuse_caches)
 
     @staticmethod
     def new_ulf_iteration(problem, nls, vec, it, err, err0):
@@ -84,6 +85,7 @@ class Evaluator(Struct):
 
         vec_r = self.problem.equations.eval_residuals(
             vec, select_term=select_term, assemble=self.assemble,
+            reuse_caches=self.reuse_caches,
         )
         if self.matrix_hook is not None:
             vec_r = self.matrix_hook(vec_r, self.problem, call_mode='residual')
@@ -117,6 +119,7 @@ class Evaluator(Struct):
             mtx = pb.mtx_a
         mtx = pb.equations.eval_tangent_matrices(
             vec, mtx, select_term=select_term, assemble=self.assemble,
+            reuse_caches=self.reuse_caches,
         )
 
         if (not pb.active_only) and pb.not_active_only_modify_matrix:
@@ -147,8 +150,8 @@ def create_evaluable(expression, fields, materials, variables, integrals,
                      ebcs=None, epbcs=None, lcbcs=None,
                      ts=None, functions=None,
                      auto_init=False, mode='eval', extra_args=None,
-                     active_only=True, eterm_options=None, verbose=True,
-                     kwargs=None):
+                     active_only=True, eterm_options=None,
+                     dof_reordering=None, verbose=True, kwargs=None):
     """
     Create evaluable object (equations and corresponding variables)
     from the `expression` string.
@@ -196,6 +199,9 @@ def create_evaluable(expression, fields, materials, variables, integrals,
         vectors (right-hand sides) contain only active DOFs.
     eterm_options : dict, optional
         The einsum-based terms evaluation options.
+    dof_reordering : 'rcm' or 'morton', optional
+        If given, in 'weak' mode, the active DOFs are renumbered to improve
+        their locality.
     verbose : bool
         If False, reduce verbosity.
     kwargs : dict, optional
@@ -249,7 +255,8 @@ def create_evaluable(expression, fields, materials, variables, integrals,
 
     if mode == 'weak':
         equations.time_update(ts, ebcs, epbcs, lcbcs, functions,
-                              active_only=active_only, verbose=verbose)
+                              active_only=active_only,
+                              dof_reordering=dof_reordering, verbose=verbose)
 
     else:
         for eq in equations:
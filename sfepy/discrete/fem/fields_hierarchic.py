@@ -185,6 +185,23 @@ class H1HierarchicVolumeField(H1Mixin, FEField):
 
         return n_dof, all_dofs, remap
 
+    def get_node_orders(self):
+        """
+        Return the polynomial order of the basis function of each field node.
+
+        The order of a Lobatto tensor product basis function is the maximum of
+        its Lobatto function indices, the vertex functions have the order 1.
+        Because the basis is hierarchical, the nodes with orders not greater
+        than `q` span the order `q` approximation space.
+        """
+        ps = self.poly_space
+        local_orders = nm.maximum(ps.nodes.max(axis=1), 1)
+
+        orders = nm.ones(self.n_nod, dtype=nm.int32)
+        orders[self.econn] = local_orders
+
+        return orders
+
     def set_dofs(self, fun=0.0, region=None, dpn=None, warn=None):
         """
         Set the values of DOFs in a given `region` using a function of space
@@ -180,7 +180,7 @@ class Mesh(Struct):
 
     @staticmethod
     def from_file(filename=None, io='auto', prefix_dir=None,
-                  omit_facets=False, file_format=None):
+                  omit_facets=False, file_format=None, reorder=None):
         """
         Read a mesh from a file.
 
@@ -198,6 +198,13 @@ class Mesh(Struct):
             If True, do not read cells of lower dimension than the space
             dimension (faces and/or edges). Only some MeshIO subclasses
             support this!
+        file_format : str, optional
+            The file format, passed to `MeshIO.any_from_filename()`.
+        reorder : str or dict, optional
+            If given, reorder the mesh vertices and cells for memory locality
+            using :func:`Mesh.reorder()`. A string is the vertex reordering
+            method, a dict contains the keyword arguments of
+            :func:`Mesh.reorder()`.
         """
         if isinstance(filename, Mesh):
             return filename
@@ -221,6 +228,11 @@ class Mesh(Struct):
 
         mesh._set_shape_info()
 
+        if reorder is not None:
+            if isinstance(reorder, str):
+                reorder = {'vertex_method' : reorder}
+            mesh = mesh.reorder(**reorder)
+
         return mesh
 
     @staticmethod
@@ -559,3 +571,120 @@ class Mesh(Struct):
                verbose=verbose)
 
         return graph
+
+    def reorder(self, vertex_method='rcm', cell_method='vertices', name=None,
+                verbose=True):
+        """
+        Create a new mesh with vertices and cells reordered to improve the
+        memory locality of the mesh data and data gathered using the cell
+        connectivity.
+
+        The vertex coordinates, vertex groups, connectivities, cell groups
+        and nodal BCs are permuted consistently. The cells are reordered
+        within each cell type group. The applied permutations are stored in
+        the new mesh as `vertex_perm` and `cell_perms` attributes: data
+        attached to the original vertices (cells of type `desc`) can be
+        reordered by `data[mesh.vertex_perm]` (`data[mesh.cell_perms[desc]]`).
+
+        Parameters
+        ----------
+        vertex_method : 'rcm', 'morton', 'hilbert' or None
+            The vertex reordering method: the reverse Cuthill-McKee ordering
+            of the vertex graph, or the order of vertices along the Morton or
+            Hilbert space-filling curves. If None, the vertex order is kept.
+        cell_method : 'vertices', 'morton', 'hilbert' or None
+            The cell reordering method: the order of the lowest (then
+            highest) new vertex numbers of cells, or the order of cell
+            centroids along the Morton or Hilbert space-filling curves. If
+            None, the cell order is kept.
+        name : str, optional
+            The name of the new mesh. If None, the mesh name is used instead.
+        verbose : bool
+            If True, print the reordering information.
+
+        Returns
+        -------
+        mesh : Mesh instance
+            The reordered mesh.
+        """
+        from scipy.sparse.csgraph import reverse_cuthill_mckee
+        from sfepy.linalg.sparse import get_bandwidth
+        from sfepy.linalg.geometry import get_morton_codes, get_hilbert_codes
+
+        sfcs = {'morton' : get_morton_codes, 'hilbert' : get_hilbert_codes}
+
+        timer = Timer(start=True)
+        coors, ngroups, conns, mat_ids, descs = self._get_io_data()
+
+        # The vertex graph of the cells of the highest dimension.
+        tdim = max(self.dims)
+        rows, cols, n_cell = [], [], 0
+        for conn, desc in zip(conns, descs):
+            if int(desc[0]) == tdim:
+                rows.append(n_cell + nm.repeat(nm.arange(conn.shape[0]),
+                                               conn.shape[1]))
+                cols.append(conn.ravel())
+                n_cell += conn.shape[0]
+
+        cols = nm.concatenate(cols)
+        incidence = sp.csr_array((nm.ones(len(cols)),
+                                  (nm.concatenate(rows), cols)),
+                                 shape=(n_cell, self.n_nod))
+        graph = (incidence.T @ incidence).tocsr()
+
+        if vertex_method is None:
+            vperm = nm.arange(self.n_nod, dtype=nm.int32)
+
+        elif vertex_method == 'rcm':
+            vperm = reverse_cuthill_mckee(graph, symmetric_mode=True)
+
+        elif vertex_method in sfcs:
+            vperm = nm.argsort(sfcs[vertex_method](coors), kind='stable')
+
+        else:
+            raise ValueError('unknown vertex reordering method! (%s)'
+                             % vertex_method)
+
+        vperm = vperm.astype(nm.int32)
+        ivperm = nm.empty_like(vperm)
+        ivperm[vperm] = nm.arange(self.n_nod, dtype=nm.int32)
+
+        new_coors = coors[vperm]
+        new_conns, new_mat_ids, cperms = [], [], {}
+        for conn, mat_id, desc in zip(conns, mat_ids, descs):
+            conn = ivperm[conn]
+
+            if cell_method is None:
+                cperm = nm.arange(conn.shape[0], dtype=nm.int32)
+
+            elif cell_method == 'vertices':
+                cperm = nm.lexsort((conn.max(axis=1), conn.min(axis=1)))
+
+            elif cell_method in sfcs:
+                centroids = new_coors[conn].mean(axis=1)
+                cperm = nm.argsort(sfcs[cell_method](centroids), kind='stable')
+
+            else:
+                raise ValueError('unknown cell reordering method! (%s)'
+                                 % cell_method)
+
+            cperms[desc] = cperm.astype(nm.int32)
+            new_conns.append(conn[cperm])
+            new_mat_ids.append(mat_id[cperm])
+
+        nodal_bcs = {key : nm.sort(ivperm[val])
+                     for key, val in self.nodal_bcs.items()}
+
+        mesh = Mesh.from_data(get_default(name, self.name), new_coors,
+                              ngroups[vperm], new_conns, new_mat_ids, descs,
+                              nodal_bcs=nodal_bcs)
+        mesh.vertex_perm = vperm
+        mesh.cell_perms = cperms
+
+        output('mesh %s: vertices: %s, cells: %s reordering:'
+               ' bandwidth %d -> %d (%.2f [s])'
+               % (self.name, vertex_method, cell_method,
+                  get_bandwidth(graph), get_bandwidth(graph, vperm),
+                  timer.stop()), verbose=verbose)
+
+        return mesh
@@ -1078,7 +1078,45 @@ class HDF5MeshIO(MeshIO):
             f.write(out[(out.find('\n') + 1):])
 
     def write(self, filename, mesh, out=None, ts=None, cache=None,
-              xdmf=False, **kwargs):
+              xdmf=False, compression=None, complevel=None, shuffle=True,
+              chunks=None, float32=None, layout='step', time_chunks=16,
+              **kwargs):
+        """
+        Write the mesh and the output data of a time step.
+
+        Parameters
+        ----------
+        compression : str, optional
+            If given, the output data arrays are compressed by the given
+            PyTables compression library, e.g. 'zlib', 'blosc' or
+            'blosc:lz4'.
+        complevel : int, optional
+            The compression level, 4 by default.
+        shuffle : bool
+            If True, use the shuffle filter with the compression.
+        chunks : bool or int, optional
+            If True or an int, the output data arrays are stored as chunked
+            arrays. An int gives the number of rows of a chunk, otherwise the
+            chunk shape is determined automatically. Implied by
+            `compression`.
+        float32 : bool or list of str, optional
+            If True, the floating point data arrays are stored in single
+            precision. If a list, only the data with the given output keys or
+            variable names are stored in single precision.
+        layout : 'step' or 'time'
+            The layout of a new file. The 'step' layout stores the data of
+            each time step in a separate group. The 'time' layout stores each
+            output data in a single extendable array with the leading time
+            step axis, so that histories of data subsets can be read at once,
+            see :func:`HDF5MeshIO.read_data_history()`. The 'time' layout
+            does not support 'custom' mode data and XDMF files.
+        time_chunks : int
+            The number of time steps in a chunk of the 'time' layout arrays.
+
+        Notes
+        -----
+        The other arguments are the same as in :func:`MeshIO.write()`.
+        """
         def expand_data_3d(data):
             expand_tab = {
                 2: (3, [0, 1]),
@@ -1095,11 +1133,63 @@ class HDF5MeshIO(MeshIO):
             else:
                 return data
 
+        def is_float32(key, val):
+            if (float32 is None) or (float32 is False):
+                return False
+
+            elif float32 is True:
+                return True
+
+            return (key in float32) or (val.get('var_name', None) in float32)
+
+        def create_data_array(group, data):
+            if data.size and (filters is not None):
+                chunkshape = (None if chunks in (None, True)
+                              else (min(chunks, len(data)),) + data.shape[1:])
+                fd.create_carray(group, 'data', obj=data, title='data',
+                                 filters=filters, chunkshape=chunkshape)
+
+            else:
+                fd.create_array(group, 'data', data, 'data')
+
+        def create_history_array(group, data):
+            if chunks in (None, True):
+                # About 64 kB per time step in a chunk.
+                n_row = max(1, (1 << 16) // max(1, data[:1].nbytes))
+
+            else:
+                n_row = chunks
+            chunkshape = ((time_chunks, max(1, min(n_row, len(data))))
+                          + data.shape[1:])
+            fd.create_earray(group, 'data',
+                             atom=pt.Atom.from_dtype(data.dtype),
+                             shape=(0,) + data.shape, title='data history',
+                             filters=get_default(filters,
+                                                 pt.Filters(complevel=0)),
+                             chunkshape=chunkshape)
+
         from time import asctime
 
         if pt is None:
             raise ValueError('pytables not imported!')
 
+        if compression is not None:
+            filters = pt.Filters(complevel=get_default(complevel, 4),
+                                 complib=compression, shuffle=shuffle)
+
+        elif chunks:
+            filters = pt.Filters(complevel=0)
+
+        else:
+            filters = None
+
+        if layout not in ('step', 'time'):
+            raise ValueError('unknown layout! (%s)' % layout)
+
+        if (layout == 'time') and xdmf:
+            raise ValueError('XDMF files are not supported with the time'
+                             ' layout!')
+
         step = get_default_attr(ts, 'step', 0)
         if (step == 0) or not op.exists(filename):
             # A new file.
@@ -1126,6 +1216,20 @@ class HDF5MeshIO(MeshIO):
                                 nm.array([step], dtype=nm.int32),
                                 'last saved step')
 
+                if layout == 'time':
+                    th_group = fd.create_group('/', 'time_data',
+                                               'time history data')
+                    th_group._v_attrs.name_dict = {}
+                    for name, dtype in [('steps', nm.int32),
+                                        ('times', nm.float64),
+                                        ('nts', nm.float64)]:
+                        fd.create_earray(th_group, name,
+                                         atom=pt.Atom.from_dtype(
+                                             nm.dtype(dtype)),
+                                         shape=(0,), title=name)
+
+                fd.root._v_attrs.layout = layout
+
         if out is not None:
             if ts is None:
                 step, time, nt = 0, 0.0, 0.0
@@ -1135,6 +1239,81 @@ class HDF5MeshIO(MeshIO):
             # Existing file.
             fd = pt.open_file(filename, mode="r+")
 
+        if (out is not None) and (self._get_layout(fd) == 'time'):
+            th_group = fd.root.time_data
+            if step in th_group.steps.read():
+                fd.close()
+                raise ValueError('step %d is already saved in "%s" file!'
+                                 ' Possible help: remove the old file or'
+                                 ' start saving from the initial time.'
+                                 % (step, filename))
+
+            name_dict = th_group._v_attrs.name_dict
+            n_saved = th_group.steps.nrows
+            for key, val in out.items():
+                if val.mode == 'custom':
+                    fd.close()
+                    raise ValueError('custom mode data are not supported'
+                                     ' with the time layout! (%s)' % key)
+
+                if (key not in name_dict) and (n_saved > 0):
+                    fd.close()
+                    raise ValueError('data %s not present in the first'
+                                     ' saved step!' % key)
+
+            for key, val in out.items():
+                data = val.data
+                if is_float32(key, val):
+                    if data.dtype == nm.float64:
+                        data = data.astype(nm.float32)
+
+                    elif data.dtype == nm.complex128:
+                        data = data.astype(nm.complex64)
+
+                if key not in name_dict:
+                    group_name = '__' + key.translate(self._tr)
+                    data_group = fd.create_group(th_group, group_name,
+                                                 '%s data' % key)
+                    fd.create_array(data_group, 'dname', enc(key), 'data name')
+                    fd.create_array(data_group, 'mode', enc(val.mode), 'mode')
+                    name = val.get('name', 'output_data')
+                    fd.create_array(data_group, 'name', enc(name),
+                                    'object name')
+                    shape = val.get('shape', data.shape)
+                    dofs = val.get('dofs', None)
+                    if dofs is None:
+                        dofs = [''] * nm.squeeze(shape)[-1]
+                    fd.create_array(data_group, 'dofs',
+                                    [enc(ic) for ic in dofs], 'dofs')
+                    fd.create_array(data_group, 'shape', shape, 'shape')
+                    fd.create_array(data_group, 'var_name',
+                                    enc(val.get('var_name', '')),
+                                    'object parent name')
+                    if val.mode == 'full':
+                        fd.create_array(data_group, 'field_name',
+                                        enc(val.field_name), 'field name')
+                    fd.create_array(data_group, 'region_name',
+                                    enc(val.get('region_name', '')),
+                                    'region name')
+                    create_history_array(data_group, data)
+                    name_dict[key] = group_name
+
+                data_group = th_group._f_get_child(name_dict[key])
+                data_group.data.append(data[None, ...])
+
+            th_group._v_attrs.name_dict = name_dict
+            th_group.steps.append([step])
+            th_group.times.append([time])
+            th_group.nts.append([nt])
+            fd.root.last_step[0] = step
+
+            fd.remove_node(fd.root.tstat.finished)
+            fd.create_array(fd.root.tstat, 'finished', enc(asctime()),
+                            'file closing time')
+            fd.close()
+
+        elif out is not None:
+
             step_group_name = 'step%d' % step
             if step_group_name in fd.root:
                 raise ValueError('step %d is already saved in "%s" file!'
@@ -1155,6 +1334,13 @@ class HDF5MeshIO(MeshIO):
                 else:
                     data = val.data
 
+                if (val.mode != 'custom') and is_float32(key, val):
+                    if data.dtype == nm.float64:
+                        data = data.astype(nm.float32)
+
+                    elif data.dtype == nm.complex128:
+                        data = data.astype(nm.complex64)
+
                 group_name = '__' + key.translate(self._tr)
                 data_group = fd.create_group(step_group, group_name,
                                              '%s data' % key)
@@ -1175,7 +1361,7 @@ class HDF5MeshIO(MeshIO):
                     dofs = [''] * nm.squeeze(shape)[-1]
                 var_name = val.get('var_name', '')
 
-                fd.create_array(data_group, 'data', data, 'data')
+                create_data_array(data_group, data)
                 fd.create_array(data_group, 'dofs', [enc(ic) for ic in dofs],
                                 'dofs')
                 fd.create_array(data_group, 'shape', shape, 'shape')
@@ -1226,6 +1412,23 @@ class HDF5MeshIO(MeshIO):
 
         return out
 
+    @staticmethod
+    def _get_layout(fd):
+        return getattr(fd.root._v_attrs, 'layout', 'step')
+
+    @staticmethod
+    def _get_step_index(fd, step):
+        """
+        Get the index of `step` along the leading axis of the time layout
+        arrays, or None, if the step is not saved.
+        """
+        steps = fd.root.time_data.steps.read()
+        if step is None:
+            return 0 if len(steps) else None
+
+        ii = nm.flatnonzero(steps == step)
+        return ii[0] if len(ii) else None
+
     def _get_step_group_names(self, fd):
         return sorted([name for name in fd.root._v_groups.keys()
                        if name.startswith('step')],
@@ -1247,6 +1450,15 @@ class HDF5MeshIO(MeshIO):
         filename = get_default(filename, self.filename)
         fd = pt.open_file(filename, mode='r')
 
+        if self._get_layout(fd) == 'time':
+            th_group = fd.root.time_data
+            steps = th_group.steps.read()
+            times = th_group.times.read()
+            nts = th_group.nts.read()
+            fd.close()
+
+            return steps, times, nts
+
         steps = []
         times = []
         nts = []
@@ -1268,6 +1480,15 @@ class HDF5MeshIO(MeshIO):
         filename = get_default(filename, self.filename)
         fd = pt.open_file(filename, mode="r")
 
+        if self._get_layout(fd) == 'time':
+            if self._get_step_index(fd, step) is None:
+                output('step %s data not found - premature end of file?'
+                       % step)
+                fd.close()
+                return None, None
+
+            return fd, fd.root.time_data
+
         if step is None:
             step = int(self._get_step_group_names(fd)[0][4:])
 
@@ -1286,8 +1507,15 @@ class HDF5MeshIO(MeshIO):
         if fd is None:
             return None
 
+        if self._get_layout(fd) == 'time':
+            ii = self._get_step_index(fd, step)
+            get_data = lambda node: node[ii]
+
+        else:
+            get_data = lambda node: node.read()
+
         out = {}
-        for data_group in step_group:
+        for data_group in step_group._f_iter_nodes('Group'):
             try:
                 key = dec(data_group.dname.read())
 
@@ -1300,7 +1528,7 @@ class HDF5MeshIO(MeshIO):
                 continue
 
             name = dec(data_group.name.read())
-            data = data_group.data.read()
+            data = get_data(data_group.data)
             dofs = tuple([dec(ic) for ic in data_group.dofs.read()])
             try:
                 shape = tuple(int(ii) for ii in data_group.shape.read())
@@ -1349,6 +1577,21 @@ class HDF5MeshIO(MeshIO):
         filename = get_default(filename, self.filename)
         fd = pt.open_file(filename, mode="r")
 
+        if self._get_layout(fd) == 'time':
+            data = fd.root.time_data._f_get_child(node_name).data
+            # A single read of all steps of the selected rows.
+            uindx, iinv = nm.unique(indx, return_inverse=True)
+            aux = data[:, uindx.tolist()]
+            fd.close()
+
+            th = {}
+            for ii, ir in zip(indx, iinv.ravel()):
+                th[ii] = aux[:, ir]
+                if th[ii].ndim == 4: # cell data.
+                    th[ii] = th[ii][:,0,:,0]
+
+            return th
+
         th = dict_from_keys_init(indx, list)
         for gr_name in self._get_step_group_names(fd):
             step_group = fd.get_node(fd.root, gr_name)
@@ -1375,6 +1618,17 @@ class HDF5MeshIO(MeshIO):
 
         ths = dict_from_keys_init(var_names, list)
 
+        if self._get_layout(fd) == 'time':
+            th_group = fd.root.time_data
+            name_dict = th_group._v_attrs.name_dict
+            for var_name in var_names:
+                data = th_group._f_get_child(name_dict[var_name]).data
+                ths[var_name] = list(data.read())
+
+            fd.close()
+
+            return ths
+
         arr = nm.asarray
         for step in range(ts.n_step):
             gr_name = 'step%d' % step
@@ -1388,6 +1642,92 @@ class HDF5MeshIO(MeshIO):
 
         return ths
 
+    def read_data_history(self, dname, indx=None, steps=None, filename=None):
+        """
+        Read the history of data rows (e.g. mesh vertices or cells) of the
+        output data `dname`.
+
+        With the 'time' layout, the data of all steps are read at once,
+        otherwise the step groups are read one by one.
+
+        Parameters
+        ----------
+        dname : str
+            The output data key.
+        indx : array of ints, optional
+            The data rows to read. If None, all rows are read.
+        steps : array of ints, optional
+            The saved time steps to read. If None, all saved steps are read.
+        filename : str, optional
+            The file name. If None, the file name of the instance is used.
+
+        Returns
+        -------
+        steps : array
+            The time steps.
+        data : array
+            The data of shape `(n_step, n_row, ...)`.
+        """
+        all_steps = self.read_times(filename=filename)[0]
+        if steps is None:
+            isteps = nm.arange(len(all_steps))
+
+        else:
+            isteps = nm.searchsorted(all_steps, steps)
+            if (nm.any(isteps >= len(all_steps))
+                or nm.any(all_steps[nm.minimum(isteps, len(all_steps) - 1)]
+                          != steps)):
+                raise ValueError('some steps are not saved! (%s)' % steps)
+
+        if indx is not None:
+            uindx, iinv = nm.unique(indx, return_inverse=True)
+            iinv = iinv.ravel()
+
+        filename = get_default(filename, self.filename)
+        fd = pt.open_file(filename, mode='r')
+        try:
+            if self._get_layout(fd) == 'time':
+                th_group = fd.root.time_data
+                name_dict = th_group._v_attrs.name_dict
+                if dname not in name_dict:
+                    raise KeyError('non-existent data: %s' % dname)
+
+                node = th_group._f_get_child(name_dict[dname]).data
+                rows = slice(None) if indx is None else uindx.tolist()
+                if steps is None:
+                    data = node[:, rows]
+
+                else:
+                    data = nm.stack([node[ii, rows] for ii in isteps])
+
+            else:
+                names = self._get_step_group_names(fd)
+                data = []
+                for ii in isteps:
+                    step_group = fd.get_node(fd.root, names[ii])
+                    name_dict = step_group._v_attrs.name_dict
+                    if dname not in name_dict:
+                        raise KeyError('non-existent data: %s' % dname)
+
+                    node = step_group._f_get_child(name_dict[dname]).data
+                    if indx is None:
+                        data.append(node.read())
+
+                    else:
+                        key = ((uindx.tolist(),)
+                               + (slice(None),) * (node.ndim - 1))
+                        data.append(node[key])
+
+                data = nm.array(data)
+
+        finally:
+            fd.close()
+
+        if indx is not None:
+            data = data[:, iinv]
+
+        return all_steps[isteps], data
+
 
 class HDF5XdmfMeshIO(HDF5MeshIO):
     format = "hdf5-xdmf"
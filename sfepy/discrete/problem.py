@@ -1,5 +1,6 @@
 import os
 import os.path as op
+from ast import literal_eval
 from copy import copy
 from functools import partial
 
@@ -36,11 +37,12 @@ def make_is_save(options):
     results of a time step.
     """
     class IsSave(Struct):
-        def __init__(self, save_times):
+        def __init__(self, save_times, step_interval):
             if is_sequence(save_times):
                 save_times = nm.asarray(save_times)
 
             self.save_times0 = save_times
+            self.step_interval = step_interval
             self.reset()
 
         def reset(self, ts=None):
@@ -52,6 +54,12 @@ def make_is_save(options):
                                                   self.save_times0)
 
         def __call__(self, ts):
+            if ((self.step_interval > 1)
+                and (ts.step % self.step_interval)
+                and (ts.time + (1e-14 * ts.dt) < ts.t1)):
+                # Decimated step, the last step is always saved.
+                return False
+
             if isinstance(self.save_times, str) and self.save_times == 'all':
                 return True
 
@@ -68,7 +76,8 @@ def make_is_save(options):
             return False
 
     save_times = options.get('save_times', 'all')
-    is_save = IsSave(save_times)
+    step_interval = options.get('save_step_interval', 1)
+    is_save = IsSave(save_times, step_interval)
 
     return is_save
 
@@ -191,7 +200,8 @@ class Problem(Struct):
         if conf.get('filename_mesh') is not None:
             from sfepy.discrete.fem.domain import FEDomain
 
-            mesh = Mesh.from_file(conf.filename_mesh, prefix_dir=conf_dir)
+            mesh = Mesh.from_file(conf.filename_mesh, prefix_dir=conf_dir,
+                                  reorder=conf.options.get('mesh_reordering'))
             domain = FEDomain(mesh.name, mesh)
 
             refine = conf.options.get('refinement_level', 0)
@@ -662,6 +672,8 @@ class Problem(Struct):
                                        ebcs, epbcs, lcbcs,
                                        functions, self,
                                        active_only=self.active_only,
+                                       dof_reordering=self.conf.options.get(
+                                           'dof_reordering', None),
                                        verbose=self.conf.get('verbose', True))
         self.graph_changed = graph_changed
 
@@ -792,6 +804,10 @@ class Problem(Struct):
         set_mesh_coors(self.domain, self.fields, coors,
                        update_fields=update_fields, actual=actual,
                        clear_all=clear_all, extra_dofs=extra_dofs)
+        if self.equations is not None:
+            # The cached data (e.g. the hyperelastic kinematics) depend on
+            # the geometry.
+            self.equations.variables.invalidate_evaluate_caches(step=0)
 
     def refine_uniformly(self, level):
         """
@@ -862,7 +878,21 @@ class Problem(Struct):
             The linearization configuration for higher order
             approximations. If its kind is 'adaptive', `split_results_by` is
             assumed 'variable'.
+
+        Notes
+        -----
+        If the output writer is active, see :func:`Problem.solve()`, the
+        output data are created in the calling thread, and only the file
+        writing is done in the background.
+
+        When saving to a HDF5 file, the 'h5_options' problem option items are
+        passed to :func:`HDF5MeshIO.write()
+        <sfepy.discrete.fem.meshio.HDF5MeshIO.write()>`, unless overridden by
+        `kwargs`.
         """
+        if op.splitext(filename)[1] == '.h5':
+            kwargs = dict(self.conf.options.get('h5_options', {}), **kwargs)
+
         linearization = get_default(linearization, self.linearization)
         if linearization.kind != 'adaptive':
             split_results_by = get_default(split_results_by,
@@ -880,12 +910,35 @@ class Problem(Struct):
             if post_process_hook is not None:
                 out = post_process_hook(out, self, state, extend=extend)
 
+        writer = self.get('output_writer', None)
+        if writer is None:
+            def write(mesh, filename, out):
+                mesh.write(filename, io='auto', out=out,
+                           float_format=self.float_format, **kwargs)
+
+        else:
+            wkwargs = kwargs.copy()
+            if wkwargs.get('ts') is not None:
+                wkwargs['ts'] = wkwargs['ts'].copy()
+
+            def write(mesh, filename, out):
+                # Snapshot the data that can change before they are written.
+                wout = {}
+                for key, val in out.items():
+                    if isinstance(getattr(val, 'data', None), nm.ndarray):
+                        val = val.copy()
+                        val.data = val.data.copy()
+
+                    wout[key] = val
+
+                writer.put(mesh.write, filename, io='auto', out=wout,
+                           float_format=self.float_format, **wkwargs)
+
         if linearization.kind == 'adaptive':
             for key, val in out.items():
                 mesh = val.get('mesh', self.domain.mesh)
                 aux = io.edit_filename(filename, suffix='_' + val.var_name)
-                mesh.write(aux, io='auto', out={key : val},
-                           float_format=self.float_format, **kwargs)
+                write(mesh, aux, {key : val})
                 if hasattr(val, 'levels'):
                     output('max. refinement per group:', val.levels)
 
@@ -917,8 +970,7 @@ class Problem(Struct):
                 if len(vout) > 0:
                     mesh = meshes[var.field.region.name]
                     aux = io.edit_filename(filename, suffix='_' + var.name)
-                    mesh.write(aux, io='auto', out=vout,
-                               float_format=self.float_format, **kwargs)
+                    write(mesh, aux, vout)
 
         elif split_results_by == 'region':
             rnames = [v.region_name for v in out.values()]
@@ -929,13 +981,11 @@ class Problem(Struct):
                         if val.region_name == rname}
 
                 aux = io.edit_filename(filename, suffix='_' + rname)
-                mesh.write(aux, io='auto', out=rout,
-                           float_format=self.float_format, **kwargs)
+                write(mesh, aux, rout)
 
         else:
             mesh = out.pop('__mesh__', self.domain.mesh)
-            mesh.write(filename, io='auto', out=out,
-                       float_format=self.float_format, **kwargs)
+            write(mesh, filename, out)
 
     def save_ebc(self, filename, ebcs=None, epbcs=None,
                  force=True, default=0.0):
@@ -1044,8 +1094,10 @@ class Problem(Struct):
 
             UserEvaluator = self.conf.options.get('user_evaluator', None)
             Eval = UserEvaluator if UserEvaluator is not None else Evaluator
+            reuse_caches = self.conf.options.get('reuse_trial_state', False)
             ev = self.evaluator = Eval(self, matrix_hook=self.matrix_hook,
-                                       assemble=assemble)
+                                       assemble=assemble,
+                                       reuse_caches=reuse_caches)
 
         return ev
 
@@ -1336,12 +1388,15 @@ class Problem(Struct):
             The function called at the end of each time step.
         """
         is_save = make_is_save(self.conf.options)
+        restart_interval = self.conf.options.get('restart_interval', 0.0)
+        restart_timer = Timer('restart')
 
         def init_fun(ts, vec0):
             if not ts.is_quasistatic:
                 self.init_time(ts)
 
             is_save.reset(ts)
+            restart_timer.start(reset=True)
 
             restart_filename = self.conf.options.get('load_restart', None)
             if restart_filename is not None:
@@ -1373,8 +1428,10 @@ class Problem(Struct):
                 step_hook(self, ts, variables)
 
             restart_filename = self.get_restart_filename(ts=ts)
-            if restart_filename is not None:
+            if ((restart_filename is not None)
+                and (restart_timer.stop() >= restart_interval)):
                 self.save_restart(restart_filename, ts=ts)
+                restart_timer.start()
 
             if save_results and is_save(ts):
                 if not isinstance(self.get_solver(), StationarySolver):
@@ -1510,6 +1567,15 @@ class Problem(Struct):
         -------
         variables : Variables
             The variables with the final time step state.
+
+        Notes
+        -----
+        If the 'async_output' option is set, the results are written by a
+        :class:`BackgroundWriter <sfepy.base.ioutils.BackgroundWriter>`
+        instance stored in `self.output_writer`, that is closed (all pending
+        writes are finished) before this function returns. This is not used
+        when the mesh coordinates are updated during the solution (the
+        'mesh_update_variables' option), as the meshes are not copied.
         """
         if status is None:
             status = IndexedStruct()
@@ -1557,12 +1623,22 @@ class Problem(Struct):
                 step_hook=step_hook, post_process_hook=post_process_hook)
 
             tss.set_dof_info(variables.adi)
-            vec = tss(variables.get_state(self.active_only, force=True),
-                      init_fun=init_fun,
-                      prestep_fun=prestep_fun,
-                      poststep_fun=poststep_fun,
-                      status=status,
-                      log_nls_status=log_nls_status)
+            self.output_writer = self.create_output_writer(save_results)
+            try:
+                vec = tss(variables.get_state(self.active_only, force=True),
+                          init_fun=init_fun,
+                          prestep_fun=prestep_fun,
+                          poststep_fun=poststep_fun,
+                          status=status,
+                          log_nls_status=log_nls_status)
+
+            finally:
+                if self.output_writer is not None:
+                    timer = Timer(start=True)
+                    self.output_writer.close()
+                    output('output flushed in %.2f seconds' % timer.stop(),
+                           verbose=verbose)
+                    self.output_writer = None
 
             time_stats = status.get('time_stats')
             if time_stats is not None:
@@ -1607,6 +1683,22 @@ class Problem(Struct):
 
         return variables
 
+    def create_output_writer(self, save_results=True):
+        """
+        Create the background output writer according to the 'async_output'
+        option: True means the default queue size, an integer gives the
+        queue size. Return None, if the option is not set, `save_results` is
+        False, or the mesh coordinates are updated during the solution.
+        """
+        async_output = self.conf.options.get('async_output', False)
+        if ((not async_output) or (not save_results)
+            or (self.conf.options.get('mesh_update_variables') is not None)):
+            return None
+
+        max_size = 4 if async_output is True else int(async_output)
+        return io.BackgroundWriter(max_size=max_size,
+                                   name='output_writer_%s' % self.name)
+
     def block_solve(self, state0=None, status=None, save_results=True,
                     step_hook=None, post_process_hook=None,
                     report_nls_status=False, log_nls_status=False,
@@ -1849,6 +1941,8 @@ class Problem(Struct):
                                mode=mode, extra_args=extra_args,
                                active_only=active_only,
                                eterm_options=eterm_options,
+                               dof_reordering=self.conf.options.get(
+                                   'dof_reordering', None),
                                verbose=verbose,
                                kwargs=kwargs)
 
@@ -2080,6 +2174,13 @@ class Problem(Struct):
         """
         Save the current state and time step to a restart file.
 
+        The file is written under a temporary name first and then renamed,
+        so that an interrupted write cannot damage the previous restart
+        files. If the results are written in a background thread (the
+        'async_output' option), the restart file is written by the same
+        thread from a copy of the data. With the `save_restart` option
+        equal to `-n`, only the last `n` restart files are kept.
+
         Parameters
         ----------
         filename : str
@@ -2089,52 +2190,92 @@ class Problem(Struct):
 
         Notes
         -----
-        Does not support terms with internal state.
+        The history data of terms with a custom advance function stored
+        in the variable evaluate caches, e.g. the fading memory terms
+        based on :class:`ETHTerm <sfepy.terms.terms_th.ETHTerm>`, are
+        saved. Other terms with internal state are not supported.
         """
-        import tables as pt
-
         if ts is None:
             ts = self.get_default_ts()
 
-        fd = pt.open_file(filename, mode='w', title='SfePy restart file')
+        ts_state = {key : copy(val) for key, val in ts.get_state().items()}
+
+        variables = self.get_variables()
+        r_vec = variables.r_vec
+        if r_vec is not None:
+            r_vec = r_vec.copy()
+
+        var_datas = {}
+        for var in variables.iter_state():
+            datas = []
+            for ii in range(len(var.data)):
+                if var.data[ii] is None: break
+                datas.append(var(step=-ii).copy())
+
+            var_datas[var.name] = (datas, var.get_history_caches())
+
+        writer = self.get('output_writer', None)
+        if writer is not None:
+            writer.put(self._write_restart, filename, ts_state, r_vec,
+                       var_datas)
+
+        else:
+            self._write_restart(filename, ts_state, r_vec, var_datas)
+
+    def _write_restart(self, filename, ts_state, r_vec, var_datas):
+        import tables as pt
+
+        tmp_filename = filename + '.tmp'
+        fd = pt.open_file(tmp_filename, mode='w', title='SfePy restart file')
 
         tgroup = fd.create_group('/', 'ts', 'ts')
-        for key, val in ts.get_state().items():
+        for key, val in ts_state.items():
             fd.create_array(tgroup, key, val, key)
 
-        variables = self.get_variables()
-        if variables.r_vec is not None:
-            fd.create_array('/', 'r_vec', variables.r_vec,
-                            'reduced state vector')
+        if r_vec is not None:
+            fd.create_array('/', 'r_vec', r_vec, 'reduced state vector')
 
-        for var in variables.iter_state():
-            vgroup = fd.create_group('/', var.name, var.name)
+        for var_name, (datas, caches) in var_datas.items():
+            vgroup = fd.create_group('/', var_name, var_name)
 
-            history_length = len(var.data)
+            history_length = len(datas)
             fd.create_array(vgroup, 'history_length', history_length,
                             'history length')
-            for ii in range(history_length):
-                data = var(step=-ii)
+            for ii, data in enumerate(datas):
                 fd.create_array(vgroup, 'data_%d' % ii, data, 'data')
 
+            if len(caches):
+                cgroup = fd.create_group(vgroup, 'history_caches',
+                                         'evaluate cache history data')
+                for ic, (mode, key, advance, arrays) in enumerate(caches):
+                    group = fd.create_group(cgroup, 'cache_%d' % ic)
+                    group._v_attrs.mode = mode
+                    group._v_attrs.key = repr(key)
+                    group._v_attrs.advance = advance
+                    for name, data in arrays.items():
+                        fd.create_array(group, name, data, name)
+
         fd.close()
+        os.replace(tmp_filename, filename)
 
         mode = self.conf.options.get('save_restart', None)
+        if filename in self._restart_filenames:
+            self._restart_filenames.remove(filename)
+        self._restart_filenames.append(filename)
 
-        if (mode == -1) and len(self._restart_filenames):
-            last_filename = self._restart_filenames.pop()
-            if last_filename != filename:
+        if (mode is not None) and (mode < 0):
+            while len(self._restart_filenames) > -mode:
+                last_filename = self._restart_filenames.pop(0)
                 try:
                     os.remove(last_filename)
 
                 except OSError:
                     pass
 
-        self._restart_filenames.append(filename)
-
     def load_restart(self, filename, ts=None):
         """
-        Load the current state and time step from a restart file.
+        Load the current state and time step from a restart file, including
+        the history data saved by :func:`Problem.save_restart()`.
 
         Alternatively, a regular output file in the HDF5 format can be used in
         place of the restart file. In that case the restart is only
@@ -2186,6 +2327,16 @@ class Problem(Struct):
                     if ii == 0:
                         variables.set_vec_part(vec, var.name, data)
 
+                if 'history_caches' in vgroup:
+                    caches = []
+                    for group in vgroup.history_caches._f_iter_nodes('Group'):
+                        attrs = group._v_attrs
+                        arrays = {node.name : node.read()
+                                  for node in group._f_iter_nodes('Array')}
+                        caches.append((attrs.mode, literal_eval(attrs.key),
+                                       attrs.advance, arrays))
+                    var.set_history_caches(caches)
+
             variables.init_state(vec=vec)
 
             if '/r_vec' in fd:
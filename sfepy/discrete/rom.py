@@ -0,0 +1,306 @@
+"""
+Reduced-order models (ROM) of linear problems with affine parameter
+dependence, based on the proper orthogonal decomposition (POD) and the
+Galerkin projection.
+
+The problem matrix and right-hand side are assumed to be affine combinations
+of the individual equation terms::
+
+  A(mu) = sum_q theta_q(mu) A_q,  r(mu) = sum_q theta_q(mu) r_q,
+
+where `A_q` and `r_q` are the matrices and residuals of the terms evaluated by
+:func:`Equations.eval_tangent_matrices()
+<sfepy.discrete.equations.Equations.eval_tangent_matrices>` and
+:func:`Equations.eval_residuals()
+<sfepy.discrete.equations.Equations.eval_residuals>` with ``by_terms=True``
+for reference parameters, and `theta_q(mu)` are the user-supplied scalar
+coefficients.
+"""
+import numpy as nm
+import scipy.sparse as sps
+
+from sfepy.base.base import output, get_default, Struct
+from sfepy.base.timing import Timer
+
+def get_pod_basis(snapshots, eps=1e-8, n_max=None):
+    """
+    Compute the POD basis of the snapshot vectors.
+
+    Parameters
+    ----------
+    snapshots : array
+        The snapshots stored in columns.
+    eps : float
+        The basis size is the smallest one, for which the relative error of
+        the snapshots projection in the Frobenius norm is at most `eps`.
+    n_max : int, optional
+        The maximum basis size.
+
+    Returns
+    -------
+    basis : array
+        The orthonormal basis vectors stored in columns.
+    svals : array
+        The singular values of the snapshot matrix.
+    """
+    uu, svals, _ = nm.linalg.svd(snapshots, full_matrices=False)
+
+    energy = nm.cumsum(svals[::-1]**2)[::-1]
+    if energy[0] > 0.0:
+        # errs[n] = the relative error with the n first modes.
+        errs = nm.sqrt(nm.r_[energy[1:], 0.0] / energy[0])
+        n_mode = nm.searchsorted(-errs, -eps) + 1
+
+    else:
+        n_mode = 1
+
+    n_mode = min(n_mode, get_default(n_max, n_mode))
+
+    return uu[:, :n_mode], svals
+
+class PODGalerkinROM(Struct):
+    """
+    POD-Galerkin reduced-order model of a linear problem depending on
+    parameters.
+
+    The snapshots are full problem solutions for given parameters, obtained
+    by :func:`Problem.solve() <sfepy.discrete.problem.Problem.solve>`. The
+    term matrices and residuals are projected to the POD basis, so that the
+    online solution for new parameters requires only the combination of the
+    small projected operators, and the solution of a small dense system. The
+    norm of the full residual of the reduced solution is estimated using
+    precomputed projections as well. If it exceeds the given tolerance, the
+    full problem is solved instead, and the solution is optionally added to
+    the snapshots.
+
+    Parameters
+    ----------
+    problem : Problem instance
+        The linear problem with active DOFs only and no linear combination
+        boundary conditions.
+    set_parameters : callable
+        The function `set_parameters(problem, mu)` setting the problem
+        parameters `mu`, e.g. the material values or loads, for the full
+        problem solution.
+    get_coefs : callable
+        The function `get_coefs(mu)` returning a dict of the affine
+        coefficients `theta_q(mu)` of the terms, with the keys (<equation
+        name>, <term index>), w.r.t. the reference parameters given in
+        :func:`PODGalerkinROM.project()`. The missing terms have the
+        coefficient one.
+    eps : float
+        The POD basis tolerance, see :func:`get_pod_basis()`.
+    n_max : int, optional
+        The maximum POD basis size.
+    eps_r : float
+        The maximum relative residual norm of reduced solutions. Note that the
+        residual estimate is computed from the squared norm and cannot resolve
+        values below about the square root of the machine epsilon.
+    enrich : bool
+        If True, the full solutions computed when `eps_r` is exceeded are
+        added to the snapshots and the model is updated.
+    """
+
+    def __init__(self, problem, set_parameters, get_coefs, eps=1e-8,
+                 n_max=None, eps_r=1e-6, enrich=True):
+        if not problem.active_only:
+            raise ValueError('ROM requires the active_only problem option!')
+
+        Struct.__init__(self, problem=problem, set_parameters=set_parameters,
+                        get_coefs=get_coefs, eps=eps, n_max=n_max,
+                        eps_r=eps_r, enrich=enrich,
+                        snapshots=[], basis=None, svals=None,
+                        keys=None, mtxs=None, rhss=None, mu0=None,
+                        n_full=0, n_rom=0)
+
+    def solve_full(self, mu, save_results=False):
+        """
+        Solve the full problem for parameters `mu`.
+
+        Returns
+        -------
+        variables : Variables
+            The variables with the solution.
+        """
+        pb = self.problem
+        self.set_parameters(pb, mu)
+        variables = pb.solve(save_results=save_results, verbose=False)
+        if variables.has_lcbc:
+            raise ValueError('ROM cannot be used with LCBCs!')
+
+        self.n_full += 1
+
+        return variables
+
+    def add_snapshot(self, mu):
+        """
+        Solve the full problem for parameters `mu` and store the reduced
+        solution vector as a snapshot.
+
+        Returns
+        -------
+        variables : Variables
+            The variables with the solution.
+        """
+        variables = self.solve_full(mu)
+        self.snapshots.append(variables.get_state(reduced=True).copy())
+
+        return variables
+
+    def project(self, mu0=None):
+        """
+        Evaluate the term matrices and residuals for the reference parameters
+        `mu0` and project them to the POD basis of the snapshots.
+
+        The term operators are kept, so that the model can be updated for new
+        snapshots by calling this function with `mu0` None.
+        """
+        timer = Timer(start=True)
+
+        if mu0 is not None:
+            self.mu0 = mu0
+            self.mtxs = None
+
+        if self.mtxs is None:
+            self.assemble_terms()
+
+        self.basis, self.svals = get_pod_basis(nm.array(self.snapshots).T,
+                                               eps=self.eps, n_max=self.n_max)
+        basis = self.basis
+
+        mvs = [mtx @ basis for mtx in self.mtxs]
+        n_term = len(mvs)
+        self.rmtxs = nm.array([basis.T @ mv for mv in mvs])
+        self.rrhss = nm.array([basis.T @ rhs for rhs in self.rhss])
+
+        # The residual norm estimate data.
+        self.gmtxs = nm.empty((n_term, n_term) + self.rmtxs.shape[1:],
+                              dtype=self.rmtxs.dtype)
+        self.gvecs = nm.empty((n_term, n_term, basis.shape[1]),
+                              dtype=self.rmtxs.dtype)
+        self.gvals = nm.empty((n_term, n_term), dtype=self.rmtxs.dtype)
+        for i0 in range(n_term):
+            for i1 in range(n_term):
+                self.gmtxs[i0, i1] = mvs[i0].T @ mvs[i1]
+                self.gvecs[i0, i1] = mvs[i0].T @ self.rhss[i1]
+                self.gvals[i0, i1] = self.rhss[i0] @ self.rhss[i1]
+
+        output('POD basis: %d snapshots, %d modes, %d terms, %.2f [s]'
+               % (len(self.snapshots), basis.shape[1], n_term, timer.stop()))
+
+    def assemble_terms(self):
+        """
+        Evaluate the term matrices and residuals for the reference parameters
+        in the state with zero active DOFs and the Dirichlet boundary
+        conditions applied, and embed them into the full reduced system.
+        """
+        pb = self.problem
+        self.set_parameters(pb, self.mu0)
+
+        variables = pb.get_initial_state()
+        pb.time_update()
+        variables.apply_ebc()
+        pb.update_materials()
+        if variables.has_lcbc:
+            raise ValueError('ROM cannot be used with LCBCs!')
+
+        vec = variables()
+        eqs = pb.equations
+        mtxs = eqs.eval_tangent_matrices(vec, pb.mtx_a, by_terms=True)
+        rhss = eqs.eval_residuals(vec, by_terms=True)
+
+        n_dof = pb.mtx_a.shape[0]
+        get_indx = variables.get_indx
+
+        self.keys = list(mtxs.keys())
+        self.mtxs, self.rhss = [], []
+        for key in self.keys:
+            eq_name, it = key
+            term = eqs[eq_name].terms[it]
+            ir = nm.arange(n_dof)[get_indx(term.get_virtual_name(),
+                                           reduced=True, allow_dual=True)]
+            emb = sps.csr_matrix((nm.ones(len(ir)), (ir, nm.arange(len(ir)))),
+                                 shape=(n_dof, len(ir)))
+            self.mtxs.append((emb @ mtxs[key]).tocsr())
+            self.rhss.append(emb @ rhss[key])
+
+    def get_theta(self, mu):
+        """
+        Return the array of the affine coefficients for parameters `mu`.
+        """
+        coefs = self.get_coefs(mu)
+        return nm.array([coefs.get(key, 1.0) for key in self.keys])
+
+    def solve_reduced(self, mu):
+        """
+        Solve the reduced problem for parameters `mu`.
+
+        Returns
+        -------
+        vec : array
+            The reduced DOF vector (with EBC and PBC DOFs removed) of the
+            solution.
+        err : float
+            The estimate of the relative residual norm of the solution
+            w.r.t. the residual norm of the zero solution.
+        """
+        theta = self.get_theta(mu)
+
+        mtx = nm.tensordot(theta, self.rmtxs, axes=1)
+        rhs = nm.tensordot(theta, self.rrhss, axes=1)
+        coefs = nm.linalg.solve(mtx, -rhs)
+
+        theta2 = nm.outer(theta, theta)
+        gmtx = nm.tensordot(theta2, self.gmtxs, axes=2)
+        gvec = nm.tensordot(theta2, self.gvecs, axes=2)
+        gval = (theta2 * self.gvals).sum()
+
+        res2 = coefs @ gmtx @ coefs + 2 * coefs @ gvec + gval
+        err = nm.sqrt(max(res2.real, 0.0) / gval.real) if gval > 0 else 0.0
+
+        return self.basis @ coefs, err
+
+    def solve(self, mu, status=None):
+        """
+        Solve the problem for parameters `mu` using the reduced model, with
+        the fallback to the full model if the residual norm estimate exceeds
+        `eps_r`.
+
+        Parameters
+        ----------
+        mu : any
+            The parameters passed to `set_parameters()` and `get_coefs()`.
+        status : dict-like, optional
+            If given, the 'time', 'err' (the residual norm estimate) and 'rom'
+            (True, if the reduced solution was accepted) items are set.
+
+        Returns
+        -------
+        variables : Variables
+            The variables with the solution.
+        """
+        timer = Timer(start=True)
+
+        vec, err = self.solve_reduced(mu)
+        is_rom = err <= self.eps_r
+        if is_rom:
+            variables = self.problem.set_default_state()
+            variables.set_state(vec, reduced=True)
+            self.n_rom += 1
+
+        else:
+            output('ROM residual %.2e > %.2e: solving full problem'
+                   % (err, self.eps_r))
+            if self.enrich:
+                variables = self.add_snapshot(mu)
+                self.project()
+
+            else:
+                variables = self.solve_full(mu)
+
+        if status is not None:
+            status['time'] = timer.stop()
+            status['err'] = err
+            status['rom'] = is_rom
+
+        return variables
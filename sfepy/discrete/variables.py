@@ -390,7 +390,7 @@ class Variables(Container):
             raise ValueError('no LCBC defined!')
 
     def equation_mapping(self, ebcs, epbcs, ts, functions, problem=None,
-                         active_only=True):
+                         active_only=True, dof_reordering=None):
         """
         Create the mapping of active DOFs from/to all DOFs for all state
         variables.
@@ -410,6 +410,10 @@ class Variables(Container):
         active_only : bool
             If True, the active DOF info ``self.adi`` uses the reduced (active
             DOFs only) numbering. Otherwise it is the same as ``self.di``.
+        dof_reordering : 'rcm' or 'morton', optional
+            If given, the active DOFs of each variable are renumbered to
+            improve the locality and reduce the matrix bandwidth. Applies only
+            when `active_only` is True.
 
         Returns
         -------
@@ -430,6 +434,9 @@ class Variables(Container):
         if epbcs is not None:
             self.bc_of_vars = self.epbcs.group_by_variables(self.bc_of_vars)
 
+        if not active_only:
+            dof_reordering = None
+
         ##
         # List EBC nodes/dofs for each variable.
         active_bcs = set()
@@ -439,14 +446,16 @@ class Variables(Container):
 
             var_di = self.di.get_info(var_name)
             active = var.equation_mapping(bcs, var_di, ts, functions,
-                                          problem=problem)
+                                          problem=problem,
+                                          dof_reordering=dof_reordering)
             active_bcs.update(active)
 
             if self.has_virtual_dcs:
                 vvar = self[var.dual_var_name]
                 vvar_di = self.vdi.get_info(var_name)
                 active = vvar.equation_mapping(bcs, vvar_di, ts, functions,
-                                               problem=problem)
+                                               problem=problem,
+                                               dof_reordering=dof_reordering)
                 active_bcs.update(active)
 
         self.adi = self._create_dof_info(self.ordered_state, 'active_state',
@@ -1543,11 +1552,14 @@ class FieldVariable(Variable):
         self.set_data(vv.ravel(), step=step)
 
     def equation_mapping(self, bcs, var_di, ts, functions, problem=None,
-                         warn=False):
+                         warn=False, dof_reordering=None):
         """
         Create the mapping of active DOFs from/to all DOFs.
 
-        Sets n_adof.
+        Sets n_adof. If `dof_reordering` is given, the active DOFs are
+        renumbered using the field node ordering, see
+        :func:`Field.get_node_ordering()
+        <sfepy.discrete.common.fields.Field.get_node_ordering()>`.
 
         Returns
         -------
@@ -1578,6 +1590,10 @@ class FieldVariable(Variable):
 
         active_bcs = self.eq_map.map_equations(bcs, self.field, ts, functions,
                                                problem=problem, warn=warn)
+        if dof_reordering is not None:
+            perm = self.field.get_node_ordering(dof_reordering)
+            self.eq_map.reorder_equations(perm)
+
         self.n_adof = self.eq_map.n_eq
 
         return active_bcs
@@ -1656,6 +1672,60 @@ class FieldVariable(Variable):
         """
         self.evaluate_cache = {}
 
+    def get_history_caches(self):
+        """
+        Get copies of the special evaluate cache data with a custom
+        `__advance__()` function, e.g. the fading memory history data of
+        :class:`ETHTerm <sfepy.terms.terms_th.ETHTerm>` subclasses.
+
+        Returns
+        -------
+        caches : list
+            The list of `(mode, key, advance, arrays)` tuples, where
+            `advance` is the `'module:qualified_name'` string of the advance
+            function and `arrays` is a dict of the data arrays.
+        """
+        caches = []
+        for mode, step_cache in self.evaluate_cache.items():
+            for key, val in step_cache.get(None, {}).items():
+                fun = getattr(val, '__advance__', None)
+                if fun is None: continue
+
+                fun = getattr(fun, '__func__', fun)
+                advance = '%s:%s' % (fun.__module__, fun.__qualname__)
+
+                arrays = {}
+                for name, data in val.__dict__.items():
+                    if isinstance(data, nm.ndarray):
+                        arrays[name] = data.copy()
+
+                    elif isinstance(data, (int, float, complex)):
+                        arrays[name] = nm.asarray(data)
+
+                caches.append((mode, key, advance, arrays))
+
+        return caches
+
+    def set_history_caches(self, caches):
+        """
+        Set the special evaluate cache data obtained by
+        :func:`FieldVariable.get_history_caches()`.
+
+        The advance functions have to be module-level functions or static
+        methods.
+        """
+        from importlib import import_module
+
+        for mode, key, advance, arrays in caches:
+            module_name, qualname = advance.split(':')
+            fun = import_module(module_name)
+            for name in qualname.split('.'):
+                fun = getattr(fun, name)
+
+            step_cache = self.evaluate_cache.setdefault(mode, {})
+            step_cache.setdefault(None, {})[key] = Struct(__advance__=fun,
+                                                          **arrays)
+
     def invalidate_evaluate_cache(self, step=0):
         """
         Invalidate variable data in evaluate cache for time step given
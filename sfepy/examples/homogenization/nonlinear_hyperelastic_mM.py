@@ -73,9 +73,11 @@ def get_homog_mat(family_data, mode):
         pb.mtx_f_prev = mtx_f.copy()
 
         macro_data = {'mtx_e': rel_mtx_f - nm.eye(dim)}
+        cluster_tol = pb.conf.options.get('micro_cluster_tol', None)
         ccache[ckey] = get_homog_coefs_nonlinear(ts, mtx_f, 'qp', macro_data,
                                                  problem=pb,
-                                                 iteration=pb.iiter)
+                                                 iteration=pb.iiter,
+                                                 cluster_tol=cluster_tol)
 
     coefs = ccache[ckey]
 
@@ -53,6 +53,12 @@ Use the Brillouin stepper::
 
   python script/plot_logs.py output/frequencies.txt -g 1 --no-legends --rc="'font.size':14, 'lines.linewidth' : 3, 'lines.markersize' : 4" -o brillouin-stepper-omegas.png
 
+The eigenvalue problems for all wave numbers of the linear stepper can be
+solved at once by worker processes using the ``--n-workers`` option, the
+results are saved also to ``<output_directory>/eigs.h5``::
+
+  python sfepy/examples/linear_elasticity/dispersion_analysis.py meshes/2d/special/circle_in_square.mesh --log-std-waves --eigs-only --n-workers=4
+
 Additional arguments can be passed to the problem configuration's
 :func:`define()` function using the ``--define-kwargs`` option. In this file,
 only the mesh vertex separation parameter `mesh_eps` can be used::
@@ -83,6 +89,7 @@ from sfepy.homogenization.utils import define_box_regions
 from sfepy.discrete import Problem
 from sfepy.mechanics.tensors import get_von_mises_stress
 from sfepy.solvers import Solver
+from sfepy.solvers.eigen import eig_batch
 from sfepy.solvers.ts import get_print_info, TimeStepper
 from sfepy.linalg.utils import output_array_stats, max_diff_csr
 
@@ -422,6 +429,24 @@ def build_evp_matrices(mtxs, val, mode, pb):
 
     return evp_mtxs
 
+def build_evp_batch(mtxs, vals, mode, pb):
+    """
+    Build the parameter-independent matrices and the coefficients of their
+    combinations for the dispersion eigenvalue problems with all values `vals`,
+    see :func:`sfepy.solvers.eigen.eig_batch()`.
+    """
+    vals = nm.asarray(vals)
+    ones = nm.ones_like(vals)
+    if mode == 'omega':
+        evp_mtxs = [(mtxs['K'], mtxs['S'], mtxs['R']), mtxs['M']]
+        coefs = [nm.c_[ones, vals**2, vals], None]
+
+    else:
+        evp_mtxs = [mtxs['S'], mtxs['R'], (mtxs['K'], mtxs['M'])]
+        coefs = [None, None, nm.c_[ones, -vals**2]]
+
+    return evp_mtxs, coefs
+
 def process_evp_results(eigs, svecs, val, wdir, bzone, pb, mtxs, options,
                         std_wave_fun=None):
     """
@@ -513,6 +538,9 @@ helps = {
     'post_process' : 'post-process eigenvectors',
     'solver_conf' : 'eigenvalue problem solver configuration options'
     ' [default: %(default)s]',
+    'n_workers' : 'if given, solve the eigenvalue problems for all range'
+    ' values at once using the given number of worker processes, and save'
+    ' the results into <output_directory>/eigs.h5. Only for the linear stepper',
     'save_regions' : 'save defined regions into'
     ' <output_directory>/regions.vtk',
     'save_materials' : 'save material parameters into'
@@ -590,6 +618,9 @@ def main():
     parser.add_argument('--solver-conf', metavar='dict-like',
                         action='store', dest='solver_conf',
                         default=default_solver_conf, help=helps['solver_conf'])
+    parser.add_argument('--n-workers', metavar='int', type=int,
+                        action='store', dest='n_workers',
+                        default=None, help=helps['n_workers'])
     parser.add_argument('--save-regions',
                         action='store_true', dest='save_regions',
                         default=False, help=helps['save_regions'])
@@ -634,6 +665,7 @@ def main():
     set_wave_dir = mod.set_wave_dir
     setup_n_eigs = mod.setup_n_eigs
     build_evp_matrices = mod.build_evp_matrices
+    build_evp_batch = mod.build_evp_batch
     save_materials = mod.save_materials
     get_std_wave_fun = mod.get_std_wave_fun
     get_stepper = mod.get_stepper
@@ -731,6 +763,17 @@ def main():
 
     stepper = get_stepper(rng, pb, options)
 
+    batch = None
+    if (options.n_workers is not None) and (options.stepper == 'linear'):
+        vals = [val for _, val in stepper]
+        evp_mtxs, coefs = build_evp_batch(mtxs, vals, options.mode, pb)
+        batch = eig_batch(evp_mtxs, coefs, n_eigs=n_eigs,
+                          eigenvectors=not options.eigs_only,
+                          solver_conf=conf, n_workers=options.n_workers,
+                          filename=os.path.join(output_dir, 'eigs.h5'))
+        if options.eigs_only:
+            batch = (batch, None)
+
     if options.mode == 'omega':
         eigenshapes_filename = os.path.join(output_dir,
                                             'frequency-eigenshapes-%s.vtk'
@@ -782,14 +825,18 @@ def main():
                 pb, _, bzone, mtxs = assemble_matrices(
                     define, mod, pars, set_wave_dir, options, wdir=wdir)
 
-            evp_mtxs = build_evp_matrices(mtxs, wmag, options.mode, pb)
+            if batch is not None:
+                eigs = batch[0][iv]
+                svecs = None if batch[1] is None else batch[1][iv]
 
-            if options.eigs_only:
+            elif options.eigs_only:
+                evp_mtxs = build_evp_matrices(mtxs, wmag, options.mode, pb)
                 eigs = eig_solver(*evp_mtxs, n_eigs=n_eigs,
                                   eigenvectors=False)
                 svecs = None
 
             else:
+                evp_mtxs = build_evp_matrices(mtxs, wmag, options.mode, pb)
                 eigs, svecs = eig_solver(*evp_mtxs, n_eigs=n_eigs,
                                          eigenvectors=True)
 
@@ -829,14 +876,18 @@ def main():
         for io, omega in stepper:
             output('step %d: frequency %s' % (io, omega))
 
-            evp_mtxs = build_evp_matrices(mtxs, omega, options.mode, pb)
+            if batch is not None:
+                eigs = batch[0][io]
+                svecs = None if batch[1] is None else batch[1][io]
 
-            if options.eigs_only:
+            elif options.eigs_only:
+                evp_mtxs = build_evp_matrices(mtxs, omega, options.mode, pb)
                 eigs = eig_solver(*evp_mtxs, n_eigs=n_eigs,
                                   eigenvectors=False)
                 svecs = None
 
             else:
+                evp_mtxs = build_evp_matrices(mtxs, omega, options.mode, pb)
                 eigs, svecs = eig_solver(*evp_mtxs, n_eigs=n_eigs,
                                          eigenvectors=True)
 
@@ -146,6 +146,10 @@ def detect_band_gaps(mass, freq_info, opts, gap_kind='normal', mtx_b=None):
     corresponding eigenmomenta are above a given threshold) are taken into
     account.
 
+    The mass tensor eigenvalues are traced for the logging frequencies of
+    all intervals at once, and the zeros of the eigenvalues are found
+    simultaneously in all intervals by :func:`find_zeros()`.
+
     Notes
     -----
     - make freq_eps relative to ]f0, f1[ size?
@@ -168,19 +172,51 @@ def detect_band_gaps(mass, freq_info, opts, gap_kind='normal', mtx_b=None):
     logs = [[] for ii in range(n_col + 1)]
     gaps = []
 
-    for ii in range(freq_info.freq_range.shape[0] + 1):
-
+    n_int = freq_info.freq_range.shape[0] + 1
+    all_log_freqs = []
+    for ii in range(n_int):
         f0, f1 = fm[[ii, ii+1]]
         output('interval: ]%.8f, %.8f[...' % (f0, f1))
 
         log_freqs = get_log_freqs(f0, f1, df, opts.freq_eps, 100, 1000)
-
         output('n_logged: %d' % log_freqs.shape[0])
 
-        log_mevp = [[] for ii in range(n_col)]
-        for f in log_freqs:
-            for ii, data in enumerate(trace_callback(f)):
-                log_mevp[ii].append(data)
+        all_log_freqs.append(log_freqs)
+
+    offsets = nm.cumsum([0] + [len(ii) for ii in all_log_freqs])
+    all_mevp = trace_callback(nm.concatenate(all_log_freqs))
+    log_mevps = [[data[offsets[ii]:offsets[ii+1]] for data in all_mevp]
+                 for ii in range(n_int)]
+
+    if gap_kind != 'liquid':
+        # Find zeros of the largest and smallest eigenvalues, where needed.
+        izs = [ii for ii, log_mevp in enumerate(log_mevps)
+               if not ((log_mevp[0][0, 0] > 0.0)
+                       or (log_mevp[0][-1, -1] < 0.0))]
+        lf0s = nm.array([all_log_freqs[ii][0] for ii in izs])
+        lf1s = nm.array([all_log_freqs[ii][-1] for ii in izs])
+
+        output('finding zeros of the largest eigs...')
+        zmax = find_zeros(lf0s, lf1s, fz_callback,
+                          opts.freq_eps, opts.zero_eps, 1)
+        output('...done')
+
+        imins = nm.where((zmax[0] == 0) | (zmax[0] == 2))[0]
+        output('finding zeros of the smallest eigs...')
+        # having fmax instead of f0 does not work if freq_eps is
+        # large.
+        zmin = find_zeros(lf0s[imins], lf1s[imins], fz_callback,
+                          opts.freq_eps, opts.zero_eps, 0)
+        output('...done')
+
+        mevp_max = trace_callback(zmax[1])
+        mevp_min = trace_callback(zmin[1])
+        izs = {ii : ik for ik, ii in enumerate(izs)}
+        imins = {ik : im for im, ik in enumerate(imins)}
+
+    for ii in range(n_int):
+        log_freqs = all_log_freqs[ii]
+        log_mevp = log_mevps[ii]
 
         # Get log for the first and last f in log_freqs.
         lf0 = log_freqs[0]
@@ -226,31 +262,23 @@ def detect_band_gaps(mass, freq_info, opts, gap_kind='normal', mtx_b=None):
                 gap = ([1, lf1, log1[0]], [1, lf1, log1[-1]])
 
             else:
-                llog_freqs = list(log_freqs)
-
-                # Insert fmin, fmax into log.
-                output('finding zero of the largest eig...')
-                smax, fmax, vmax = find_zero(lf0, lf1, fz_callback,
-                                             opts.freq_eps, opts.zero_eps, 1)
-                im = nm.searchsorted(log_freqs, fmax)
-                llog_freqs.insert(im, fmax)
-                for ii, data in enumerate(trace_callback(fmax)):
-                    log_mevp[ii].insert(im, data)
-
-                output('...done')
-                if smax in [0, 2]:
-                    output('finding zero of the smallest eig...')
-                    # having fmax instead of f0 does not work if freq_eps is
-                    # large.
-                    smin, fmin, vmin = find_zero(lf0, lf1, fz_callback,
-                                                 opts.freq_eps, opts.zero_eps, 0)
-                    im = nm.searchsorted(log_freqs, fmin)
+                ik = izs[ii]
+                smax, fmax, vmax = [zz[ik] for zz in zmax]
+
+                # Insert fmax, fmin into log.
+                ifm = nm.searchsorted(log_freqs, fmax)
+                log_freqs = nm.insert(log_freqs, ifm, fmax)
+                log_mevp = [nm.insert(data, ifm, vals[ik], axis=0)
+                            for data, vals in zip(log_mevp, mevp_max)]
+
+                if ik in imins:
+                    im = imins[ik]
+                    smin, fmin, vmin = [zz[im] for zz in zmin]
                     # +1 due to fmax already inserted before.
-                    llog_freqs.insert(im+1, fmin)
-                    for ii, data in enumerate(trace_callback(fmin)):
-                        log_mevp[ii].insert(im+1, data)
-
-                    output('...done')
+                    ifm = nm.searchsorted(all_log_freqs[ii], fmin) + 1
+                    log_freqs = nm.insert(log_freqs, ifm, fmin)
+                    log_mevp = [nm.insert(data, ifm, vals[im], axis=0)
+                                for data, vals in zip(log_mevp, mevp_min)]
 
                 elif smax == 1:
                     smin = 1 # both are negative everywhere.
@@ -258,8 +286,6 @@ def detect_band_gaps(mass, freq_info, opts, gap_kind='normal', mtx_b=None):
 
                 gap = ([smin, fmin, vmin], [smax, fmax, vmax])
 
-                log_freqs = nm.array(llog_freqs)
-
             output(gap[0])
             output(gap[1])
 
@@ -267,9 +293,7 @@ def detect_band_gaps(mass, freq_info, opts, gap_kind='normal', mtx_b=None):
 
         logs[0].append(log_freqs)
         for ii, data in enumerate(log_mevp):
-            logs[ii+1].append(nm.array(data, dtype = nm.float64))
-
-        output('...done')
+            logs[ii+1].append(nm.asarray(data, dtype=nm.float64))
 
     kinds = describe_gaps(gaps)
 
@@ -279,10 +303,59 @@ def detect_band_gaps(mass, freq_info, opts, gap_kind='normal', mtx_b=None):
 
     return slogs, gaps, kinds
 
+def stacked_eig(mtxs, mtx_b=None, eigenvectors=False,
+                solver_kind='eig.sgscipy'):
+    """
+    Solve the dense eigenvalue problems with the matrices `mtxs[i]` of
+    the same size, optionally generalized with the matrix `mtx_b`.
+
+    For the symmetric solver kind 'eig.sgscipy', all problems are solved
+    by a single stacked call of :func:`numpy.linalg.eigh()`, with the
+    generalized problems transformed using the Cholesky factor of
+    `mtx_b`. Otherwise, :func:`sfepy.solvers.eig()` is called for each
+    problem.
+
+    Returns
+    -------
+    eigs : array
+        The eigenvalues in ascending order, shape `(n_mtx, n)`.
+    vecs : array
+        The eigenvectors, shape `(n_mtx, n, n)`, if `eigenvectors` is True.
+    """
+    mtxs = nm.asarray(mtxs)
+
+    if solver_kind != 'eig.sgscipy':
+        outs = [eig(mtx, mtx_b=mtx_b, eigenvectors=eigenvectors,
+                    solver_kind=solver_kind) for mtx in mtxs]
+        if eigenvectors:
+            return (nm.array([out[0] for out in outs]),
+                    nm.array([out[1] for out in outs]))
+
+        else:
+            return nm.array(outs)
+
+    if mtx_b is not None:
+        mtx_il = nla.inv(nla.cholesky(mtx_b))
+        mtxs = mtx_il @ mtxs @ mtx_il.T.conj()
+
+    if eigenvectors:
+        eigs, vecs = nla.eigh(mtxs)
+        if mtx_b is not None:
+            vecs = mtx_il.T.conj() @ vecs
+
+        return eigs, vecs
+
+    else:
+        return nla.eigvalsh(mtxs)
+
 def get_callback(mass, solver_kind, mtx_b=None, mode='trace'):
     r"""
     Return callback to solve band gaps or dispersion eigenproblem P.
 
+    The callbacks accept either a single frequency or an array of
+    frequencies. In the latter case, the returned arrays have the
+    frequency axis first.
+
     Notes
     -----
     Find zero callbacks return:
@@ -298,22 +371,31 @@ def get_callback(mass, solver_kind, mtx_b=None, mode='trace'):
     otherwise it is
       omega^2 M w = \eta B w"""
 
+    def _eig(f, mtx, eigenvectors):
+        if nm.ndim(f):
+            return stacked_eig(mtx, mtx_b=mtx_b, eigenvectors=eigenvectors,
+                               solver_kind=solver_kind)
+
+        else:
+            return eig(mtx, mtx_b=mtx_b, eigenvectors=eigenvectors,
+                       solver_kind=solver_kind)
+
     def find_zero_callback(f):
-        meigs = eig(mass(f), eigenvectors=False, solver_kind=solver_kind)
+        meigs = _eig(f, mass(f), False)
         return meigs
 
     def find_zero_full_callback(f):
-        meigs = eig((f**2) * mass(f), mtx_b=mtx_b,
-                    eigenvectors=False, solver_kind=solver_kind)
+        f2 = nm.reshape(nm.asarray(f)**2, nm.shape(f) + (1, 1))
+        meigs = _eig(f, f2 * mass(f), False)
         return meigs
 
     def trace_callback(f):
-        meigs = eig(mass(f), eigenvectors=False, solver_kind=solver_kind)
+        meigs = _eig(f, mass(f), False)
         return meigs,
 
     def trace_full_callback(f):
-        meigs, mvecs = eig((f**2) * mass(f), mtx_b=mtx_b,
-                           eigenvectors=True, solver_kind=solver_kind)
+        f2 = nm.reshape(nm.asarray(f)**2, nm.shape(f) + (1, 1))
+        meigs, mvecs = _eig(f, f2 * mass(f), True)
 
         return meigs, mvecs
 
@@ -385,6 +467,60 @@ def find_zero(f0, f1, callback, freq_eps, zero_eps, mode):
         else:
             fm = f
 
+def find_zeros(f0s, f1s, callback, freq_eps, zero_eps, mode):
+    r"""
+    Vectorized version of :func:`find_zero()` for several frequency
+    intervals ]f0s[i], f1s[i][. The bisection steps of all intervals are
+    evaluated by a single call of `callback` with an array of
+    frequencies.
+
+    Returns
+    -------
+    flags : array of 0, 1, or 2
+        The flags, see :func:`find_zero()`.
+    frequencies : array
+        The found frequencies.
+    eigenvalues : array
+        The eigenvalues corresponding to the found frequencies.
+    """
+    f0s = nm.asarray(f0s, dtype=nm.float64)
+    f1s = nm.asarray(f1s, dtype=nm.float64)
+    fms, fps = f0s.copy(), f1s.copy()
+    ieig = {0 : 0, 1 : -1}[mode]
+
+    flags = nm.zeros(len(f0s), dtype=nm.int32)
+    freqs = nm.zeros(len(f0s), dtype=nm.float64)
+    vals = nm.zeros(len(f0s), dtype=nm.float64)
+    active = nm.arange(len(f0s))
+    while len(active):
+        fm, fp = fms[active], fps[active]
+        f0, f1 = f0s[active], f1s[active]
+        f = 0.5 * (fm + fp)
+        val = callback(f)[:, ieig]
+
+        is_zero = ((nm.abs(val) < zero_eps)
+                   | ((fp - fm) < (nm.abs(fm) * nm.finfo(float).eps)))
+        at_f0 = ~is_zero & ((f - f0) < freq_eps)
+        at_f1 = ~is_zero & ((f1 - f) < freq_eps)
+        if mode == 0:
+            at_f1 &= ~at_f0
+
+        elif mode == 1:
+            at_f0 &= ~at_f1
+
+        vals[active] = val
+        freqs[active] = f
+        for flag, ii, ff in [(2, at_f0, f0), (1, at_f1, f1)]:
+            flags[active[ii]] = flag
+            freqs[active[ii]] = ff[ii]
+
+        ii = ~(is_zero | at_f0 | at_f1)
+        fps[active[ii & (val > 0.0)]] = f[ii & (val > 0.0)]
+        fms[active[ii & (val <= 0.0)]] = f[ii & (val <= 0.0)]
+        active = active[ii]
+
+    return flags, freqs, vals
+
 def describe_gaps(gaps):
     kinds = []
     for ii, gap in enumerate(gaps):
@@ -813,6 +949,16 @@ class Eigenmomenta(MiniAppBase):
                      to_file_txt=None)
         return out
 
+def check_resonances(freqs, de):
+    """
+    Raise ValueError, if any of the frequencies `freqs` is too close to a
+    resonance, i.e. the inverse denominators `de` are not finite.
+    """
+    ii = nm.where(~nm.isfinite(de).all(axis=1))[0]
+    if len(ii):
+        raise ValueError('frequency %e too close to resonance!'
+                         % freqs[ii[0]])
+
 class AcousticMassTensor(MiniAppBase):
     """
     The acoustic mass tensor for a given frequency.
@@ -838,29 +984,28 @@ class AcousticMassTensor(MiniAppBase):
         return self
 
     def evaluate(self, freq):
+        """
+        Evaluate the tensor for a frequency, or for an array of
+        frequencies. In the latter case, the tensors are stacked along the
+        first axis.
+        """
         ema = self.eigenmomenta
 
         n_c = ema.shape[1]
-        fmass = nm.zeros((n_c, n_c), dtype=nm.float64)
-
-        num, denom = self.get_coefs(freq)
+        freqs = nm.atleast_1d(freq)
+        num, denom = self.get_coefs(freqs[:, None])
         de = 1.0 / denom
-        if not nm.isfinite(de).all():
-            raise ValueError('frequency %e too close to resonance!' % freq)
+        check_resonances(freqs, de)
 
-        for ir in range(n_c):
-            for ic in range(n_c):
-                if ir <= ic:
-                    val = nm.sum(num * de * (ema[:, ir] * ema[:, ic]))
-                    fmass[ir, ic] += val
-                else:
-                    fmass[ir, ic] = fmass[ic, ir]
+        fmass = nm.einsum('fe,ei,ej->fij', num * de, ema, ema)
+        il = nm.tril_indices(n_c, -1)
+        fmass[:, il[0], il[1]] = fmass[:, il[1], il[0]]
 
         eye = nm.eye(n_c, n_c, dtype=nm.float64)
         mtx_mass = (eye * self.dv_info.average_density) \
                    - (fmass / self.dv_info.total_volume)
 
-        return mtx_mass
+        return mtx_mass if nm.ndim(freq) else mtx_mass[0]
 
     def get_coefs(self, freq):
         """
@@ -911,26 +1056,26 @@ class AppliedLoadTensor(AcousticMassTensor):
         return self
 
     def evaluate(self, freq):
+        """
+        Evaluate the tensor for a frequency, or for an array of
+        frequencies. In the latter case, the tensors are stacked along the
+        first axis.
+        """
         ema, uema = self.eigenmomenta, self.ueigenmomenta
 
         n_c = ema.shape[1]
-        fload = nm.zeros((n_c, n_c), dtype=nm.float64)
-
-        num, denom = self.get_coefs(freq)
+        freqs = nm.atleast_1d(freq)
+        num, denom = self.get_coefs(freqs[:, None])
         de = 1.0 / denom
-        if not nm.isfinite(de).all():
-            raise ValueError('frequency %e too close to resonance!' % freq)
+        check_resonances(freqs, de)
 
-        for ir in range(n_c):
-            for ic in range(n_c):
-                val = nm.sum(num * de * (ema[:, ir] * uema[:, ic]))
-                fload[ir, ic] += val
+        fload = nm.einsum('fe,ei,ej->fij', num * de, ema, uema)
 
         eye = nm.eye(n_c, n_c, dtype=nm.float64)
 
         mtx_load = eye - (fload / self.dv_info.total_volume)
 
-        return mtx_load
+        return mtx_load if nm.ndim(freq) else mtx_load[0]
 
 class BandGaps(MiniAppBase):
     """
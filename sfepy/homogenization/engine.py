@@ -1,7 +1,9 @@
 from copy import copy
 from functools import partial
+from concurrent.futures import wait, FIRST_COMPLETED
 import os.path as osp
 from sfepy.base.base import output, get_default, Struct
+from sfepy.base.timing import Timer
 from sfepy.applications import PDESolverApp, Application
 from .coefs_base import MiniAppBase, CoefEval
 from sfepy.discrete.evaluate import eval_equations
@@ -348,27 +350,38 @@ class HomogenizationWorkerMulti(HomogenizationWorker):
     def calculate_req(*args):
         import sfepy.discrete.fem.periodic as per
 
+        timer = Timer(start=True)
         proc_id = ''.join(k for k in multiproc.get_proc_id() if k.isdigit())
         output.set_output_prefix(f'he-w{proc_id}:')
         new_args = args + (proc_id, )
 
         problem, dependencies = args[0], args[5]
+        # Free the unused attached blocks of the previous tasks.
+        multiproc.close_shared_blocks()
+        shared_deps = multiproc.SharedDictView(dependencies)
+        new_args = new_args[:5] + (shared_deps,) + new_args[6:]
 
         for dk in dependencies.keys():
             if isinstance(dk, tuple):
                 if dk[0] == 'periodic_cache':
                     if dk[1] not in per.periodic_cache:
-                        per.periodic_cache[dk[1]] = dependencies[dk]
+                        per.periodic_cache[dk[1]] = shared_deps[dk]
                 elif dk[0] == 'mappings0':
                     if dk[2] not in problem.fields[dk[1]].mappings0:
                         problem.fields[dk[1]].mappings0[dk[2]] = dk[3]
 
-        out = HomogenizationWorker.calculate_req(*new_args)
+        val, save_names = HomogenizationWorker.calculate_req(*new_args)
 
         for k, v in per.periodic_cache.items():
             dkey = ('periodic_cache', k)
             if dkey not in dependencies:
-                dependencies[dkey] = v
+                sv = multiproc.share_arrays(v)
+                stored = dependencies.setdefault(dkey, sv)
+                get_names = lambda x: [ii.name for ii
+                                       in multiproc.iter_shared_arrays(x)]
+                if get_names(stored) != get_names(sv):
+                    # Stored by another worker in the meantime.
+                    multiproc.release_shared_arrays([sv])
 
         for fk, fv in problem.fields.items():
             for mk, mv in fv.mappings0.items():
@@ -376,13 +389,17 @@ class HomogenizationWorkerMulti(HomogenizationWorker):
                 if dkey not in dependencies:
                     dependencies[dkey] = mv
 
-        return out
+        stats = (proc_id, timer.stop())
+
+        return multiproc.share_arrays(val), save_names, stats
 
     @staticmethod
     def recover_req(*args):
         proc_id = ''.join(k for k in multiproc.get_proc_id() if k.isdigit())
         output.set_output_prefix(f'he-w{proc_id}:')
         new_args = args + (proc_id, )
+        new_args = (new_args[:5] + (multiproc.SharedDictView(args[5]),)
+                    + new_args[6:])
 
         return HomogenizationWorker.calculate_req(*new_args)
 
@@ -391,7 +408,8 @@ class HomogenizationWorkerMulti(HomogenizationWorker):
         proc_id = ''.join(k for k in multiproc.get_proc_id() if k.isdigit())
         output.set_output_prefix(f'he-w{proc_id}:')
 
-        corrs = deps_to_corrs(problem, dependencies)
+        multiproc.close_shared_blocks()
+        corrs = deps_to_corrs(problem, multiproc.SharedDictView(dependencies))
         local_macro, label = macro_data
         output(label, verbose=True)
 
@@ -400,7 +418,8 @@ class HomogenizationWorkerMulti(HomogenizationWorker):
     @staticmethod
     def recover_micro(problem, corrs, rhook, macro_data):
         dependencies = multiproc.get_dict('dependencies')
-        dependencies.update({k: v for k, v in corrs.items()
+        dependencies.update({k: multiproc.share_arrays(v)
+                             for k, v in corrs.items()
                              if k not in dependencies})
 
         workers = multiproc.get_workers()
@@ -458,14 +477,59 @@ class HomogenizationWorkerMulti(HomogenizationWorker):
         sorted_names = self.get_sorted_dependencies(req_info_ch, coef_info_ch,
                                                     options.compute_only)
 
+        save_names = self.schedule_tasks(workers, wfun, sorted_names,
+                                         req_info_ch, coef_info_ch,
+                                         dependencies)
+
+        # The shared memory blocks are kept for the recovery of the micro
+        # problems and freed in the next call.
+        dependencies = {k: multiproc.unshare_arrays(v, copy_data=True)
+                        for k, v in dependencies.items()}
+        if micro_chunk_tab is not None:
+            dependencies = self.dechunk_reqs_coefs(dependencies,
+                                                   len(micro_chunk_tab))
+
+        return dependencies, save_names
+
+    def schedule_tasks(self, workers, wfun, sorted_names, req_info,
+                       coef_info, dependencies):
+        """
+        Compute the correctors and coefficients using the worker pool.
+
+        Each task is submitted as soon as all its dependencies are
+        computed, so that the idle workers need not wait for the slowest
+        task of a group of independent tasks.
+
+        Parameters
+        ----------
+        workers : Executor instance
+            The worker pool.
+        wfun : callable
+            The function computing a task given by its name. It returns
+            the task value, the dictionary of save names and the tuple of
+            the worker id and the task time.
+        sorted_names : list
+            The task names sorted according to the dependencies.
+        req_info : dict
+            The definition of correctors.
+        coef_info : dict
+            The definition of homogenized coefficients.
+        dependencies : dict
+            The computed task values are stored here.
+
+        Returns
+        -------
+        save_names : dict
+            The dictionary containing names of saved correctors.
+        """
         # calculate number of dependencies and inverse map
         numdeps = {}
         inverse_deps = {}
         for name in sorted_names:
             if name.startswith('c.'):
-                reqs = coef_info_ch[name[2:]].get('requires', [])
+                reqs = coef_info[name[2:]].get('requires', [])
             else:
-                reqs = req_info_ch[name].get('requires', [])
+                reqs = req_info[name].get('requires', [])
             numdeps[name] = len(reqs)
             if len(reqs) > 0:
                 for req in reqs:
@@ -475,30 +539,56 @@ class HomogenizationWorkerMulti(HomogenizationWorker):
                         inverse_deps[req] = [name]
 
         save_names = {}
-        remaining = len(sorted_names)
-
-        while remaining > 0:
-            if len(numdeps) > 0:
-                tasks = [k for k, v in numdeps.items() if v == 0]
-                numdeps = {k: v for k, v in numdeps.items() if v > 0}
-
-            for task, (dep, snames) in zip(tasks, workers.map(wfun, tasks)):
+        busy = {}
+        timer = Timer(start=True)
+        ready = [k for k in sorted_names if numdeps[k] == 0]
+        running = {}
+        while len(ready) or len(running):
+            for task in ready:
+                running[workers.submit(wfun, task)] = task
+            ready = []
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                dep, snames, (proc_id, dt) = future.result()
                 dependencies[task] = dep
                 save_names.update(snames)
+                busy[proc_id] = busy.get(proc_id, 0.0) + dt
 
-                if task in inverse_deps:
-                    for itask in inverse_deps[task]:
-                        numdeps[itask] -= 1  # itask depends on task
+                for itask in inverse_deps.get(task, []):
+                    numdeps[itask] -= 1  # itask depends on task
+                    if numdeps[itask] == 0:
+                        ready.append(itask)
 
-                remaining -= 1
+        self.report_utilization(busy, timer.stop(),
+                                getattr(workers, '_max_workers', len(busy)))
 
-        if micro_chunk_tab is not None:
-            dependencies = self.dechunk_reqs_coefs(dependencies,
-                                                   len(micro_chunk_tab))
-        else:
-            dependencies = dependencies.copy()
+        return save_names
 
-        return dependencies, save_names
+    def report_utilization(self, busy, wall_time, n_worker):
+        """
+        Report the busy times and utilizations of the worker processes and
+        store them in the `utilization` attribute.
+
+        Parameters
+        ----------
+        busy : dict
+            The total task times of the workers with the process ids as keys.
+        wall_time : float
+            The total wall time of the task scheduling.
+        n_worker : int
+            The number of workers in the pool.
+        """
+        wall_time = max(wall_time, 1e-16)
+        self.utilization = {key : val / wall_time
+                            for key, val in sorted(busy.items())}
+        output('worker utilization (wall time: %.2f [s]):' % wall_time)
+        for key, val in self.utilization.items():
+            output('  worker %s: busy %.2f [s], %.1f %%'
+                   % (key, busy[key], 100.0 * val))
+        output('  average: %.1f %%'
+               % (100.0 * sum(busy.values()) / (n_worker * wall_time)))
 
     @staticmethod
     def chunk_micro_tasks(num_micro, reqs, coefs,
@@ -169,7 +169,88 @@ class HomogenizationApp(PDESolverApp):
                             self.micro_states[key] = state0
                             state = state0
 
-    def call(self, verbose=False, ret_all=None, itime=None, iiter=None):
+    def store_micro_states(self, itime=None):
+        """
+        Store the micro states given by the `store_micro_idxs` option to
+        the micro state cache.
+        """
+        ms_cache = self.micro_state_cache
+        for ii in self.app_options.store_micro_idxs:
+            for k in self.micro_states.keys():
+                key = self.get_micro_cache_key(k, ii, itime)
+                ms_cache[key] = self.micro_states[k][ii]
+
+    @staticmethod
+    def _take_micro(val, idxs):
+        if isinstance(val, nm.ndarray):
+            return val[idxs]
+
+        elif isinstance(val, list):
+            return [val[ii] for ii in idxs]
+
+        else:
+            return val
+
+    def select_micro(self, micro_idxs):
+        """
+        Restrict the micro states, the macroscopic data and the updating
+        correctors to the micro problems given by `micro_idxs`.
+
+        Returns
+        -------
+        full : tuple
+            The original (micro_states, macro_data, updating_corrs),
+            to be passed to :func:`HomogenizationApp.scatter_micro()`.
+        """
+        take = self._take_micro
+        full = (self.micro_states, self.macro_data, self.updating_corrs)
+        n_micro = len(self.micro_states['coors'])
+
+        self.micro_states = {k : take(v, micro_idxs)
+                             for k, v in self.micro_states.items()}
+        if self.macro_data is not None:
+            self.setup_macro_data(
+                {k : take(v, micro_idxs)
+                 if nm.ndim(v) and (len(v) == n_micro) else v
+                 for k, v in self.macro_data.items()}
+            )
+        if self.updating_corrs is not None:
+            self.updating_corrs = {k : take(v, micro_idxs)
+                                   for k, v in self.updating_corrs.items()}
+
+        return full
+
+    def scatter_micro(self, full, micro_map):
+        """
+        Scatter the micro states and updating correctors computed for a
+        subset of micro problems selected by
+        :func:`HomogenizationApp.select_micro()` to all micro problems.
+        The micro problem `ii` obtains the data of the subset item
+        `micro_map[ii]`. The micro problem ids are not changed.
+        """
+        take = self._take_micro
+        micro_states, macro_data, updating_corrs = full
+
+        for k, v in self.micro_states.items():
+            if (k == 'id') or (v is None):
+                continue
+
+            if isinstance(micro_states[k], nm.ndarray):
+                micro_states[k][...] = take(v, micro_map)
+
+            else:
+                micro_states[k] = take(v, micro_map)
+
+        if self.updating_corrs is not None:
+            updating_corrs = {k : take(v, micro_map)
+                              for k, v in self.updating_corrs.items()}
+
+        self.micro_states = micro_states
+        self.updating_corrs = updating_corrs
+        self.setup_macro_data(macro_data)
+
+    def call(self, verbose=False, ret_all=None, itime=None, iiter=None,
+             micro_idxs=None, micro_map=None):
         """
         Call the homogenization engine and compute the homogenized
         coefficients.
@@ -181,8 +262,20 @@ class HomogenizationApp(PDESolverApp):
         ret_all : bool or None
             If not None, it can be used to override the 'return_all' option.
             If True, also the dependencies are returned.
-        time_tag: str
-            The time tag used in file names.
+        itime : int, optional
+            The time step used in file names and micro state cache keys.
+        iiter : int, optional
+            The iteration number used in file names.
+        micro_idxs : array, optional
+            If given, only the listed micro problems are solved and the
+            coefficients and dependencies correspond to them.
+        micro_map : array, optional
+            Required together with `micro_idxs`: after the solution, the
+            evolving micro states of all micro problems are replaced by
+            the states of the subset items `micro_map`, see
+            :func:`HomogenizationApp.scatter_micro()`. The correctors of
+            the micro problems given by the engine `store_micro_idxs`
+            option are not saved in this case.
 
         Returns
         -------
@@ -209,26 +302,51 @@ class HomogenizationApp(PDESolverApp):
             self.he = HomogenizationEngine(self.problem, self.options,
                                            volumes=volumes)
 
-        if self.micro_states is not None:
-            self.update_micro_states()
-            self.he.set_micro_states(self.micro_states)
+        if micro_idxs is not None:
+            if micro_map is None:
+                raise ValueError('micro_map is required with micro_idxs!')
+            full = self.select_micro(micro_idxs)
+            # The stored correctors would be numbered by the subset items.
+            store_micro_idxs = self.he.app_options.store_micro_idxs
+            self.he.app_options.store_micro_idxs = []
+
+        try:
+            if self.micro_states is not None:
+                self.update_micro_states()
+                self.he.set_micro_states(self.micro_states)
+
+            time_tag = ('' if itime is None else '_t%03d' % itime)\
+                + ('' if iiter is None else '_i%03d' % iiter)
+
+            aux = self.he(ret_all=ret_all, time_tag=time_tag)
+            if ret_all:
+                coefs, dependencies = aux
+                # store correctors for coors update
+                self.updating_corrs = {}
+                for upd_obj in opts.micro_update.values():
+                    if (upd_obj is not None
+                        and not hasattr(upd_obj, '__call__')):
+                        for v in upd_obj:
+                            cr = v[0]
+                            if cr is not None:
+                                self.updating_corrs[cr] = dependencies[cr]
+            else:
+                coefs = aux
 
-        time_tag = ('' if itime is None else '_t%03d' % itime)\
-            + ('' if iiter is None else '_i%03d' % iiter)
+            if micro_idxs is not None:
+                self.scatter_micro(full, micro_map)
+                full = None
 
-        aux = self.he(ret_all=ret_all, time_tag=time_tag)
-        if ret_all:
-            coefs, dependencies = aux
-            # store correctors for coors update
-            self.updating_corrs = {}
-            for upd_obj in opts.micro_update.values():
-                if upd_obj is not None and not hasattr(upd_obj, '__call__'):
-                    for v in upd_obj:
-                        cr = v[0]
-                        if cr is not None:
-                            self.updating_corrs[cr] = dependencies[cr]
-        else:
-            coefs = aux
+        finally:
+            if micro_idxs is not None:
+                self.he.app_options.store_micro_idxs = store_micro_idxs
+                if full is not None:
+                    # The computation failed - restore the original data.
+                    self.micro_states, macro_data, self.updating_corrs = full
+                    self.setup_macro_data(macro_data)
+
+        if (self.micro_states is not None) and (coefs is not None):
+            self.store_micro_states(itime)
 
         if coefs is not None:
             coefs = Coefficients(**coefs.to_dict())
@@ -240,12 +358,6 @@ class HomogenizationApp(PDESolverApp):
                 print(coefs)
                 nm.set_printoptions(precision=prec)
 
-            ms_cache = self.micro_state_cache
-            for ii in self.app_options.store_micro_idxs:
-                for k in self.micro_states.keys():
-                    key = self.get_micro_cache_key(k, ii, itime)
-                    ms_cache[key] = self.micro_states[k][ii]
-
             coef_save_name = op.join(opts.output_dir, opts.coefs_filename)
             coefs.to_file_hdf5(coef_save_name + '%s.h5' % time_tag)
             coefs.to_file_txt(coef_save_name + '%s.txt' % time_tag,
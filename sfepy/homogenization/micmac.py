@@ -1,7 +1,13 @@
+import os
 import os.path as op
+import pickle
+import hashlib
+import functools
+import types
 import numpy as nm
 import tables as pt
-from sfepy.base.base import output, Struct
+from sfepy.base.base import output, get_default, Struct
+from sfepy.base.ioutils import ensure_path, write_to_hdf5, read_from_hdf5
 from sfepy.base.conf import ProblemConf, get_standard_keywords
 from sfepy.homogenization.homogen_app import HomogenizationApp
 from sfepy.homogenization.engine import HomogenizationEngine
@@ -27,6 +33,252 @@ def get_micro_conf(micro_filename, define_args, output_dir):
     return conf
 
 
+def _update_hash(hsh, obj, memo=None):
+    """
+    Update the hash object `hsh` by the contents of `obj`.
+
+    Functions are hashed by their code including constants, default
+    argument values, closure cell contents and the values of referenced
+    global variables, except functions from other modules, that are
+    identified by names only, as are classes and built-in functions. Other
+    callables, for which this cannot be done reliably, raise ValueError.
+    """
+    if memo is None:
+        memo = set()
+
+    if isinstance(obj, dict):
+        hsh.update(b'dict')
+        for key in sorted(obj.keys(), key=repr):
+            _update_hash(hsh, key, memo)
+            _update_hash(hsh, obj[key], memo)
+
+    elif isinstance(obj, (list, tuple)):
+        hsh.update(type(obj).__name__.encode())
+        for val in obj:
+            _update_hash(hsh, val, memo)
+
+    elif isinstance(obj, nm.ndarray):
+        hsh.update(('array%s%s' % (obj.dtype.str, obj.shape)).encode())
+        if obj.dtype.hasobject:
+            _update_hash(hsh, obj.tolist(), memo)
+
+        else:
+            hsh.update(nm.ascontiguousarray(obj).tobytes())
+
+    elif isinstance(obj, Struct):
+        hsh.update(type(obj).__name__.encode())
+        _update_hash(hsh, obj.__dict__, memo)
+
+    elif isinstance(obj, types.ModuleType):
+        hsh.update(('module:%s' % obj.__name__).encode())
+
+    elif isinstance(obj, types.CodeType):
+        hsh.update(obj.co_code)
+        _update_hash(hsh, obj.co_names, memo)
+        _update_hash(hsh, obj.co_consts, memo)
+
+    elif callable(obj):
+        hsh.update(('%s:%s' % (getattr(obj, '__module__', None),
+                               getattr(obj, '__qualname__', type(obj))))
+                   .encode())
+        if id(obj) in memo:
+            return
+        memo.add(id(obj))
+
+        if isinstance(obj, functools.partial):
+            _update_hash(hsh, (obj.func, obj.args, obj.keywords), memo)
+
+        elif isinstance(obj, types.MethodType):
+            _update_hash(hsh, (obj.__func__, obj.__self__), memo)
+
+        elif isinstance(obj, types.FunctionType):
+            code = obj.__code__
+            _update_hash(hsh, code, memo)
+            _update_hash(hsh, (obj.__defaults__, obj.__kwdefaults__), memo)
+
+            cells = []
+            for cell in obj.__closure__ or []:
+                try:
+                    cells.append(cell.cell_contents)
+
+                except ValueError: # Empty cell.
+                    cells.append(None)
+            _update_hash(hsh, cells, memo)
+
+            names = set()
+            codes = [code]
+            while len(codes):
+                code = codes.pop()
+                names.update(code.co_names)
+                codes.extend(val for val in code.co_consts
+                             if isinstance(val, types.CodeType))
+            for name in sorted(names):
+                if name not in obj.__globals__:
+                    continue
+
+                val = obj.__globals__[name]
+                _update_hash(hsh, name, memo)
+                if (callable(val) and (getattr(val, '__module__', None)
+                                       != obj.__module__)):
+                    # Library functions are identified by names only.
+                    _update_hash(hsh, type(val).__name__, memo)
+                    hsh.update(('%s:%s'
+                                % (getattr(val, '__module__', None),
+                                   getattr(val, '__qualname__', None)))
+                               .encode())
+
+                else:
+                    _update_hash(hsh, val, memo)
+
+        elif not isinstance(obj, (type, types.BuiltinFunctionType,
+                                  nm.ufunc)):
+            raise ValueError('cannot hash callable %s!' % repr(obj))
+
+    else:
+        hsh.update(repr(obj).encode())
+
+
+def get_micro_hash(conf, define_args=None):
+    """
+    Get a hash of the micro problem definition.
+
+    The hash is computed from the problem description file contents, the
+    mesh file contents, the material parameters, the `define_args` and the
+    SfePy version.
+
+    Parameters
+    ----------
+    conf : ProblemConf instance
+        The micro problem configuration.
+    define_args : dict, optional
+        The arguments passed to the `define()` function of the problem
+        description file.
+
+    Returns
+    -------
+    key : str
+        The hexadecimal digest of the hash.
+
+    Raises
+    ------
+    ValueError
+        If the materials or `define_args` contain callables other than
+        functions, methods, `functools.partial` instances and built-in
+        functions, that cannot be hashed reliably.
+    """
+    from sfepy import __version__
+
+    hsh = hashlib.sha256()
+    hsh.update(__version__.encode())
+    for filename in [conf.get('_filename', None),
+                     conf.get('filename_mesh', None)]:
+        if isinstance(filename, str) and op.isfile(filename):
+            with open(filename, 'rb') as fd:
+                hsh.update(fd.read())
+
+        else:
+            _update_hash(hsh, filename)
+
+    _update_hash(hsh, conf.get('materials', {}))
+    _update_hash(hsh, define_args)
+
+    return hsh.hexdigest()
+
+
+class CoefsCache(Struct):
+    """
+    Persistent cache of homogenized coefficients and optionally correctors,
+    with entries stored in HDF5 files named by the hashes of the micro
+    problem definitions, see :func:`get_micro_hash()`.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The cache directory.
+    max_size : int, optional
+        If given, the least recently used entries are removed so that the
+        total size of the cache files in bytes does not exceed `max_size`.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        Struct.__init__(self, cache_dir=cache_dir, max_size=max_size)
+
+    def get_filename(self, key):
+        return op.join(self.cache_dir, key + '.h5')
+
+    def load(self, key, correctors=False):
+        """
+        Load the cache entry given by `key`.
+
+        Returns
+        -------
+        coefs : Coefficients instance or None
+            The coefficients, or None if the entry does not exist (or does
+            not contain the correctors if `correctors` is True).
+        corrs : dict or None
+            The correctors, if stored in the entry.
+        """
+        filename = self.get_filename(key)
+        if not (op.exists(filename) and pt.is_hdf5_file(filename)):
+            return None, None
+
+        with pt.open_file(filename, mode='r') as fd:
+            if correctors and ('/corrs' not in fd):
+                return None, None
+
+            coefs = Coefficients()
+            coefs.__dict__ = read_from_hdf5(fd, fd.root.coefs)
+            corrs = (pickle.loads(fd.root.corrs.read())
+                     if '/corrs' in fd else None)
+
+        # Mark as recently used.
+        os.utime(filename)
+
+        return coefs, corrs
+
+    def save(self, key, coefs, corrs=None):
+        """
+        Save the coefficients and optionally the correctors to the cache
+        entry given by `key`, and evict old entries if needed.
+        """
+        filename = self.get_filename(key)
+        ensure_path(filename)
+
+        tmp_filename = filename + '.tmp'
+        with pt.open_file(tmp_filename, mode='w',
+                          title='SfePy homogenized coefficients') as fd:
+            write_to_hdf5(fd, fd.root, 'coefs', coefs.__dict__)
+            if corrs is not None:
+                fd.create_array(fd.root, 'corrs',
+                                nm.array(pickle.dumps(corrs)), 'correctors')
+        os.replace(tmp_filename, filename)
+
+        self.evict(keep=filename)
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used entries exceeding the maximum cache
+        size, except the `keep` file.
+        """
+        if self.max_size is None: return
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.h5'): continue
+            filename = op.join(self.cache_dir, name)
+            stat = os.stat(filename)
+            entries.append((stat.st_mtime, stat.st_size, filename))
+
+        size = sum(entry[1] for entry in entries)
+        for _, fsize, filename in sorted(entries):
+            if size <= self.max_size: break
+            if filename == keep: continue
+
+            output('removing cached coefficients %s' % filename)
+            os.remove(filename)
+            size -= fsize
+
+
 def coefs_to_dict(coefs, mode, n):
     out = {}
     if mode == None:
@@ -50,8 +302,33 @@ def coefs_to_dict(coefs, mode, n):
 def get_homog_coefs_linear(ts, coor, mode,
                            micro_filename=None, regenerate=False,
                            coefs_filename=None, define_args=None,
-                           output_dir=None):
-
+                           output_dir=None, cache_dir=None,
+                           cache_max_size=None, cache_correctors=False):
+    """
+    Get the homogenized coefficients of a linear micro problem.
+
+    The coefficients are computed only once per `micro_filename` in a
+    process. If `cache_dir` is given, the coefficients are also stored in
+    a persistent cache, see :class:`CoefsCache`, with the entries keyed by
+    :func:`get_micro_hash()`, and reused in subsequent runs with identical
+    micro problems. Otherwise, the coefficients are reused from
+    `coefs_filename`, if it exists and `regenerate` is False.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        The directory of the persistent coefficients cache.
+    cache_max_size : int, optional
+        The maximum total size of the cache files in bytes.
+    cache_correctors : bool
+        If True, store also the correctors in the cache entries. This is
+        needed for reusing the cache entries with a micro problem with the
+        recovery hook.
+
+    Notes
+    -----
+    The other arguments are as in the material functions.
+    """
     nc = None if coor is None else coor.shape[0]
     if micro_filename in homogen_app_cache:
         return coefs_to_dict(homogen_app_cache[micro_filename][0], mode, nc)
@@ -66,15 +343,35 @@ def get_homog_coefs_linear(ts, coor, mode,
         coefs_filename = op.join(conf.options.get('output_dir', '.'),
                                  coefs_filename) + '.h5'
 
-    if not regenerate:
+    recovery_hook = conf.options.get('recovery_hook', None)
+
+    corrs = None
+    if cache_dir is not None:
+        try:
+            cache_key = get_micro_hash(conf, define_args)
+
+        except ValueError as exc:
+            output('%s - coefficients cache not used!' % exc)
+            cache_dir = None
+
+    if cache_dir is not None:
+        cache = CoefsCache(cache_dir, max_size=cache_max_size)
+        if not regenerate:
+            coefs, corrs = cache.load(cache_key, correctors=(
+                cache_correctors and (recovery_hook is not None)
+            ))
+            regenerate = coefs is None
+            if not regenerate:
+                output('using cached coefficients %s'
+                       % cache.get_filename(cache_key))
+
+    elif not regenerate:
         if op.exists( coefs_filename ):
             if not pt.is_hdf5_file( coefs_filename ):
                 regenerate = True
         else:
             regenerate = True
 
-    recovery_hook = conf.options.get('recovery_hook', None)
-
     if regenerate:
         options = Struct( output_filename_trunk = None )
 
@@ -84,15 +381,22 @@ def get_homog_coefs_linear(ts, coor, mode,
             coefs = coefs[0]
 
         coefs.to_file_hdf5( coefs_filename )
+        if cache_dir is not None:
+            cache.save(cache_key, coefs,
+                       corrs=deps if cache_correctors else None)
 
         rhook = (None if recovery_hook is None else
                  conf.get_function(recovery_hook))
         homogen_app_cache[micro_filename] = (coefs, app.he, deps, rhook)
     else:
-        coefs = Coefficients.from_file_hdf5( coefs_filename )
-        recovery_hook = conf.options.get('recovery_hook', None)
+        if cache_dir is None:
+            coefs = Coefficients.from_file_hdf5( coefs_filename )
+
         if recovery_hook is not None:
-            corrs = get_correctors_from_file_hdf5(dump_names=coefs.save_names)
+            if corrs is None:
+                corrs = get_correctors_from_file_hdf5(
+                    dump_names=coefs.save_names
+                )
             rhook = conf.get_function(recovery_hook)
             problem = Problem.from_conf(conf, init_equations=False,
                                         init_solvers=False)
@@ -107,10 +411,196 @@ def get_homog_coefs_linear(ts, coor, mode,
     return coefs_to_dict(coefs, mode, nc)
 
 
+def get_micro_features(macro_data, micro_states, n_micro):
+    """
+    Collect the per micro problem arrays of the macroscopic data and the
+    micro states that determine the micro problem solutions.
+
+    Returns
+    -------
+    features : list
+        The list of arrays of shape `(n_micro, n_i)`.
+    """
+    features = []
+    for data in [macro_data, micro_states]:
+        if data is None:
+            continue
+
+        for key, val in sorted(data.items()):
+            if (key == 'id') or key.endswith('_prev'):
+                continue
+
+            if (isinstance(val, nm.ndarray) and val.ndim
+                and (val.shape[0] == n_micro)):
+                features.append(val.reshape((n_micro, -1)))
+
+    return features
+
+
+def _get_feature_dist(features, scales, ir, idxs=slice(None)):
+    dist = 0.0
+    for feature, scale in zip(features, scales):
+        dd = nm.linalg.norm(feature[idxs] - feature[ir], axis=1) / scale
+        dist = nm.maximum(dist, dd)
+
+    return dist
+
+
+def cluster_micro_states(features, tol, fixed=None):
+    """
+    Cluster the micro problems with nearly identical features.
+
+    A micro problem belongs to the cluster of a representative, if the
+    distance of all its features to those of the representative is at
+    most `tol`. The distance of a feature is the Euclidean norm of the
+    difference relative to the maximum norm of the feature over all
+    micro problems. The clusters are formed greedily: the first
+    micro problem not assigned to any cluster becomes the next
+    representative.
+
+    Parameters
+    ----------
+    features : list of arrays
+        The features as returned by :func:`get_micro_features()`.
+    tol : float
+        The relative clustering tolerance.
+    fixed : list of int, optional
+        The micro problems that have to be the cluster representatives.
+
+    Returns
+    -------
+    reps : array
+        The representatives of the clusters in ascending order.
+    labels : array
+        The cluster of each micro problem.
+    dist : array
+        The distance of each micro problem to its representative.
+    scales : list
+        The feature scales.
+    """
+    n_micro = features[0].shape[0]
+    scales = []
+    for feature in features:
+        scale = nm.linalg.norm(feature, axis=1).max()
+        scales.append(scale if scale > 0.0 else 1.0)
+
+    labels = nm.full(n_micro, -1, dtype=nm.int32)
+    dist = nm.zeros(n_micro, dtype=nm.float64)
+    reserved = nm.zeros(n_micro, dtype=bool)
+    fixed = nm.unique(get_default(fixed, [])).astype(nm.int32)
+    reserved[fixed] = True
+
+    reps = []
+    def add_cluster(ir):
+        ic = len(reps)
+        reps.append(ir)
+        labels[ir] = ic
+
+        free = nm.where((labels < 0) & ~reserved)[0]
+        dd = _get_feature_dist(features, scales, ir, free)
+        ii = nm.where(dd <= tol)[0]
+        labels[free[ii]] = ic
+        dist[free[ii]] = dd[ii]
+
+    for ir in fixed:
+        add_cluster(ir)
+
+    while 1:
+        free = nm.where(labels < 0)[0]
+        if not len(free):
+            break
+
+        add_cluster(free[0])
+
+    # Keep the order of the micro problems.
+    reps = nm.array(reps, dtype=nm.int32)
+    iperm = nm.argsort(reps)
+    perm = nm.empty_like(iperm)
+    perm[iperm] = nm.arange(len(reps))
+
+    return reps[iperm], perm[labels], dist, scales
+
+
+def interpolate_cluster_values(vals, features, scales, reps, labels, tol):
+    """
+    Interpolate the values computed in the cluster representatives to
+    the other micro problems. The values of the representatives within
+    the distance `2 * tol` of a micro problem are weighted by the
+    inverse squared distance. The own representative is always used.
+
+    Parameters
+    ----------
+    vals : dict
+        The arrays of values in the representatives.
+    features, scales, reps, labels :
+        The clustering data as returned by :func:`cluster_micro_states()`.
+    tol : float
+        The relative clustering tolerance.
+
+    Returns
+    -------
+    out : dict
+        The arrays of values in all micro problems.
+    """
+    n_micro = len(labels)
+    wsum = nm.zeros(n_micro, dtype=nm.float64)
+    out = {key : nm.zeros((n_micro,) + val.shape[1:], dtype=val.dtype)
+           for key, val in vals.items()}
+    for ic, ir in enumerate(reps):
+        dd = _get_feature_dist(features, scales, ir)
+        ww = nm.where((dd <= 2 * tol) | (labels == ic),
+                      1.0 / nm.maximum(dd, 1e-12)**2, 0.0)
+        wsum += ww
+        for key, val in vals.items():
+            out[key] += ww.reshape((-1,) + (1,) * (val.ndim - 1)) * val[ic]
+
+    for key, val in vals.items():
+        out[key] /= wsum.reshape((-1,) + (1,) * (val.ndim - 1))
+        out[key][reps] = val
+
+    return out
+
+
 def get_homog_coefs_nonlinear(ts, coor, mode, macro_data=None,
                               term=None, problem=None,
                               iteration=None, define_args=None,
-                              output_dir=None, ret_corrs=False, **kwargs):
+                              output_dir=None, ret_corrs=False,
+                              cluster_tol=None, cluster_interpolate=False,
+                              cluster_check=0, **kwargs):
+    """
+    Get the homogenized coefficients of a nonlinear micro problem in the
+    macroscopic quadrature points. The micro problem states evolve
+    according to the macroscopic data `macro_data`.
+
+    If `cluster_tol` is given, the micro problems with nearly identical
+    macroscopic data and micro states are clustered by
+    :func:`cluster_micro_states()` and only one micro problem per cluster
+    is solved. The coefficients of the representative are reused, or
+    interpolated by :func:`interpolate_cluster_values()`, for the other
+    cluster members, which also take over the updated micro state of the
+    representative. The clustering statistics are stored in the
+    `cluster_stats` attribute of the cached homogenization application,
+    see :func:`get_homogen_app_form_cache()`.
+
+    Parameters
+    ----------
+    cluster_tol : float, optional
+        The relative clustering tolerance.
+    cluster_interpolate : bool
+        If True, interpolate the coefficients of the cluster members from
+        the nearby representatives instead of reusing the coefficients of
+        their own representative.
+    cluster_check : int
+        The number of cluster members farthest from their representatives
+        that are solved also exactly to estimate the clustering error.
+        The exact results are used for those micro problems.
+
+    Notes
+    -----
+    The other arguments are as in the material functions. With
+    `ret_corrs`, the returned dependencies correspond to the solved micro
+    problems only.
+    """
     if not (mode == 'qp'):
         return
 
@@ -131,7 +621,26 @@ def get_homog_coefs_nonlinear(ts, coor, mode, macro_data=None,
 
     app.setup_macro_data(macro_data)
 
-    coefs, deps = app(ret_all=True, itime=ts.step, iiter=iteration)
+    n_micro = coor.shape[0]
+    if (cluster_tol is not None) and (app.micro_states is not None):
+        features = get_micro_features(macro_data, app.micro_states, n_micro)
+        reps, labels, dist, scales = cluster_micro_states(
+            features, cluster_tol, fixed=app.app_options.store_micro_idxs,
+        )
+        members = nm.setdiff1d(nm.arange(n_micro), reps)
+        checks = members[nm.argsort(-dist[members],
+                                    kind='stable')[:cluster_check]]
+
+        micro_idxs = nm.r_[reps, checks]
+        micro_map = labels.copy()
+        micro_map[checks] = len(reps) + nm.arange(len(checks))
+
+        coefs, deps = app(ret_all=True, itime=ts.step, iiter=iteration,
+                          micro_idxs=micro_idxs, micro_map=micro_map)
+
+    else:
+        micro_idxs = None
+        coefs, deps = app(ret_all=True, itime=ts.step, iiter=iteration)
 
     if type(coefs) is tuple:
         coefs = coefs[0]
@@ -151,6 +660,45 @@ def get_homog_coefs_nonlinear(ts, coor, mode, macro_data=None,
         elif len(shape) == 2:
             out[key] = out[key].reshape(shape + (1,))
 
+    if micro_idxs is not None:
+        n_rep = len(reps)
+        vals = {key : val[:n_rep] for key, val in out.items()
+                if len(val) == len(micro_idxs)}
+        if cluster_interpolate:
+            vals = interpolate_cluster_values(vals, features, scales,
+                                              reps, labels, cluster_tol)
+        else:
+            vals = {key : val[labels] for key, val in vals.items()}
+
+        n_check = len(checks)
+        errs = nm.zeros(n_check, dtype=nm.float64)
+        for key, val in vals.items():
+            if not n_check:
+                break
+
+            exact = out[key][n_rep:]
+            diff = (val[checks] - exact).reshape((n_check, -1))
+            norm = nm.linalg.norm(exact.reshape((n_check, -1)), axis=1)
+            errs = nm.maximum(errs, nm.linalg.norm(diff, axis=1)
+                              / nm.where(norm > 0.0, norm, 1.0))
+            val[checks] = exact
+
+        out.update(vals)
+
+        app.cluster_stats = Struct(
+            n_micro=n_micro, n_cluster=n_rep, n_solve=len(micro_idxs),
+            reuse_ratio=1.0 - len(micro_idxs) / n_micro,
+            max_dist=dist.max(), mean_dist=dist.mean(),
+            max_error=errs.max() if n_check else None,
+        )
+        output('clusters: %d, solved: %d of %d micro problems,'
+               ' max. distance: %.2e'
+               % (n_rep, len(micro_idxs), n_micro,
+                  app.cluster_stats.max_dist))
+        if n_check:
+            output('max. relative error of %d checked cluster members: %.2e'
+                   % (n_check, errs.max()))
+
     output.prefix = oprefix
 
     if ret_corrs:
@@ -1,11 +1,23 @@
 """
 Multiprocessing functions.
+
+Large numeric arrays exchanged between the worker processes (correctors,
+periodic caches) are stored in shared memory blocks, see
+:func:`share_arrays()`. The manager dictionaries hold only the small
+picklable :class:`SharedArray` handles.
 """
 import sys
+import atexit
+from copy import copy
+
+import numpy as nm
+
+from sfepy.base.base import Struct
 
 try:
     from multiprocessing import (Manager, cpu_count,
         current_process, set_start_method)
+    from multiprocessing.shared_memory import SharedMemory
     from concurrent.futures import ProcessPoolExecutor
 
     if not current_process().name.startswith('HomogeniationWorkerProcess'):
@@ -20,6 +32,12 @@ active_workers = {}
 multiproc_manager = Manager()
 multiproc_dict = multiproc_manager.dict()
 
+#: The minimum size in bytes of arrays exchanged through shared memory.
+shared_min_nbytes = 1 << 14
+
+# The shared memory blocks created or attached by this process.
+_shared_blocks = {}
+
 if use_multiprocessing:
     active_workers.update({
         'pool': None,
@@ -30,6 +48,7 @@ def get_dict(name, clear=False):
     if name in multiproc_dict:
         out = multiproc_dict[name]
         if clear:
+            release_shared_arrays(out.values())
             out.clear()
     else:
         out = multiproc_dict[name] = multiproc_manager.dict()
@@ -51,3 +70,179 @@ def init_workers(wdir, max_workers=None, **kwargs):
         active_workers['pool'] = ProcessPoolExecutor(max_workers, **kwargs)
 
         return active_workers['pool']
+
+
+class SharedArray(Struct):
+    """
+    A picklable handle of a NumPy array stored in a shared memory block.
+    """
+
+    def __init__(self, array):
+        shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+        aux = nm.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        aux[...] = array
+        del aux
+        _shared_blocks[shm.name] = shm
+
+        Struct.__init__(self, name=shm.name, shape=array.shape,
+                        dtype=array.dtype.str)
+
+    def get_array(self):
+        """
+        Return the array as a read-only view of the shared memory block.
+        """
+        shm = _shared_blocks.get(self.name)
+        if shm is None:
+            shm = _shared_blocks[self.name] = SharedMemory(name=self.name)
+
+        out = nm.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+        out.flags.writeable = False
+
+        return out
+
+
+class SharedDictView:
+    """
+    A read-only view of a dictionary with values containing
+    :class:`SharedArray` handles. The handles are replaced by the arrays
+    on access.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getitem__(self, key):
+        return unshare_arrays(self.data[key])
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def keys(self):
+        return self.data.keys()
+
+
+def share_arrays(obj):
+    """
+    Return a copy of `obj` with the NumPy arrays of at least
+    `shared_min_nbytes` bytes replaced by :class:`SharedArray` handles.
+
+    Dictionaries, lists, tuples and :class:`Struct
+    <sfepy.base.base.Struct>` instances are traversed recursively, other
+    objects are returned as they are.
+    """
+    if isinstance(obj, SharedArray):
+        return obj
+
+    elif isinstance(obj, nm.ndarray):
+        if obj.dtype.hasobject or (obj.nbytes < shared_min_nbytes):
+            return obj
+
+        return SharedArray(obj)
+
+    elif type(obj) is dict:
+        return {key : share_arrays(val) for key, val in obj.items()}
+
+    elif type(obj) in (list, tuple):
+        return type(obj)(share_arrays(val) for val in obj)
+
+    elif isinstance(obj, Struct):
+        out = copy(obj)
+        out.__dict__.update({key : share_arrays(val)
+                             for key, val in obj.__dict__.items()})
+        return out
+
+    return obj
+
+
+def unshare_arrays(obj, copy_data=False):
+    """
+    Inverse of :func:`share_arrays()`. The arrays are read-only views of the
+    shared memory blocks, unless `copy_data` is True.
+    """
+    if isinstance(obj, SharedArray):
+        out = obj.get_array()
+        return out.copy() if copy_data else out
+
+    elif type(obj) is dict:
+        return {key : unshare_arrays(val, copy_data=copy_data)
+                for key, val in obj.items()}
+
+    elif type(obj) in (list, tuple):
+        return type(obj)(unshare_arrays(val, copy_data=copy_data)
+                         for val in obj)
+
+    elif isinstance(obj, Struct):
+        out = copy(obj)
+        out.__dict__.update({key : unshare_arrays(val, copy_data=copy_data)
+                             for key, val in obj.__dict__.items()})
+        return out
+
+    return obj
+
+
+def iter_shared_arrays(obj):
+    """
+    Iterate over :class:`SharedArray` handles in `obj`.
+    """
+    if isinstance(obj, SharedArray):
+        yield obj
+
+    elif isinstance(obj, dict):
+        for val in obj.values():
+            yield from iter_shared_arrays(val)
+
+    elif isinstance(obj, (list, tuple)):
+        for val in obj:
+            yield from iter_shared_arrays(val)
+
+    elif isinstance(obj, Struct):
+        for val in obj.__dict__.values():
+            yield from iter_shared_arrays(val)
+
+
+def release_shared_arrays(objs):
+    """
+    Free the shared memory blocks of all :class:`SharedArray` handles in
+    `objs`. The views obtained by :func:`unshare_arrays()` without copying
+    must not be used afterwards.
+    """
+    for obj in objs:
+        for handle in iter_shared_arrays(obj):
+            shm = _shared_blocks.pop(handle.name, None)
+            try:
+                if shm is None:
+                    shm = SharedMemory(name=handle.name)
+                shm.unlink()
+
+            except FileNotFoundError:
+                continue
+
+            try:
+                shm.close()
+
+            except BufferError:
+                pass
+
+
+def close_shared_blocks():
+    """
+    Close the shared memory blocks of this process that are not used by any
+    array. The blocks are not freed, see :func:`release_shared_arrays()`.
+    """
+    for name, shm in list(_shared_blocks.items()):
+        try:
+            shm.close()
+
+        except BufferError:
+            continue
+
+        _shared_blocks.pop(name)
+
+
+def _release_all():
+    for name in list(multiproc_dict.keys()):
+        release_shared_arrays(multiproc_dict[name].values())
+
+
+if use_multiprocessing:
+    atexit.register(_release_all)
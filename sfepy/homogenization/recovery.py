@@ -485,10 +485,183 @@ def get_recovery_points(region, eps0):
     return ccoors
 
 
+def get_recovery_output_regions(pb, out):
+    """
+    Group the recovered data `out` of a microstructure by the regions they
+    are defined in.
+
+    Returns
+    -------
+    outregs_data : dict
+        The output data keys for each region name.
+    outregs_info : dict
+        The region label and cells for each region name.
+    """
+    outregs_data = {}
+    outregs_info = {None: ('ALL', nm.arange(pb.domain.mesh.n_el))}
+    vn_reg = {None: None}
+    for k, v in out.items():
+        if hasattr(v, 'region_name'):
+            rn = v.region_name
+            if rn not in outregs_info:
+                reg = pb.domain.regions[rn]
+                outregs_info[rn] = (rn, reg.get_entities(-1))
+        else:
+            vn = getattr(v, 'var_name', None)
+            if vn not in vn_reg:
+                reg = pb.create_variables(vn)[vn].field.region
+                rn = reg.name
+                vn_reg[vn] = rn
+                if rn not in outregs_info:
+                    outregs_info[rn] = (rn, reg.get_entities(-1))
+            else:
+                rn = vn_reg[vn]
+
+        if rn in outregs_data:
+            outregs_data[rn].append(k)
+        else:
+            outregs_data[rn] = [k]
+
+    return outregs_data, outregs_info
+
+
+def create_recovery_file(filename, mesh, mic_coors, outregs_data,
+                         outregs_info, out, n_rec, eps0, macro_dim):
+    """
+    Create the HDF5 file for streaming the recovered microstructures by
+    :func:`append_recovery_data()`.
+
+    The file contains a group for each output region with the RVE mesh
+    restricted to the region, with the coordinates relative to the RVE
+    center, and an extendable array for each variable, indexed by the
+    microstructures. The RVE centers and the recovery ids (macroscopic
+    cells or points) of the microstructures are stored in the root group.
+
+    Returns
+    -------
+    fd : tables.File
+        The opened file.
+    """
+    import tables as pt
+
+    fd = pt.open_file(filename, mode='w', title='SfePy recovery file')
+    fd.root._v_attrs.eps0 = eps0
+    filters = pt.Filters(complevel=1, complib='zlib', shuffle=True)
+
+    fd.create_earray('/', 'centers', pt.Float64Atom(),
+                     (0, macro_dim), expectedrows=n_rec)
+    fd.create_earray('/', 'recovery_ids', pt.Int64Atom(), (0,),
+                     expectedrows=n_rec)
+
+    conn = mesh.get_conn(mesh.descs[0])
+    for rn, keys in outregs_data.items():
+        rlabel, cidxs = outregs_info[rn]
+        rconn = conn[cidxs]
+        vidxs = nm.unique(rconn)
+        remap = -nm.ones((mesh.n_nod,), dtype=nm.int32)
+        remap[vidxs] = nm.arange(len(vidxs))
+
+        group = fd.create_group('/', rlabel)
+        group._v_attrs.desc = mesh.descs[0]
+        fd.create_array(group, 'coors', mic_coors[vidxs])
+        fd.create_array(group, 'conn', remap[rconn])
+        fd.create_array(group, 'vertex_groups',
+                        mesh.cmesh.vertex_groups[vidxs])
+        fd.create_array(group, 'cell_groups', mesh.cmesh.cell_groups[cidxs])
+
+        data_group = fd.create_group(group, 'data')
+        for key in keys:
+            val = out[key]
+            node = fd.create_earray(data_group, key, pt.Atom.from_dtype(
+                val.data.dtype), (0,) + val.data.shape, filters=filters,
+                expectedrows=n_rec)
+            node._v_attrs.mode = val.mode
+
+    return fd
+
+
+def append_recovery_data(fd, outs, centers, recovery_ids):
+    """
+    Append the recovered microstructures data `outs` to the file created
+    by :func:`create_recovery_file()`.
+    """
+    fd.root.centers.append(centers)
+    fd.root.recovery_ids.append(recovery_ids)
+    for group in fd.iter_nodes('/', classname='Group'):
+        for node in group.data:
+            node.append(nm.array([out[node.name].data for out in outs]))
+
+    fd.flush()
+
+
+def read_recovery_data(filename, recovery_ids=None):
+    """
+    Read the data of the recovered microstructures saved by
+    :func:`recover_micro_hook()` with the `chunk_size` argument.
+
+    Parameters
+    ----------
+    filename : str
+        The recovery file name.
+    recovery_ids : array, optional
+        If given, read only the microstructures with the given recovery
+        ids (macroscopic cells or points). Otherwise read all.
+
+    Returns
+    -------
+    out : dict
+        For each output region label, a Struct with the RVE mesh data:
+        `coors` - the coordinates of each microstructure, `conn`,
+        `vertex_groups`, `cell_groups`, `desc`, and with the
+        `recovery_ids` and the variables data in `data`, the first axis
+        being the microstructure index.
+    """
+    import tables as pt
+
+    with pt.open_file(filename, mode='r') as fd:
+        ids = fd.root.recovery_ids.read()
+        if recovery_ids is None:
+            rows = nm.arange(len(ids))
+
+        else:
+            rows = nm.where(nm.isin(ids, recovery_ids))[0]
+
+        def read_rows(node):
+            if not len(rows):
+                return nm.empty((0,) + node.shape[1:], dtype=node.dtype)
+
+            return node[(rows.tolist(),) + (slice(None),) * (node.ndim - 1)]
+
+        centers = read_rows(fd.root.centers)
+
+        out = {}
+        for group in fd.iter_nodes('/', classname='Group'):
+            coors = group.coors.read()
+            data = {}
+            for node in group.data:
+                data[node.name] = Struct(name='output_data',
+                                         mode=node._v_attrs.mode,
+                                         data=read_rows(node))
+
+            coors = nm.repeat(coors[None, ...], len(rows), axis=0)
+            coors[..., :centers.shape[1]] += centers[:, None, :]
+
+            out[group._v_name] = Struct(
+                coors=coors,
+                conn=group.conn.read(), desc=group._v_attrs.desc,
+                vertex_groups=group.vertex_groups.read(),
+                cell_groups=group.cell_groups.read(),
+                recovery_ids=ids[rows], data=data,
+            )
+
+    return out
+
+
 def recover_micro_hook(micro_filename, region, macro, eps0,
                        region_mode='el_centers', eval_mode='constant',
                        eval_vars=None, corrs=None, recovery_file_tag='',
-                       define_args=None, output_dir=None, verbose=False):
+                       define_args=None, output_dir=None, verbose=False,
+                       chunk_size=None):
     """
     Parameters
     ----------
@@ -526,6 +699,13 @@ def recover_micro_hook(micro_filename, region, macro, eps0,
         The output directory.
     verbose : bool
         The verbose terminal output.
+    chunk_size : int, optional
+        If given, the microstructures are recovered in chunks of
+        `chunk_size` RVEs, each chunk in parallel if the multiprocessing
+        is enabled, and the results are streamed to a single HDF5 file,
+        see :func:`create_recovery_file()` and
+        :func:`read_recovery_data()`. Otherwise, all microstructures are
+        recovered at once and saved to a mesh file per output region.
     """
     if eval_mode not in ['constant', 'continuous']:
         raise ValueError(f"Evaluation mode '{eval_mode}' not implemented!")
@@ -575,7 +755,6 @@ def recover_micro_hook(micro_filename, region, macro, eps0,
     mesh = pb.domain.mesh
     bbox = mesh.get_bounding_box()
     mic_coors = (mesh.coors - 0.5 * (bbox[1, :] + bbox[0, :])) * eps0
-    coors, conn, ndoffset, rec_ids = [], [], 0, []
 
     if eval_vars is not None and eval_mode == 'constant':
         new_macro = {}
@@ -589,15 +768,9 @@ def recover_micro_hook(micro_filename, region, macro, eps0,
 
         macro = new_macro
 
-    recovery_args = []
-
-    for ii in range(nrec):
+    def get_recovery_args(ii):
         local_coors = mic_coors.copy()
         local_coors[:, :ccoors.shape[1]] += ccoors[ii]
-        coors.append(local_coors)
-        conn.append(mesh.get_conn(mesh.descs[0]) + ndoffset)
-        ndoffset += mesh.n_nod
-        rec_ids.append(nm.ones((mesh.n_el,)) * recovery_ids[ii])
 
         label = f'micro: {ii + 1}/{nrec} {recovery_ids_s[ii]}'
 
@@ -630,35 +803,56 @@ def recover_micro_hook(micro_filename, region, macro, eps0,
                 else:
                     local_macro[k] = v[ii, ...]
 
-        recovery_args.append((local_macro, label))
+        return local_coors, (local_macro, label)
+
+    output_dir = opts.get('output_dir', '.')
+    micro_name = pb.get_output_name(extra='recovered%s' % recovery_file_tag)
+
+    if chunk_size is not None:
+        filename = osp.join(output_dir,
+                            osp.splitext(osp.basename(micro_name))[0] + '.h5')
+        fd = None
+        try:
+            for i0 in range(0, nrec, chunk_size):
+                idxs = nm.arange(i0, min(nrec, i0 + chunk_size))
+                recovery_args = [get_recovery_args(ii)[1] for ii in idxs]
+                outs = he.recover(corrs, rhook, recovery_args)
+
+                if fd is None:
+                    outregs_data, outregs_info = \
+                        get_recovery_output_regions(pb, outs[0])
+                    fd = create_recovery_file(filename, mesh, mic_coors,
+                                              outregs_data, outregs_info,
+                                              outs[0], nrec, eps0,
+                                              ccoors.shape[1])
+
+                append_recovery_data(fd, outs, ccoors[idxs],
+                                     nm.asarray(recovery_ids)[idxs])
+
+        finally:
+            if fd is not None:
+                fd.close()
+
+        if fd is not None:
+            output(f'output saved to "{filename}"')
+
+        output('...done in %.2f s' % timer.stop())
+        return
+
+    coors, conn, ndoffset, rec_ids = [], [], 0, []
+    recovery_args = []
+    for ii in range(nrec):
+        local_coors, args = get_recovery_args(ii)
+        coors.append(local_coors)
+        conn.append(mesh.get_conn(mesh.descs[0]) + ndoffset)
+        ndoffset += mesh.n_nod
+        rec_ids.append(nm.ones((mesh.n_el,)) * recovery_ids[ii])
+        recovery_args.append(args)
 
     outs = he.recover(corrs, rhook, recovery_args)
 
     # Collect output data - by region
-    outregs_data = {}
-    outregs_info = {None: ('ALL', nm.arange(pb.domain.mesh.n_el))}
-    vn_reg = {None: None}
-    for k, v in outs[0].items():
-        if hasattr(v, 'region_name'):
-            rn = v.region_name
-            if rn not in outregs_info:
-                reg = pb.domain.regions[rn]
-                outregs_info[rn] = (rn, reg.get_entities(-1))
-        else:
-            vn = getattr(v, 'var_name', None)
-            if vn not in vn_reg:
-                reg = pb.create_variables(vn)[vn].field.region
-                rn = reg.name
-                vn_reg[vn] = rn
-                if rn not in outregs_info:
-                    outregs_info[rn] = (rn, reg.get_entities(-1))
-            else:
-                rn = vn_reg[vn]
-
-        if rn in outregs_data:
-            outregs_data[rn].append(k)
-        else:
-            outregs_data[rn] = [k]
+    outregs_data, outregs_info = get_recovery_output_regions(pb, outs[0])
 
     rec_ids = nm.hstack(rec_ids).reshape((-1, 1, 1, 1))
     nrve = len(coors)
@@ -667,7 +861,6 @@ def recover_micro_hook(micro_filename, region, macro, eps0,
     conn = nm.vstack(conn)
     cgroups = nm.tile(mesh.cmesh.cell_groups.squeeze(), (nrve,))
     # Get region mesh and data
-    output_dir = opts.get('output_dir', '.')
     for rn in outregs_data.keys():
         rlabel, cidxs = outregs_info[rn]
         gcidxs = nm.hstack([cidxs + mesh.n_el * ii for ii in range(nrve)])
@@ -471,3 +471,121 @@ def get_coors_in_ball(coors, centre, radius, radius2=None, inside=True):
             out = nm.where((nvec >= radius) & (nvec <= radius2))[0]
 
     return out
+
+def _quantize_coors(coors, n_bits):
+    """
+    Quantize point coordinates to a regular grid with `2**n_bits` cells along
+    each axis of their bounding box. Return the integer grid coordinates and
+    the number of bits.
+    """
+    coors = nm.asarray(coors, dtype=nm.float64)
+    if coors.ndim == 1:
+        coors = coors[:, None]
+
+    dim = coors.shape[1]
+    if n_bits is None:
+        n_bits = 63 // dim
+
+    c_min = coors.min(axis=0)
+    extent = coors.max(axis=0) - c_min
+    extent[extent == 0.0] = 1.0
+
+    n_cell = 2**n_bits
+    icoors = ((coors - c_min) / extent * (n_cell - 1)).astype(nm.uint64)
+
+    return icoors, n_bits
+
+def get_morton_codes(coors, n_bits=None):
+    """
+    Get the Morton (Z-order) space-filling curve codes of points.
+
+    The point coordinates are quantized to a regular grid with `2**n_bits`
+    cells along each axis of their bounding box, and the bits of the
+    integer grid coordinates are interleaved.
+
+    Parameters
+    ----------
+    coors : array
+        The coordinates of points, shape `(n_point, dim)`.
+    n_bits : int, optional
+        The number of bits per axis. By default, the maximum number for the
+        code to fit into 63 bits is used.
+
+    Returns
+    -------
+    codes : array of uint64
+        The Morton codes of the points.
+    """
+    icoors, n_bits = _quantize_coors(coors, n_bits)
+    dim = icoors.shape[1]
+
+    codes = nm.zeros(icoors.shape[0], dtype=nm.uint64)
+    for ib in range(n_bits):
+        for ic in range(dim):
+            bit = (icoors[:, ic] >> nm.uint64(ib)) & nm.uint64(1)
+            codes |= bit << nm.uint64(dim * ib + ic)
+
+    return codes
+
+def get_hilbert_codes(coors, n_bits=None):
+    """
+    Get the Hilbert space-filling curve codes of points.
+
+    The point coordinates are quantized as in :func:`get_morton_codes()` and
+    converted to the Hilbert curve indices using the algorithm of J. Skilling,
+    Programming the Hilbert curve, AIP Conf. Proc. 707, 381 (2004). Unlike
+    the Morton curve, the consecutive cells along the Hilbert curve are
+    always face neighbours.
+
+    Parameters
+    ----------
+    coors : array
+        The coordinates of points, shape `(n_point, dim)`.
+    n_bits : int, optional
+        The number of bits per axis. By default, the maximum number for the
+        code to fit into 63 bits is used.
+
+    Returns
+    -------
+    codes : array of uint64
+        The Hilbert codes of the points.
+    """
+    icoors, n_bits = _quantize_coors(coors, n_bits)
+    dim = icoors.shape[1]
+    xx = [icoors[:, ic].copy() for ic in range(dim)]
+
+    one = nm.uint64(1)
+    # Inverse undo excess work.
+    qq = one << nm.uint64(n_bits - 1)
+    while qq > one:
+        pp = qq - one
+        for ic in range(dim):
+            flip = (xx[ic] & qq) != 0
+            # Invert the low bits of x[0] or exchange them with x[ic].
+            tt = (xx[0] ^ xx[ic]) & pp
+            xx[0] = nm.where(flip, xx[0] ^ pp, xx[0] ^ tt)
+            if ic > 0:
+                xx[ic] = nm.where(flip, xx[ic], xx[ic] ^ tt)
+        qq >>= one
+
+    # Gray encode.
+    for ic in range(1, dim):
+        xx[ic] ^= xx[ic - 1]
+
+    tt = nm.zeros_like(xx[0])
+    qq = one << nm.uint64(n_bits - 1)
+    while qq > one:
+        tt = nm.where((xx[dim - 1] & qq) != 0, tt ^ (qq - one), tt)
+        qq >>= one
+
+    for ic in range(dim):
+        xx[ic] ^= tt
+
+    # Interleave the transposed index, x[0] holds the most significant bits.
+    codes = nm.zeros(icoors.shape[0], dtype=nm.uint64)
+    for ib in range(n_bits):
+        for ic in range(dim):
+            bit = (xx[ic] >> nm.uint64(ib)) & one
+            codes |= bit << nm.uint64(dim * ib + dim - 1 - ic)
+
+    return codes
@@ -244,3 +244,105 @@ def infinity_norm(mtx):
         norm = nm.dot(nm.abs(mtx), ones).max()
 
     return norm
+
+def get_graph_pattern(mtx):
+    """
+    Return the symmetric sparsity pattern of a square sparse matrix, without
+    the diagonal, as a CSR array.
+    """
+    pattern = sp.csr_array(mtx, copy=True)
+    pattern.data[:] = 1
+    pattern = sp.csr_array(pattern + pattern.T)
+    pattern.setdiag(0)
+    pattern.eliminate_zeros()
+
+    return pattern
+
+def partition_graph(mtx, n_parts, use_metis=True, verbose=False):
+    """
+    Partition the graph given by the sparsity pattern of a square sparse
+    matrix into `n_parts` parts, using metis, if available.
+
+    Without metis, the graph nodes are ordered using the reverse
+    Cuthill-McKee algorithm and split into contiguous parts of nearly equal
+    sizes.
+
+    Parameters
+    ----------
+    mtx : sparray
+        The sparse matrix.
+    n_parts : int
+        The number of parts.
+    use_metis : bool
+        If True, try to use metis.
+    verbose : bool
+        If True, print the part sizes.
+
+    Returns
+    -------
+    parts : array
+        The part number of each graph node (matrix row).
+    """
+    from scipy.sparse.csgraph import reverse_cuthill_mckee
+    from sfepy.base.base import output
+
+    pattern = get_graph_pattern(mtx)
+    n_nod = pattern.shape[0]
+
+    part_graph = None
+    if use_metis:
+        try:
+            from pymetis import part_graph
+
+        except ImportError:
+            output('pymetis is not available, using RCM-based partitioning!',
+                   verbose=verbose)
+
+    if (part_graph is not None) and (n_parts > 1):
+        cuts, parts = part_graph(n_parts, xadj=pattern.indptr.astype(int),
+                                 adjncy=pattern.indices.astype(int))
+        parts = nm.array(parts, dtype=nm.int32)
+
+    else:
+        perm = reverse_cuthill_mckee(pattern, symmetric_mode=True)
+        ii = nm.arange(n_parts)
+        sizes = n_nod // n_parts + ((n_nod % n_parts) > ii)
+        offs = nm.cumsum(nm.r_[0, sizes])
+
+        parts = nm.empty(n_nod, dtype=nm.int32)
+        parts[perm] = nm.digitize(nm.arange(n_nod), offs) - 1
+
+    output('part sizes:', nm.bincount(parts, minlength=n_parts),
+           verbose=verbose)
+
+    return parts
+
+def get_bandwidth(mtx, perm=None):
+    """
+    Get the bandwidth of a sparse matrix, i.e. the maximum distance of a
+    nonzero entry from the diagonal.
+
+    Parameters
+    ----------
+    mtx : sparray
+        The sparse matrix.
+    perm : array, optional
+        If given, the bandwidth of the symmetrically permuted matrix
+        `mtx[perm][:, perm]` is returned.
+
+    Returns
+    -------
+    bandwidth : int
+        The matrix bandwidth.
+    """
+    mtx = sp.coo_array(mtx)
+    if not mtx.nnz:
+        return 0
+
+    rows, cols = mtx.row, mtx.col
+    if perm is not None:
+        iperm = nm.empty_like(perm)
+        iperm[perm] = nm.arange(len(perm), dtype=perm.dtype)
+        rows, cols = iperm[rows], iperm[cols]
+
+    return int(nm.abs(rows.astype(nm.int64) - cols).max())
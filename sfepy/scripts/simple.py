@@ -73,7 +73,8 @@ helps = {
     'output_format' :
     'output file format, one of: {vtk, h5} [default: vtk]',
     'save_restart' :
-    'if given, save restart files according to the given mode.',
+    'if given, save restart files according to the given mode:'
+    ' -n keeps the last n restart files.',
     'load_restart' :
     'if given, load the given restart file',
     'log' :
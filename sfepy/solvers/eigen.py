@@ -2,7 +2,7 @@
 import numpy as nm
 import scipy.sparse as sps
 
-from sfepy.base.base import get_default, try_imports, Struct
+from sfepy.base.base import output, get_default, try_imports, Struct
 from sfepy.base.timing import Timer
 from sfepy.solvers.solvers import Solver, EigenvalueSolver
 
@@ -54,6 +54,332 @@ def standard_call(call):
 
     return _standard_call
 
+class ShiftInvertFactor(Struct):
+    r"""
+    Cached sparse LU factorization of the shifted matrix :math:`A - \sigma B`
+    for the shift-invert mode of sparse eigenvalue solvers.
+
+    The factorization is kept while the relative change (in the Frobenius
+    norm) of the shifted matrix with respect to the factorized one is at most
+    `reuse_tol`. The inverse of the changed matrix is then applied by GMRES
+    iterations preconditioned by the old factors. If GMRES does not reach the
+    relative tolerance `eps_r` in `i_max` iterations, the current matrix is
+    factorized.
+    """
+
+    def __init__(self, reuse_tol=0.0, eps_r=1e-8, i_max=20):
+        Struct.__init__(self, reuse_tol=reuse_tol, eps_r=eps_r, i_max=i_max,
+                        mtx=None, mtx0=None, lu=None,
+                        n_factor=0, n_reuse=0, n_iter=0)
+
+    def update(self, mtx_a, mtx_b=None, sigma=0.0):
+        """
+        Set the current shifted matrix and factorize it, unless the cached
+        factorization can be reused.
+
+        Returns
+        -------
+        is_new : bool
+            True, if the matrix was factorized.
+        """
+        mtx = sps.csc_matrix(mtx_a)
+        if sigma != 0.0:
+            if mtx_b is None:
+                mtx_b = sps.identity(mtx.shape[0], dtype=mtx.dtype)
+            mtx = sps.csc_matrix(mtx - sigma * mtx_b)
+        self.mtx = mtx
+
+        if ((self.lu is not None) and (mtx.shape == self.mtx0.shape)
+            and (mtx.dtype == self.mtx0.dtype)):
+            from scipy.sparse.linalg import norm
+
+            change = norm(mtx - self.mtx0) / norm(self.mtx0)
+            if change <= self.reuse_tol:
+                self.n_reuse += 1
+                return False
+
+        self.factorize()
+        return True
+
+    def factorize(self):
+        from scipy.sparse.linalg import splu
+
+        self.lu = splu(self.mtx)
+        self.mtx0 = self.mtx
+        self.n_factor += 1
+
+    def solve(self, rhs):
+        """
+        Apply the inverse of the current shifted matrix to `rhs`.
+        """
+        if self.mtx is self.mtx0:
+            return self.lu.solve(rhs)
+
+        from scipy.sparse.linalg import gmres, LinearOperator
+
+        def _count(res):
+            self.n_iter += 1
+
+        # Left preconditioning - the preconditioned residual is close to the
+        # solution error.
+        lu, mtx = self.lu, self.mtx
+        op = LinearOperator(mtx.shape, matvec=lambda x: lu.solve(mtx @ x),
+                            dtype=mtx.dtype)
+        sol, info = gmres(op, lu.solve(rhs), rtol=self.eps_r, atol=0.0,
+                          restart=self.i_max, maxiter=1,
+                          callback=_count, callback_type='pr_norm')
+        if info != 0:
+            self.factorize()
+            sol = self.lu.solve(rhs)
+
+        return sol
+
+    def get_inverse(self):
+        """
+        Return the inverse of the current shifted matrix as a linear operator.
+        """
+        from scipy.sparse.linalg import LinearOperator
+
+        return LinearOperator(self.mtx.shape, matvec=self.solve,
+                              dtype=self.mtx.dtype)
+
+    def get_preconditioner(self):
+        """
+        Return the inverse of the factorized matrix as a linear operator.
+        """
+        from scipy.sparse.linalg import LinearOperator
+
+        return LinearOperator(self.mtx0.shape, matvec=self.lu.solve,
+                              matmat=self.lu.solve, dtype=self.mtx0.dtype)
+
+class MatrixCombination(Struct):
+    """
+    Linear combinations of fixed sparse matrices.
+
+    The matrices are stored in their common (union) CSR sparsity pattern, so
+    that a combination amounts to a combination of the data arrays.
+    """
+
+    def __init__(self, mtxs):
+        mtxs = [sps.csr_matrix(mtx) for mtx in mtxs]
+        shape = mtxs[0].shape
+
+        pattern = sps.csr_matrix(shape, dtype=nm.int32)
+        for mtx in mtxs:
+            aux = mtx.copy()
+            aux.data = nm.ones_like(aux.data, dtype=nm.int32)
+            pattern = pattern + aux
+        pattern.sum_duplicates()
+        pattern.sort_indices()
+
+        # Use int64 keys to avoid overflows for large matrices.
+        rows = nm.repeat(nm.arange(shape[0], dtype=nm.int64),
+                         nm.diff(pattern.indptr))
+        keys = rows * shape[1] + pattern.indices
+
+        dtype = nm.result_type(*[mtx.dtype for mtx in mtxs])
+        datas = nm.zeros((len(mtxs), pattern.nnz), dtype=dtype)
+        for ii, mtx in enumerate(mtxs):
+            coo = mtx.tocoo()
+            ic = nm.searchsorted(keys, coo.row.astype(nm.int64) * shape[1]
+                                 + coo.col)
+            nm.add.at(datas[ii], ic, coo.data)
+
+        Struct.__init__(self, shape=shape, indptr=pattern.indptr,
+                        indices=pattern.indices, datas=datas)
+
+    def __call__(self, coefs):
+        """
+        Return the combination of the matrices with the coefficients `coefs`.
+        """
+        data = nm.dot(coefs, self.datas)
+        return sps.csr_matrix((data, self.indices, self.indptr),
+                              shape=self.shape)
+
+def get_initial_block(last_vecs, n_dof, n_eigs, seed=12345):
+    """
+    Return the initial block of `n_eigs` vectors for block eigensolvers. The
+    columns of `last_vecs` (e.g. the eigenvectors of a previous call) are
+    used, if given and compatible, the rest is random.
+    """
+    rng = nm.random.default_rng(seed)
+    x = rng.normal(size=(n_dof, n_eigs))
+    if (last_vecs is not None) and (last_vecs.shape[0] == n_dof):
+        n_last = min(n_eigs, last_vecs.shape[1])
+        x = x.astype(nm.result_type(x, last_vecs))
+        x[:, :n_last] = last_vecs[:, :n_last]
+
+    return x
+
+def get_ls_preconditioner(solver, ls_conf, mtx):
+    """
+    Return the linear operator applying the linear solver given by `ls_conf`
+    to the matrix `mtx`, to be used as a preconditioner.
+
+    The linear solver instance is created once and stored in
+    `solver.precond_ls`, so that the solver setup cached by the linear
+    solver can be reused in subsequent calls, e.g. the multigrid hierarchy of
+    'ls.pyamg' with `force_reuse=True`. For linear solvers with the
+    `use_presolve` parameter (e.g. 'ls.scipy_direct'), it defaults to True,
+    so that the matrix is factorized only once and not in every application
+    of the preconditioner.
+    """
+    from scipy.sparse.linalg import LinearOperator
+    from sfepy.solvers import solver_table
+
+    if solver.precond_ls is None:
+        kind, conf = ls_conf
+        conf = conf.copy()
+        if any(par[0] == 'use_presolve'
+               for par in solver_table[kind]._parameters):
+            conf.setdefault('use_presolve', True)
+
+        solver.precond_ls = Solver.any_from_conf(
+            Struct(name='precond', kind=kind, **conf)
+        )
+    ls = solver.precond_ls
+
+    return LinearOperator(mtx.shape, matvec=lambda x: ls(x, mtx=mtx),
+                          dtype=mtx.dtype)
+
+# The data of the batch eigenvalue problems set in each worker process.
+_batch_data = {}
+
+def _init_batch_worker(mtxs, solver_conf, n_eigs, eigenvectors):
+    _batch_data.clear()
+    _batch_data.update(
+        mtxs=mtxs,
+        solver=Solver.any_from_conf(Struct(**solver_conf)),
+        n_eigs=n_eigs,
+        eigenvectors=eigenvectors,
+    )
+
+def _solve_batch_chunk(ii, coefs):
+    data = _batch_data
+    out = []
+    for ir in range(len(ii)):
+        evp_mtxs = [mtx if cs is None else mtx(cs[ir])
+                    for mtx, cs in zip(data['mtxs'], coefs)]
+        out.append(data['solver'](*evp_mtxs, n_eigs=data['n_eigs'],
+                                  eigenvectors=data['eigenvectors']))
+
+    return ii, out
+
+def eig_batch(mtxs, coefs, n_eigs=None, eigenvectors=False,
+              solver_conf=None, n_workers=None, chunk_size=None,
+              filename=None):
+    """
+    Solve a batch of eigenvalue problems with matrices depending linearly on
+    parameters, for example wave vectors in dispersion analyses.
+
+    Parameters
+    ----------
+    mtxs : list
+        The eigenvalue problem matrices in the order of the solver arguments,
+        e.g. `[A, B]` or `[M, D, K]`. Each item is either a fixed matrix, or a
+        tuple/list of parameter-independent matrices, that are combined with
+        the coefficients given in `coefs`.
+    coefs : list
+        For each item of `mtxs`, None for fixed matrices, or an array of
+        shape `(n_batch, n_term)` with the coefficients of the matrix terms.
+    n_eigs : int, optional
+        The number of eigenvalues to compute.
+    eigenvectors : bool
+        If True, compute also the eigenvectors.
+    solver_conf : dict or Struct, optional
+        The eigenvalue solver configuration. The default is the dense
+        'eig.sgscipy' solver. A single solver instance is used in each
+        worker, and the consecutive problems of a chunk are solved one after
+        another, so that options like the factorization reuse and warm starts
+        of :class:`ScipyEigenvalueSolver` are effective.
+    n_workers : int, optional
+        If greater than one, solve the chunks of the batch in a process pool
+        with the given number of workers.
+    chunk_size : int, optional
+        The number of consecutive problems solved by a worker at once. By
+        default, there are about four chunks per worker.
+    filename : str, optional
+        If given, save the results to this HDF5 file, see
+        :func:`sfepy.base.ioutils.write_dict_hdf5()`.
+
+    Returns
+    -------
+    eigs : array
+        The eigenvalues of shape `(n_batch, n_eigs)`.
+    vecs : array
+        If `eigenvectors` is True, also the eigenvectors of shape `(n_batch,
+        n_dof, n_eigs)`.
+    """
+    if solver_conf is None:
+        solver_conf = {'kind' : 'eig.sgscipy'}
+    solver_conf = (solver_conf.to_dict() if isinstance(solver_conf, Struct)
+                   else dict(solver_conf))
+    solver_conf.setdefault('name', 'batch')
+
+    coefs = [None if cs is None else nm.asarray(cs) for cs in coefs]
+    n_batch = [len(cs) for cs in coefs if cs is not None][0]
+
+    n_workers = get_default(n_workers, 1)
+    if chunk_size is None:
+        chunk_size = max(1, -(-n_batch // (4 * n_workers)))
+
+    chunks = [nm.arange(ii, min(ii + chunk_size, n_batch))
+              for ii in range(0, n_batch, chunk_size)]
+    args = [(ii, [None if cs is None else cs[ii] for cs in coefs])
+            for ii in chunks]
+
+    timer = Timer(start=True)
+    mtxs = [MatrixCombination(mtx) if isinstance(mtx, (tuple, list)) else mtx
+            for mtx in mtxs]
+    init_args = (mtxs, solver_conf, n_eigs, eigenvectors)
+    results = [None] * n_batch
+    if (n_workers > 1) and (len(chunks) > 1):
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from multiprocessing import get_context
+
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 mp_context=get_context('spawn'),
+                                 initializer=_init_batch_worker,
+                                 initargs=init_args) as pool:
+            futures = [pool.submit(_solve_batch_chunk, *arg) for arg in args]
+            for future in as_completed(futures):
+                ii, out = future.result()
+                for ir, val in zip(ii, out):
+                    results[ir] = val
+
+    else:
+        _init_batch_worker(*init_args)
+        for arg in args:
+            ii, out = _solve_batch_chunk(*arg)
+            for ir, val in zip(ii, out):
+                results[ir] = val
+        _batch_data.clear()
+
+    output('solved %d eigenvalue problems in %.2f [s] (%d chunks)'
+           % (n_batch, timer.stop(), len(chunks)))
+
+    if eigenvectors:
+        eigs = nm.array([val[0] for val in results])
+        vecs = nm.array([val[1] for val in results])
+        out = (eigs, vecs)
+
+    else:
+        eigs = out = nm.array(results)
+
+    if filename is not None:
+        from sfepy.base.ioutils import ensure_path, write_dict_hdf5
+
+        data = {'eigs' : eigs,
+                'coefs' : {str(ii) : cs for ii, cs in enumerate(coefs)
+                           if cs is not None}}
+        if eigenvectors:
+            data['vecs'] = vecs
+
+        ensure_path(filename)
+        write_dict_hdf5(filename, data)
+
+    return out
+
 class ScipyEigenvalueSolver(EigenvalueSolver):
     """
     SciPy-based solver for both dense and sparse problems.
@@ -77,6 +403,24 @@ class ScipyEigenvalueSolver(EigenvalueSolver):
          None, False,
          """The method used to construct an inverse linear operator. If None, the
             eigenvalue solver will solve the linear system internally."""),
+        ('factor_reuse', 'float', None, False,
+         """If not None and `linear_solver` is None, the sparse methods use
+            the shift-invert mode with the LU factorization of :math:`A -
+            \\sigma B` cached between calls (`sigma` defaults to 0). The
+            eigenvalues nearest to `sigma` are computed, so `which` has to be
+            'SM' or 'LM' (both mean the eigenvalues nearest to `sigma` in
+            this mode). The factorization is reused while the relative
+            change of the shifted matrix is at most the given value, see
+            :class:`ShiftInvertFactor`."""),
+        ('factor_eps_r', 'float', 1e-8, False,
+         """The relative tolerance of the GMRES iterations applying the
+            inverse of a changed matrix with a reused factorization."""),
+        ('factor_i_max', 'int', 20, False,
+         """The maximum number of the GMRES iterations, after which the
+            matrix is factorized."""),
+        ('warm_start', 'bool', False, False,
+         """If True, the sparse methods start from the sum of the
+            eigenvectors computed in the previous call, if any."""),
         ('*', '*', None, False,
          'Additional parameters supported by the method.'),
     ]
@@ -91,6 +435,9 @@ class ScipyEigenvalueSolver(EigenvalueSolver):
                           'cannot import scipy sparse eigenvalue solvers!')
         self.ssla = aux['ssla']
 
+        self.factor = None
+        self.last_vecs = None
+
     @standard_call
     def __call__(self, mtx_a, mtx_b=None, n_eigs=None, eigenvectors=None,
                  status=None, conf=None):
@@ -107,6 +454,11 @@ class ScipyEigenvalueSolver(EigenvalueSolver):
 
         else:
             eig = self.ssla.eigs if conf.method == 'eigs' else self.ssla.eigsh
+            if (conf.warm_start and (self.last_vecs is not None)
+                and (self.last_vecs.shape[0] == mtx_a.shape[0])
+                and ('v0' not in kwargs)):
+                kwargs['v0'] = self.last_vecs.sum(axis=1)
+
             if conf.linear_solver is not None:
                 import sfepy.solvers.ls as ls
                 from sfepy.solvers import solver_table
@@ -134,6 +486,31 @@ class ScipyEigenvalueSolver(EigenvalueSolver):
                 out = eig(fake_mtx_a, M=mtx_b, k=n_eigs, which=conf.which,
                           OPinv=inv_op_a,
                           return_eigenvectors=eigenvectors, **kwargs)
+
+            elif conf.factor_reuse is not None:
+                if conf.which not in ('SM', 'LM'):
+                    raise ValueError("which must be 'SM' or 'LM' with"
+                                     " factor_reuse! (%s)" % conf.which)
+
+                sigma = kwargs.pop('sigma', None)
+                sigma = get_default(sigma, 0.0)
+                if self.factor is None:
+                    self.factor = ShiftInvertFactor(conf.factor_reuse,
+                                                    eps_r=conf.factor_eps_r,
+                                                    i_max=conf.factor_i_max)
+                factor = self.factor
+                factor.update(mtx_a, mtx_b, sigma=sigma)
+
+                # The eigenvalues nearest to sigma are the largest ones of
+                # the shift-inverted problem.
+                out = eig(mtx_a, M=mtx_b, k=n_eigs, which='LM',
+                          sigma=sigma, OPinv=factor.get_inverse(),
+                          return_eigenvectors=eigenvectors, **kwargs)
+                if status is not None:
+                    status['n_factor'] = factor.n_factor
+                    status['n_reuse'] = factor.n_reuse
+                    status['n_iter'] = factor.n_iter
+
             else:
                 out = eig(mtx_a, M=mtx_b, k=n_eigs, which=conf.which,
                           return_eigenvectors=eigenvectors, **kwargs)
@@ -164,6 +541,8 @@ class ScipyEigenvalueSolver(EigenvalueSolver):
         if eigenvectors:
             mtx_ev = out[1][:, ii]
             out = (eigs[ii], mtx_ev)
+            if conf.warm_start:
+                self.last_vecs = mtx_ev
 
         else:
             out = eigs[ii]
@@ -246,6 +625,24 @@ class LOBPCGEigenvalueSolver(EigenvalueSolver):
         ('precond', '{dense matrix, sparse matrix, LinearOperator}',
          None, False,
          'The preconditioner.'),
+        ('factor_reuse', 'float', None, False,
+         """If not None and `precond` is None, the preconditioner is the LU
+            factorization of :math:`A - \\sigma B` cached between calls. It
+            is refactorized only when the relative change of the shifted
+            matrix exceeds the given value, see
+            :class:`ShiftInvertFactor`."""),
+        ('sigma', 'float', 0.0, False,
+         'The shift of the factorized matrix.'),
+        ('precond_solver', "({'ls.pyamg', 'ls.scipy_direct', ...}, ls_conf)",
+         None, False,
+         """If given and `precond` is None, the preconditioner applies the
+            linear solver to :math:`A`. The linear solver instance is kept
+            between calls and `use_presolve` defaults to True, so that
+            a direct solver factorizes :math:`A` only once per matrix, see
+            :func:`get_ls_preconditioner()`."""),
+        ('warm_start', 'bool', False, False,
+         """If True, the eigenvectors of the previous call are used as the
+            initial block, instead of random vectors."""),
     ]
 
     def __init__(self, conf, **kwargs):
@@ -254,6 +651,10 @@ class LOBPCGEigenvalueSolver(EigenvalueSolver):
         from scipy.sparse.linalg import lobpcg
         self.lobpcg = lobpcg
 
+        self.factor = None
+        self.precond_ls = None
+        self.last_vecs = None
+
     @standard_call
     def __call__(self, mtx_a, mtx_b=None, n_eigs=None, eigenvectors=None,
                  status=None, conf=None):
@@ -263,17 +664,36 @@ class LOBPCGEigenvalueSolver(EigenvalueSolver):
         else:
             n_eigs = min(n_eigs, mtx_a.shape[0])
 
-        rng = nm.random.default_rng(12345)
-        x = rng.normal(size=(mtx_a.shape[0], n_eigs))
+        last_vecs = self.last_vecs if conf.warm_start else None
+        x = get_initial_block(last_vecs, mtx_a.shape[0], n_eigs)
+
+        precond = conf.precond
+        if (precond is None) and (conf.precond_solver is not None):
+            precond = get_ls_preconditioner(self, conf.precond_solver, mtx_a)
+
+        elif (precond is None) and (conf.factor_reuse is not None):
+            if self.factor is None:
+                self.factor = ShiftInvertFactor(conf.factor_reuse)
+            factor = self.factor
+            factor.update(mtx_a, mtx_b, sigma=conf.sigma)
+            precond = factor.get_preconditioner()
+            if status is not None:
+                status['n_factor'] = factor.n_factor
+                status['n_reuse'] = factor.n_reuse
 
         out = self.lobpcg(mtx_a, x, mtx_b,
-                          M=conf.precond,
+                          M=precond,
                           tol=conf.eps_a, maxiter=conf.i_max,
                           largest=conf.largest,
-                          verbosityLevel=conf.verbose)
+                          verbosityLevel=conf.verbose,
+                          retResidualNormsHistory=True)
+        if status is not None:
+            status['n_iter'] = len(out[2]) - 1
 
-        if not eigenvectors:
-            out = out[0]
+        if conf.warm_start:
+            self.last_vecs = out[1]
+
+        out = out[:2] if eigenvectors else out[0]
 
         return out
 
@@ -550,6 +970,16 @@ class PrimmeEigenvalueSolver(EigenvalueSolver):
         ('maxiter', 'int', None, False, 'Maximum number of iterations.'),
         ('tol', 'float', 0, False,
          'Tolerance for eigenpairs (stopping criterion).'),
+        ('precond_solver', "({'ls.pyamg', 'ls.scipy_direct', ...}, ls_conf)",
+         None, False,
+         """If given, the preconditioner (`OPinv` of eigsh()) applies the
+            linear solver to :math:`A`. The linear solver instance is kept
+            between calls and `use_presolve` defaults to True, so that
+            a direct solver factorizes :math:`A` only once per matrix, see
+            :func:`get_ls_preconditioner()`."""),
+        ('warm_start', 'bool', False, False,
+         """If True, the eigenvectors of the previous call are used as the
+            initial guesses (`v0` of eigsh())."""),
         ('*', '*', None, False,
          'Additional parameters supported by eigsh().'),
     ]
@@ -560,6 +990,9 @@ class PrimmeEigenvalueSolver(EigenvalueSolver):
         EigenvalueSolver.__init__(self, conf, primme=primme, context=context,
                                   **kwargs)
 
+        self.precond_ls = None
+        self.last_vecs = None
+
     @standard_call
     def __call__(self, mtx_a, mtx_b=None, n_eigs=None, eigenvectors=None,
                  status=None, conf=None, comm=None, context=None):
@@ -567,13 +1000,26 @@ class PrimmeEigenvalueSolver(EigenvalueSolver):
             n_eigs = mtx_a.shape[0]
 
         solver_kwargs = self.build_solver_kwargs(conf)
+        if conf.precond_solver is not None:
+            solver_kwargs['OPinv'] = get_ls_preconditioner(
+                self, conf.precond_solver, mtx_a,
+            )
+
+        if (conf.warm_start and (self.last_vecs is not None)
+            and (self.last_vecs.shape[0] == mtx_a.shape[0])):
+            solver_kwargs['v0'] = self.last_vecs[:, :n_eigs]
 
         out = self.primme.eigsh(mtx_a, n_eigs, M=mtx_b,
                                 which=conf.which.upper(),
                                 tol=conf.tol,
                                 maxiter=conf.maxiter,
                                 sigma=conf.sigma,
-                                return_eigenvectors=eigenvectors,
+                                return_eigenvectors=(eigenvectors
+                                                     or conf.warm_start),
                                 **solver_kwargs)
+        if conf.warm_start:
+            self.last_vecs = out[1]
+            if not eigenvectors:
+                out = out[0]
 
         return out
@@ -7,7 +7,7 @@ import scipy.sparse as sps
 
 warnings.simplefilter('ignore', sps.SparseEfficiencyWarning)
 
-from sfepy.base.base import output, get_default, assert_, try_imports
+from sfepy.base.base import Struct, output, get_default, assert_, try_imports
 from sfepy.base.timing import Timer
 from sfepy.solvers.solvers import LinearSolver
 
@@ -1425,3 +1425,593 @@ class RMMSolver(LinearSolver):
             sol += self.a0
 
         return sol
+
+class PMGSolver(LinearSolver):
+    """
+    p-multigrid solver for fields with hierarchical bases.
+
+    The coarse levels are obtained by dropping DOFs of the hierarchical
+    (Lobatto) basis functions with orders higher than the level order. The
+    restriction and prolongation are thus a DOF truncation and injection, and
+    the coarse level matrices are sub-matrices of the fine level matrix. The
+    coarsest level system is solved by `coarse_solver`, for example a direct
+    solver or AMG. DOFs of fields without a hierarchical basis are kept on all
+    levels.
+
+    The V-cycle is used either as a preconditioner of a Krylov solver given by
+    `accel`, or, if `accel` is None, iterated directly.
+
+    The problem has to be passed to the solver as its context.
+    """
+    name = 'ls.pmg'
+
+    _parameters = [
+        ('orders', 'list of int', None, False,
+         """The polynomial orders of the coarse levels. By default, the
+            highest field order is repeatedly halved down to 1."""),
+        ('coarse_solver', 'dict', None, False,
+         """The configuration of the coarsest level linear solver. By
+            default, a pre-factorized 'ls.scipy_direct' solver is used."""),
+        ('smoother', "{'jacobi', 'gauss_seidel'}", 'jacobi', False,
+         """The smoother. The Gauss-Seidel smoother uses forward sweeps for
+            the pre-smoothing and backward sweeps for the post-smoothing, so
+            that the V-cycle is symmetric."""),
+        ('n_smooth', 'int', 2, False,
+         'The number of pre- and post-smoothing sweeps.'),
+        ('omega', 'float', 2.0 / 3.0, False,
+         'The damping factor of the Jacobi smoother.'),
+        ('accel', 'str', 'cg', False,
+         """The scipy.sparse.linalg Krylov solver preconditioned by the
+            V-cycle. If None, the V-cycles are iterated directly."""),
+        ('i_max', 'int', 100, False,
+         'The maximum number of iterations.'),
+        ('eps_a', 'float', 1e-8, False,
+         'The absolute tolerance for the residual.'),
+        ('eps_r', 'float', 1e-8, False,
+         'The relative tolerance for the residual.'),
+        ('force_reuse', 'bool', False, False,
+         """If True, skip the check whether the level hierarchy corresponds
+            to the `mtx` argument: it is always reused."""),
+    ]
+
+    def __init__(self, conf, context=None, **kwargs):
+        LinearSolver.__init__(self, conf, context=context, levels=None,
+                              mtx_coarse=None, coarse_ls=None, **kwargs)
+        self.converged_reasons = {
+            0 : 'successful exit',
+            1 : 'number of iterations',
+            -1 : 'illegal input or breakdown',
+        }
+
+    def get_dof_orders(self, n_dof, context=None):
+        """
+        Return the polynomial orders of basis functions corresponding to the
+        linear system DOFs.
+        """
+        problem = get_default(context, self.context)
+        if problem is None:
+            raise ValueError('ls.pmg requires the problem as the context!')
+
+        variables = problem.equations.variables
+        adi = variables.adi
+
+        orders = nm.ones(adi.n_dof_total, dtype=nm.int32)
+        for var in variables.iter_state(ordered=True):
+            if not hasattr(var.field, 'get_node_orders'):
+                continue
+
+            dof_orders = nm.repeat(var.field.get_node_orders(),
+                                   var.n_components)
+            if problem.active_only:
+                dof_orders = dof_orders[var.eq_map.eqi]
+
+            orders[adi.indx[var.name]] = dof_orders
+
+        if orders.shape[0] != n_dof:
+            raise ValueError('matrix size does not match DOFs! (%d == %d)'
+                             % (n_dof, orders.shape[0]))
+
+        return orders
+
+    def setup_levels(self, mtx, conf=None, context=None):
+        """
+        Setup the level matrices, smoothers and the coarse level solver.
+        """
+        from sfepy.base.base import structify
+        from sfepy.solvers.solvers import Solver
+
+        conf = get_default(conf, self.conf)
+
+        mtx = sps.csr_array(mtx)
+        dof_orders = self.get_dof_orders(mtx.shape[0], context=context)
+
+        max_order = dof_orders.max()
+        if conf.orders is None:
+            orders = []
+            order = max_order
+            while order > 1:
+                order = order // 2
+                orders.append(order)
+
+        else:
+            orders = sorted(set(order for order in conf.orders
+                                if order < max_order), reverse=True)
+
+        self.levels = []
+        sizes = [mtx.shape[0]]
+        for order in orders:
+            sub = nm.where(dof_orders <= order)[0]
+            level = Struct(mtx=mtx, sub=sub, order=max_order)
+            if conf.smoother == 'jacobi':
+                level.idiag = conf.omega / mtx.diagonal()
+
+            elif conf.smoother == 'gauss_seidel':
+                level.lower = sps.tril(mtx, format='csr')
+                level.upper = sps.triu(mtx, format='csr')
+
+            else:
+                raise ValueError('unknown smoother! (%s)' % conf.smoother)
+
+            self.levels.append(level)
+
+            mtx = mtx[sub][:, sub]
+            dof_orders = dof_orders[sub]
+            max_order = order
+            sizes.append(mtx.shape[0])
+
+        self.mtx_coarse = mtx
+
+        if self.coarse_ls is None:
+            coarse_conf = get_default(conf.coarse_solver,
+                                      {'kind' : 'ls.scipy_direct',
+                                       'use_presolve' : True,
+                                       'use_mtx_digest' : False})
+            self.coarse_ls = Solver.any_from_conf(structify(coarse_conf),
+                                                  context=self.context)
+
+        self.coarse_ls.clear()
+        self.coarse_ls.presolve(self.mtx_coarse)
+
+        output('%s: level orders: %s, sizes: %s'
+               % (conf.name, [level.order for level in self.levels]
+                  + [max_order], sizes), verbose=conf.verbose)
+
+    def _smooth(self, level, x, b, forward=True):
+        from scipy.sparse.linalg import spsolve_triangular
+
+        for ii in range(self.conf.n_smooth):
+            res = b - level.mtx @ x
+            if self.conf.smoother == 'jacobi':
+                x += level.idiag * res
+
+            elif forward:
+                x += spsolve_triangular(level.lower, res, lower=True)
+
+            else:
+                x += spsolve_triangular(level.upper, res, lower=False)
+
+        return x
+
+    def vcycle(self, rhs, il=0):
+        """
+        Apply the V-cycle starting at the level `il` to `rhs`.
+        """
+        if il == len(self.levels):
+            return self.coarse_ls(rhs, mtx=self.mtx_coarse)
+
+        level = self.levels[il]
+
+        sol = nm.zeros_like(rhs)
+        sol = self._smooth(level, sol, rhs, forward=True)
+
+        res = rhs - level.mtx @ sol
+        sol[level.sub] += self.vcycle(res[level.sub], il + 1)
+
+        sol = self._smooth(level, sol, rhs, forward=False)
+
+        return sol
+
+    @standard_call
+    def __call__(self, rhs, x0=None, conf=None, eps_a=None, eps_r=None,
+                 i_max=None, mtx=None, status=None, context=None, **kwargs):
+        import scipy.sparse.linalg as sla
+
+        eps_a = get_default(eps_a, self.conf.eps_a)
+        eps_r = get_default(eps_r, self.conf.eps_r)
+        i_max = get_default(i_max, self.conf.i_max)
+
+        is_new, mtx_digest = _is_new_matrix(mtx, self.mtx_digest,
+                                            force_reuse=conf.force_reuse)
+        if is_new or (self.levels is None):
+            self.setup_levels(mtx, conf=conf, context=context)
+            self.mtx_digest = mtx_digest
+
+        self.iter = 0
+        if conf.accel is None:
+            sol = nm.zeros_like(rhs) if x0 is None else x0.copy()
+            res = rhs - mtx @ sol
+            rnorm0 = nm.linalg.norm(res)
+            rnorm = rnorm0
+            info = 1
+            while self.iter < i_max:
+                if (rnorm < eps_a) or (rnorm < eps_r * rnorm0):
+                    info = 0
+                    break
+
+                sol += self.vcycle(res)
+                res = rhs - mtx @ sol
+                rnorm = nm.linalg.norm(res)
+                self.iter += 1
+                output('%s: iteration %d: |Ax-b| = %e'
+                       % (conf.name, self.iter, rnorm),
+                       verbose=conf.verbose > 1)
+
+            else:
+                if (rnorm < eps_a) or (rnorm < eps_r * rnorm0):
+                    info = 0
+
+        else:
+            def iter_callback(sol):
+                self.iter += 1
+
+            precond = sla.LinearOperator(mtx.shape, matvec=self.vcycle,
+                                         dtype=mtx.dtype)
+            solver = getattr(sla, conf.accel)
+            sol, info = solver(mtx, rhs, x0=x0, atol=eps_a, rtol=eps_r,
+                               maxiter=i_max, M=precond,
+                               callback=iter_callback)
+
+        output('%s: %s convergence: %s (%s, %d iterations)'
+               % (conf.name, conf.accel, info,
+                  self.converged_reasons[nm.sign(info)], self.iter),
+               verbose=conf.verbose)
+
+        return sol, self.iter
+
+    def clear(self):
+        self.levels = None
+        self.mtx_coarse = None
+        if self.coarse_ls is not None:
+            self.coarse_ls.clear()
+
+    def presolve(self, mtx):
+        self.setup_levels(mtx)
+        self.mtx_digest = (id(mtx), _get_cs_matrix_hash(mtx))
+
+class StaticCondensationSolver(LinearSolver):
+    """
+    Linear solver with static condensation of cell interior DOFs.
+
+    The cell interior (bubble) DOFs of fields, for example of hierarchical
+    or bubble-enriched fields, couple only with the DOFs of their cell, so
+    that the interior-interior part of the matrix is block diagonal with one
+    block per cell. The blocks are inverted at once for all cells, the
+    interior DOFs are eliminated and the condensed (Schur complement) system
+    of the remaining DOFs is solved by the linear solver given by `ls`. The
+    interior DOFs are then recovered cell by cell.
+
+    Only interior DOFs of variables defined in the same cells as the first
+    such variable are condensed. Cells with some interior DOFs constrained by
+    EBCs are not condensed.
+
+    The problem has to be passed to the solver as its context.
+    """
+    name = 'ls.static_condensation'
+
+    _parameters = [
+        ('ls', 'dict', None, False,
+         """The configuration of the linear solver of the condensed system.
+            By default, 'ls.scipy_direct' is used."""),
+        ('force_reuse', 'bool', False, False,
+         """If True, skip the check whether the condensed system corresponds
+            to the `mtx` argument: it is always reused."""),
+    ]
+
+    def __init__(self, conf, context=None, **kwargs):
+        LinearSolver.__init__(self, conf, context=context, cdata=None,
+                              ls=None, **kwargs)
+
+    def get_interior_blocks(self, n_dof, context=None):
+        """
+        Return the equation numbers of the cell interior DOFs as an array of
+        shape `(n_cell, n_ic)`.
+        """
+        problem = get_default(context, self.context)
+        if problem is None:
+            raise ValueError('%s requires the problem as the context!'
+                             % self.name)
+
+        variables = problem.equations.variables
+        adi = variables.adi
+        if adi.n_dof_total != n_dof:
+            raise ValueError('matrix size does not match DOFs! (%d == %d)'
+                             % (n_dof, adi.n_dof_total))
+
+        cells = None
+        blocks = []
+        for var in variables.iter_state(ordered=True):
+            field = var.field
+            if field.get('bubble_dofs') is None:
+                continue
+
+            vcells = field.region.get_cells()
+            if cells is None:
+                cells = vcells
+
+            elif not nm.array_equal(cells, vcells):
+                continue
+
+            dpn = var.n_components
+            dofs = (dpn * field.bubble_dofs[..., None]
+                    + nm.arange(dpn, dtype=nm.int32))
+            dofs = dofs.reshape((dofs.shape[0], -1))
+            if problem.active_only:
+                dofs = var.eq_map.eq[dofs]
+
+            blocks.append(nm.where(dofs >= 0,
+                                   dofs + adi.indx[var.name].start, -1))
+
+        if not len(blocks):
+            return nm.zeros((0, 0), dtype=nm.int32)
+
+        blocks = nm.concatenate(blocks, axis=1)
+        blocks = blocks[nm.all(blocks >= 0, axis=1)]
+
+        return blocks
+
+    def condense(self, mtx, context=None):
+        """
+        Eliminate the cell interior DOFs from `mtx` and return the condensed
+        system data.
+        """
+        mtx = sps.csr_array(mtx)
+        n_dof = mtx.shape[0]
+
+        blocks = self.get_interior_blocks(n_dof, context=context)
+        n_cell, n_ic = blocks.shape
+
+        ii = blocks.ravel()
+        ib = nm.setdiff1d(nm.arange(n_dof, dtype=ii.dtype), ii)
+        if not len(ii):
+            output('%s: no DOFs to condense!' % self.conf.name)
+            return Struct(ii=ii, ib=ib, mtx_s=mtx,
+                          mtx_iii=sps.csr_array((0, 0), dtype=mtx.dtype),
+                          mtx_ib=sps.csr_array((0, n_dof), dtype=mtx.dtype),
+                          mtx_bi_iii=sps.csr_array((n_dof, 0),
+                                                   dtype=mtx.dtype))
+
+        mtx_ii = mtx[ii][:, ii].tocoo()
+        rb, cb = mtx_ii.row // n_ic, mtx_ii.col // n_ic
+        if nm.any(rb != cb):
+            raise ValueError('interior DOFs are coupled between cells!')
+
+        dmtx = nm.zeros((n_cell, n_ic, n_ic), dtype=mtx.dtype)
+        dmtx[rb, mtx_ii.row % n_ic, mtx_ii.col % n_ic] = mtx_ii.data
+        imtx = nm.linalg.inv(dmtx)
+
+        ir = nm.arange(n_cell * n_ic).reshape((n_cell, n_ic, 1))
+        rows = nm.broadcast_to(ir, imtx.shape).ravel()
+        cols = nm.broadcast_to(ir.transpose((0, 2, 1)), imtx.shape).ravel()
+        mtx_iii = sps.csr_array((imtx.ravel(), (rows, cols)),
+                                shape=(len(ii), len(ii)))
+
+        mtx_ib = mtx[ii][:, ib]
+        mtx_bi = mtx[ib][:, ii]
+        mtx_bi_iii = mtx_bi @ mtx_iii
+        mtx_s = mtx[ib][:, ib] - mtx_bi_iii @ mtx_ib
+
+        output('%s: %d DOFs condensed in %d cells, condensed size: %d'
+               % (self.conf.name, len(ii), n_cell, len(ib)),
+               verbose=self.conf.verbose)
+
+        return Struct(ii=ii, ib=ib, mtx_s=sps.csr_array(mtx_s),
+                      mtx_iii=mtx_iii, mtx_ib=mtx_ib, mtx_bi_iii=mtx_bi_iii)
+
+    @standard_call
+    def __call__(self, rhs, x0=None, conf=None, eps_a=None, eps_r=None,
+                 i_max=None, mtx=None, status=None, context=None, **kwargs):
+        from sfepy.base.base import structify
+        from sfepy.solvers.solvers import Solver
+
+        is_new, mtx_digest = _is_new_matrix(mtx, self.mtx_digest,
+                                            force_reuse=conf.force_reuse)
+        if is_new or (self.cdata is None):
+            self.cdata = self.condense(mtx, context=context)
+            self.mtx_digest = mtx_digest
+
+        if self.ls is None:
+            ls_conf = get_default(conf.ls, {'kind' : 'ls.scipy_direct',
+                                            'use_presolve' : True})
+            self.ls = Solver.any_from_conf(structify(ls_conf),
+                                           context=self.context)
+
+        cd = self.cdata
+        rhs_i = rhs[cd.ii]
+        rhs_s = rhs[cd.ib] - cd.mtx_bi_iii @ rhs_i
+        x0_s = None if x0 is None else x0[cd.ib]
+
+        sol = nm.empty_like(rhs)
+        sol[cd.ib] = self.ls(rhs_s, x0=x0_s, eps_a=eps_a, eps_r=eps_r,
+                             i_max=i_max, mtx=cd.mtx_s)
+        sol[cd.ii] = cd.mtx_iii @ (rhs_i - cd.mtx_ib @ sol[cd.ib])
+
+        return sol
+
+    def clear(self):
+        self.cdata = None
+        if self.ls is not None:
+            self.ls.clear()
+
+    def presolve(self, mtx):
+        self.cdata = self.condense(mtx)
+        self.mtx_digest = (id(mtx), _get_cs_matrix_hash(sps.csr_array(mtx)))
+
+class AdditiveSchwarzSolver(LinearSolver):
+    """
+    Krylov solver with the overlapping additive Schwarz preconditioner.
+
+    The DOF graph given by the matrix sparsity pattern is partitioned into
+    `n_parts` subdomains, using metis, if available, see
+    :func:`partition_graph() <sfepy.linalg.sparse.partition_graph>`. The
+    subdomains are extended by `overlap` layers of neighbouring DOFs, and
+    their matrices are factorized and applied in parallel using a pool of
+    threads, so that the preconditioner scales on multicore machines
+    without MPI. With `restricted` set to True, the restricted additive
+    Schwarz (RAS) variant is used, where the subdomain corrections are
+    applied only to the DOFs owned by the subdomain.
+    """
+    name = 'ls.additive_schwarz'
+
+    _parameters = [
+        ('method', 'str', 'gmres', False,
+         """The scipy.sparse.linalg Krylov solver to use. Note that the RAS
+            preconditioner is not symmetric."""),
+        ('n_parts', 'int', None, False,
+         """The number of subdomains. If not given, the number of CPUs is
+            used."""),
+        ('overlap', 'int', 1, False,
+         'The number of DOF graph layers by which subdomains overlap.'),
+        ('restricted', 'bool', True, False,
+         'If True, use the restricted additive Schwarz variant.'),
+        ('n_workers', 'int', None, False,
+         """The number of worker threads. If not given, the number of
+            subdomains is used."""),
+        ('use_metis', 'bool', True, False,
+         'If True, try to use metis for partitioning the DOF graph.'),
+        ('i_max', 'int', 100, False,
+         'The maximum number of iterations.'),
+        ('eps_a', 'float', 1e-8, False,
+         'The absolute tolerance for the residual.'),
+        ('eps_r', 'float', 1e-8, False,
+         'The relative tolerance for the residual.'),
+        ('force_reuse', 'bool', False, False,
+         """If True, skip the check whether the subdomain factorizations
+            correspond to the `mtx` argument: they are always reused."""),
+    ]
+
+    def __init__(self, conf, context=None, **kwargs):
+        LinearSolver.__init__(self, conf, context=context, subs=None,
+                              pool=None, n_workers=None, **kwargs)
+        self.converged_reasons = {
+            0 : 'successful exit',
+            1 : 'number of iterations',
+            -1 : 'illegal input or breakdown',
+        }
+
+    def get_pool(self, n_workers):
+        from concurrent.futures import ThreadPoolExecutor
+
+        if (self.pool is None) or (self.n_workers != n_workers):
+            self.shutdown()
+            self.pool = ThreadPoolExecutor(max_workers=n_workers)
+            self.n_workers = n_workers
+
+        return self.pool
+
+    def setup_subdomains(self, mtx, conf=None):
+        """
+        Partition the DOF graph and factorize the subdomain matrices.
+        """
+        import os
+        from scipy.sparse.linalg import splu
+        from sfepy.linalg.sparse import get_graph_pattern, partition_graph
+
+        conf = get_default(conf, self.conf)
+        timer = Timer(start=True)
+
+        mtx = sps.csr_array(mtx)
+        n_parts = get_default(conf.n_parts, os.cpu_count())
+        n_parts = max(min(n_parts, mtx.shape[0]), 1)
+        parts = partition_graph(mtx, n_parts, use_metis=conf.use_metis,
+                                verbose=conf.verbose)
+        pattern = get_graph_pattern(mtx)
+
+        subs = []
+        for ip in range(n_parts):
+            owned = nm.where(parts == ip)[0]
+            dofs = owned
+            for ii in range(conf.overlap):
+                dofs = nm.union1d(dofs, pattern[dofs].indices)
+
+            sub = Struct(dofs=dofs, owned=owned,
+                         iowned=nm.searchsorted(dofs, owned),
+                         mtx=mtx[dofs][:, dofs].tocsc())
+            subs.append(sub)
+
+        pool = self.get_pool(get_default(conf.n_workers, n_parts))
+        lus = pool.map(lambda sub: splu(sub.mtx), subs)
+        for sub, lu in zip(subs, lus):
+            sub.lu = lu
+            sub.mtx = None
+
+        self.subs = subs
+
+        output('%s: %d subdomains, sizes: %d - %d, set up in %.2f [s]'
+               % (conf.name, n_parts, min(len(sub.dofs) for sub in subs),
+                  max(len(sub.dofs) for sub in subs), timer.stop()),
+               verbose=conf.verbose)
+
+    def apply_precond(self, res):
+        """
+        Apply the additive Schwarz preconditioner to the residual `res`.
+        """
+        restricted = self.conf.restricted
+        sols = self.pool.map(lambda sub: sub.lu.solve(res[sub.dofs]),
+                             self.subs)
+
+        out = nm.zeros_like(res)
+        for sub, sol in zip(self.subs, sols):
+            if restricted:
+                out[sub.owned] += sol[sub.iowned]
+
+            else:
+                out[sub.dofs] += sol
+
+        return out
+
+    @standard_call
+    def __call__(self, rhs, x0=None, conf=None, eps_a=None, eps_r=None,
+                 i_max=None, mtx=None, status=None, context=None, **kwargs):
+        import scipy.sparse.linalg as sla
+
+        eps_a = get_default(eps_a, self.conf.eps_a)
+        eps_r = get_default(eps_r, self.conf.eps_r)
+        i_max = get_default(i_max, self.conf.i_max)
+
+        is_new, mtx_digest = _is_new_matrix(mtx, self.mtx_digest,
+                                            force_reuse=conf.force_reuse)
+        if is_new or (self.subs is None):
+            self.setup_subdomains(mtx, conf=conf)
+            self.mtx_digest = mtx_digest
+
+        self.iter = 0
+        def iter_callback(sol):
+            self.iter += 1
+
+        precond = sla.LinearOperator(mtx.shape, matvec=self.apply_precond,
+                                     dtype=mtx.dtype)
+        solver = getattr(sla, conf.method)
+        sol, info = solver(mtx, rhs, x0=x0, atol=eps_a, rtol=eps_r,
+                           maxiter=i_max, M=precond, callback=iter_callback)
+
+        output('%s: %s convergence: %s (%s, %d iterations)'
+               % (conf.name, conf.method, info,
+                  self.converged_reasons[nm.sign(info)], self.iter),
+               verbose=conf.verbose)
+
+        return sol, self.iter
+
+    def clear(self):
+        self.subs = None
+
+    def presolve(self, mtx):
+        self.setup_subdomains(mtx)
+        self.mtx_digest = (id(mtx), _get_cs_matrix_hash(sps.csr_array(mtx)))
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __del__(self):
+        self.shutdown()
@@ -470,12 +470,36 @@ class Newton(NonlinearSolver):
             solve."""),
         ('is_linear', 'bool', False, False,
          'If True, the problem is considered to be linear.'),
+        ('jacobian_reuse', "None, 'contraction' or 'broyden'", None, False,
+         """The built-in Jacobian reuse policy, overriding
+            `is_new_jacobian_fun`. With 'contraction', the Jacobian (tangent)
+            matrix is reused (the modified Newton method) as long as the
+            residual contraction rate :math:`||f(x^i)|| / ||f(x^{i-1})||` is
+            below `reuse_rate`. With 'broyden', the reused Jacobian is
+            additionally corrected by the Broyden rank-one updates applied on
+            top of the linear system solution. In both cases, the Jacobian is
+            re-evaluated when the line-search reduces the step or fails, or
+            after `reuse_max` iterations. The factorizations are reused only
+            by linear solvers that pre-factorize the matrix, e.g.
+            ``ls.scipy_direct`` with ``use_presolve=True``."""),
+        ('reuse_rate', '0.0 < float < 1.0', 0.5, False,
+         """The maximum residual contraction rate allowing the Jacobian
+            reuse."""),
+        ('reuse_max', 'int', 20, False,
+         """The maximum number of consecutive iterations with a reused
+            Jacobian, including the iterations of previous solver calls."""),
+        ('keep_jacobian', 'bool', True, False,
+         """If True and `jacobian_reuse` is set, the Jacobian from the
+            previous solver call (e.g. time step) is used in the first
+            iteration."""),
     ]
 
     def __init__(self, conf, **kwargs):
         NonlinearSolver.__init__(self, conf, **kwargs)
 
         conf = self.conf
+        self.mtx_last = None
+        self.n_reused = 0
 
         log = get_logging_conf(conf)
         conf.log = log = Struct(name='log_conf', **log)
@@ -559,6 +583,39 @@ class Newton(NonlinearSolver):
 
         return vec_dx
 
+    def _is_new_jacobian(self, mtx_a, it, err, err_last, vec_x, vec_x_last,
+                         vec_dx, ok, conf):
+        """
+        The built-in Jacobian reuse policy, see `jacobian_reuse`.
+        """
+        if (mtx_a is None) or (not ok) or (self.n_reused >= conf.reuse_max):
+            return True
+
+        if it == 0:
+            return False
+
+        if err > conf.reuse_rate * err_last:
+            return True
+
+        # Line-search step reduction.
+        norm_dx = nla.norm(vec_dx)
+        if norm_dx > 0.0:
+            red = nla.norm(vec_x_last - vec_x) / norm_dx
+            if red < 1.0 - 1e-8:
+                return True
+
+        return False
+
+    def _apply_broyden(self, vec, updates):
+        """
+        Apply the Broyden updates of the inverse Jacobian to `vec`, the
+        linear system solution with the reused Jacobian.
+        """
+        for vec_s, vec_a in updates:
+            vec = vec + vec_a * nm.dot(vec_s, vec)
+
+        return vec
+
     @standard_nls_call
     def __call__(self, vec_x0, conf=None, fun=None, fun_grad=None,
                  lin_solver=None, iter_hook=None, status=None):
@@ -614,6 +671,18 @@ class Newton(NonlinearSolver):
         vec_dx = 0.0
         mtx_a = None
 
+        reuse = conf.jacobian_reuse
+        if reuse not in (None, 'contraction', 'broyden'):
+            raise ValueError('unknown Jacobian reuse policy! (%s)' % reuse)
+
+        if (reuse is not None) and conf.keep_jacobian:
+            if ((self.mtx_last is not None)
+                and (self.mtx_last.shape == (len(vec_x), len(vec_x)))):
+                mtx_a = self.mtx_last
+
+        updates = []
+        n_mtx = n_lin_solve = 0
+
         if (self.log is not None) and ('solve' in conf.log_vlines):
             self.log.plot_vlines(color='r', linewidth=1.0)
 
@@ -652,17 +721,48 @@ class Newton(NonlinearSolver):
 
             timers.matrix.start()
             if not conf.is_linear:
-                if (is_new_jacobian(it, it_jac, vec_r, vec_r_last, vec_x,
-                                    vec_x_last, context=self.context)
-                    or (mtx_a is None)):
+                if reuse is None:
+                    is_new = (is_new_jacobian(it, it_jac, vec_r, vec_r_last,
+                                              vec_x, vec_x_last,
+                                              context=self.context)
+                              or (mtx_a is None))
+
+                else:
+                    is_new = self._is_new_jacobian(mtx_a, it, err, err_last,
+                                                   vec_x, vec_x_last, vec_dx,
+                                                   ok, conf)
+
+                if is_new:
                     mtx_a = fun_grad(vec_x)
                     it_jac = it
+                    n_mtx += 1
+                    self.n_reused = 0
+                    updates = []
+
+                else:
+                    self.n_reused += 1
 
             else:
                 mtx_a = fun_grad('linear')
+                is_new = True
 
             timers.matrix.stop()
 
+            if (reuse == 'broyden') and (not is_new) and (it > 0):
+                # Good Broyden update of the inverse Jacobian H:
+                # H+ = H + (s - H y) s^T H / (s^T H y).
+                vec_s = vec_x - vec_x_last
+                vec_hy = self._apply_lin_solver(
+                    vec_r - vec_r_last, mtx_a, vec_x, lin_solver, ls_status,
+                    err, conf, timers,
+                )
+                vec_hy = self._apply_broyden(vec_hy, updates)
+                n_lin_solve += 1
+
+                denom = nm.dot(vec_s, vec_hy)
+                if abs(denom) > conf.macheps * nla.norm(vec_s)**2:
+                    updates.append((vec_s, (vec_s - vec_hy) / denom))
+
             if conf.check:
                 timers.check.start()
                 wt = check_tangent_matrix(conf, vec_x, fun, fun_grad)
@@ -673,6 +773,9 @@ class Newton(NonlinearSolver):
                 vec_r, mtx_a, vec_x, lin_solver, ls_status, err, conf, timers,
             )
             ls_n_iter += ls_status['n_iter']
+            n_lin_solve += 1
+            if len(updates):
+                vec_dx = self._apply_broyden(vec_dx, updates)
 
             for key, val in timers.get_dts().items():
                 output('%10s: %7.2f [s]' % (key, val))
@@ -692,10 +795,16 @@ class Newton(NonlinearSolver):
             status['err'] = err
             status['n_iter'] = it
             status['ls_n_iter'] = ls_n_iter
+            status['n_mtx'] = n_mtx
+            status['n_lin_solve'] = n_lin_solve
             status['condition'] = condition
 
+        if reuse is not None:
+            self.mtx_last = mtx_a
+
         if conf.report_status:
             output(f'cond: {condition}, iter: {it}, ls_iter: {ls_n_iter},'
+                   f' n_mtx: {n_mtx}, n_lin_solve: {n_lin_solve},'
                    f' err0: {err0:.8e}, err: {err:.8e}')
             for key, val in time_stats.items():
                 output('%8s: %.8f [s]' % (key, val))
@@ -707,6 +816,578 @@ class Newton(NonlinearSolver):
 
         return vec_x
 
+class JFNK(NonlinearSolver):
+    r"""
+    Solves a nonlinear system :math:`f(x) = 0` using the Jacobian-free
+    Newton-Krylov method.
+
+    The action of the Jacobian (tangent) matrix :math:`J` on a vector
+    :math:`v` is approximated by the finite difference of residuals
+    :math:`J v \approx (f(x + h v) - f(x)) / h`, so that the tangent matrix is
+    not assembled, unless required by the preconditioner. The linear system in
+    each iteration is solved by a Krylov solver from ``scipy.sparse.linalg``
+    with a tolerance given by the forcing term :math:`\eta`. The solver uses
+    a backtracking line-search on the residual norm.
+
+    The optional preconditioner is based on the tangent matrix assembled
+    using `fun_grad` only occasionally, see `precond_update`: either the
+    frozen tangent matrix is solved by `precond_ls`, or only its diagonal is
+    kept.
+    """
+    name = 'nls.jfnk'
+
+    _parameters = [
+        ('i_max', 'int', 10, False,
+         'The maximum number of iterations.'),
+        ('eps_a', 'float', 1e-10, False,
+         'The absolute tolerance for the residual, i.e. :math:`||f(x^i)||`.'),
+        ('eps_r', 'float', 1.0, False,
+         """The relative tolerance for the residual, i.e. :math:`||f(x^i)|| /
+            ||f(x^0)||`."""),
+        ('eps_mode', "'and' or 'or'", 'and', False,
+         """The logical operator to use for combining the absolute and relative
+            tolerances."""),
+        ('macheps', 'float', nm.finfo(nm.float64).eps, False,
+         'The float considered to be machine "zero".'),
+        ('method', "'gmres', 'lgmres', 'gcrotmk' or 'bicgstab'", 'gmres',
+         False, 'The Krylov solver from ``scipy.sparse.linalg``.'),
+        ('lin_i_max', 'int', 100, False,
+         'The maximum number of Krylov solver iterations.'),
+        ('restart', 'int', 30, False,
+         """The number of iterations between restarts of the GMRES-like
+            methods."""),
+        ('eta_max', 'float', 0.1, False,
+         r"""The maximum (and initial) forcing term :math:`\eta`, i.e. the
+            relative tolerance of the Krylov solver."""),
+        ('eta_mode', "'constant' or 'ew'", 'ew', False,
+         r"""If 'ew', the forcing term is adapted using the Eisenstat-Walker
+            choice 2: :math:`\eta^i = \min(\eta_{max}, 0.9 (||f(x^i)|| /
+            ||f(x^{i-1})||)^2)`, otherwise it is equal to `eta_max`."""),
+        ('fd_delta', 'float or None', None, False,
+         r"""The finite difference step :math:`h`. If None, :math:`h =
+            \sqrt{\epsilon} (1 + ||x||) / ||v||` is used, where
+            :math:`\epsilon` is `macheps`."""),
+        ('precond', "None, 'diagonal' or 'tangent'", 'tangent', False,
+         """The preconditioner: None, the inverse diagonal of the tangent
+            matrix, or the tangent matrix solved by `precond_ls`."""),
+        ('precond_update', 'int', 0, False,
+         """If > 0, the preconditioner is updated every `precond_update`
+            iterations. Otherwise, it is updated only in the first iteration
+            of each solver call, see also `keep_precond`."""),
+        ('keep_precond', 'bool', False, False,
+         """If True, reuse the preconditioner from the previous solver call
+            (e.g. time step) instead of updating it in the first
+            iteration."""),
+        ('precond_ls', 'dict', None, False,
+         """The linear solver configuration for the 'tangent' preconditioner.
+            By default, the LU factorization of ``ls.scipy_direct`` is used.
+            If `precond_ls` is 'lin_solver', the linear solver passed to the
+            nonlinear solver is used."""),
+        ('ls_red', '0.0 < float < 1.0', 0.5, False,
+         'The step reduction factor of the line-search.'),
+        ('ls_red_warp', '0.0 < float < 1.0', 0.1, False,
+         """The step reduction factor in case of failed residual assembling
+            (e.g. the "warp violation" error caused by a negative volume
+            element resulting from too large deformations)."""),
+        ('ls_min', '0.0 < float < 1.0', 1e-5, False,
+         'The minimum step reduction factor.'),
+    ]
+
+    def __init__(self, conf, **kwargs):
+        import scipy.sparse.linalg as sla
+
+        NonlinearSolver.__init__(self, conf, sla=sla, **kwargs)
+
+        self.precond_ls = None
+        self.mtx_p = None
+        self.diag_p = None
+
+    def update_precond(self, vec_x, fun_grad, lin_solver):
+        """
+        Assemble the tangent matrix in `vec_x` and update the preconditioner.
+        """
+        from sfepy.base.base import structify
+        from sfepy.solvers import Solver
+
+        conf = self.conf
+        mtx = fun_grad(vec_x)
+        if conf.precond == 'diagonal':
+            diag = mtx.diagonal().copy()
+            diag[nm.abs(diag) < conf.macheps] = 1.0
+            self.diag_p = 1.0 / diag
+
+        elif conf.precond == 'tangent':
+            if conf.precond_ls == 'lin_solver':
+                self.precond_ls = lin_solver
+
+            elif self.precond_ls is None:
+                ls_conf = get_default(conf.precond_ls,
+                                      {'kind' : 'ls.scipy_direct',
+                                       'use_presolve' : True,
+                                       'use_mtx_digest' : False})
+                self.precond_ls = Solver.any_from_conf(structify(ls_conf),
+                                                       context=self.context)
+
+            self.mtx_p = mtx.copy()
+            self.precond_ls.clear()
+            self.precond_ls.presolve(self.mtx_p)
+
+        else:
+            raise ValueError('unknown preconditioner! (%s)' % conf.precond)
+
+    def get_precond(self, n_dof):
+        """
+        Return the current preconditioner as a `LinearOperator`.
+        """
+        conf = self.conf
+        if conf.precond == 'diagonal':
+            diag = self.diag_p
+            matvec = lambda vec: diag * vec
+
+        else:
+            precond_ls, mtx_p = self.precond_ls, self.mtx_p
+            matvec = lambda vec: precond_ls(vec, mtx=mtx_p)
+
+        return self.sla.LinearOperator((n_dof, n_dof), matvec=matvec,
+                                       dtype=nm.float64)
+
+    @standard_nls_call
+    def __call__(self, vec_x0, conf=None, fun=None, fun_grad=None,
+                 lin_solver=None, iter_hook=None, status=None):
+        """
+        Nonlinear system solver call.
+
+        Solves a nonlinear system :math:`f(x) = 0` using the Jacobian-free
+        Newton-Krylov method, starting with an initial guess :math:`x^0`.
+
+        Parameters
+        ----------
+        vec_x0 : array
+            The initial guess vector :math:`x_0`.
+        conf : Struct instance, optional
+            The solver configuration parameters,
+        fun : function, optional
+            The function :math:`f(x)` whose zero is sought - the residual.
+        fun_grad : function, optional
+            The gradient of :math:`f(x)` - the tangent matrix. Used only by
+            the preconditioner.
+        lin_solver : LinearSolver instance, optional
+            The linear solver, used only with `precond_ls` equal to
+            'lin_solver'.
+        iter_hook : function, optional
+            User-supplied function to call before each iteration.
+        status : dict-like, optional
+            The user-supplied object to hold convergence statistics.
+        """
+        conf = get_default(conf, self.conf)
+        fun = get_default(fun, self.fun)
+        fun_grad = get_default(fun_grad, self.fun_grad)
+        lin_solver = get_default(lin_solver, self.lin_solver)
+        iter_hook = get_default(iter_hook, self.iter_hook)
+        status = get_default(status, self.status)
+
+        krylov = getattr(self.sla, conf.method)
+        kwargs = {}
+        if conf.method == 'gmres':
+            kwargs['restart'] = conf.restart
+
+        elif conf.method in ('lgmres', 'gcrotmk'):
+            kwargs['inner_m'] = conf.restart
+
+        timers = Timers(['residual', 'matrix', 'solve'])
+
+        n_fev = [0]
+        def eval_residual(vec):
+            timers.residual.start()
+            try:
+                vec_r = fun(vec)
+
+            finally:
+                timers.residual.stop()
+                n_fev[0] += 1
+
+            return vec_r
+
+        vec_x = vec_x0.copy()
+        vec_r = eval_residual(vec_x)
+        n_dof = vec_x.shape[0]
+
+        err = err0 = err_last = nla.norm(vec_r)
+        eta = conf.eta_max
+        it = it_p = 0
+        n_precond = lin_n_iter = 0
+        while 1:
+            if iter_hook is not None:
+                iter_hook(self.context, self, vec_x, it, err, err0)
+
+            condition = conv_test(conf, it, err, err0)
+            if condition >= 0:
+                break
+
+            if conf.eta_mode == 'ew' and it > 0:
+                eta = min(conf.eta_max, 0.9 * (err / err_last)**2)
+
+            precond = None
+            if conf.precond is not None:
+                is_new = ((it == 0) and not conf.keep_precond)
+                is_new = is_new or ((self.mtx_p is None)
+                                    and (self.diag_p is None))
+                if conf.precond_update > 0:
+                    is_new = is_new or ((it - it_p) >= conf.precond_update)
+
+                if is_new:
+                    timers.matrix.start()
+                    self.update_precond(vec_x, fun_grad, lin_solver)
+                    timers.matrix.stop()
+                    it_p = it
+                    n_precond += 1
+
+                precond = self.get_precond(n_dof)
+
+            norm_x = nla.norm(vec_x)
+            def matvec(vec):
+                norm_v = nla.norm(vec)
+                if norm_v == 0.0:
+                    return nm.zeros_like(vec)
+
+                if conf.fd_delta is None:
+                    delta = nm.sqrt(conf.macheps) * (1.0 + norm_x) / norm_v
+
+                else:
+                    delta = conf.fd_delta
+
+                return (eval_residual(vec_x + delta * vec) - vec_r) / delta
+
+            mtx_j = self.sla.LinearOperator((n_dof, n_dof), matvec=matvec,
+                                            dtype=nm.float64)
+
+            n_iter = [0]
+            def callback(*args):
+                n_iter[0] += 1
+
+            timers.solve.start()
+            vec_dx, info = krylov(mtx_j, vec_r, rtol=eta, atol=0.0,
+                                  maxiter=conf.lin_i_max, M=precond,
+                                  callback=callback, **kwargs)
+            timers.solve.stop()
+            lin_n_iter += n_iter[0]
+
+            if info != 0:
+                output('warning: %s not converged! (info: %d, eta: %.2e)'
+                       % (conf.method, info, eta))
+
+            red = 1.0
+            trial = None
+            while 1:
+                vec_x1 = vec_x - red * vec_dx
+                try:
+                    vec_r1 = eval_residual(vec_x1)
+
+                except ValueError:
+                    red *= conf.ls_red_warp
+                    output('warp: reducing step (%f)' % red)
+
+                else:
+                    err1 = nla.norm(vec_r1)
+                    trial = (vec_x1, vec_r1, err1)
+                    if err1 < err:
+                        break
+
+                    red *= conf.ls_red
+                    output('linesearch: iter %d, (%.5e < %.5e) (new ls: %e)'
+                           % (it, err, err1, red))
+
+                if red < conf.ls_min:
+                    if trial is None:
+                        raise ValueError('cannot evaluate residual!')
+
+                    output('linesearch failed, continuing anyway')
+                    break
+
+            for key, val in timers.get_dts().items():
+                output('%10s: %7.2f [s]' % (key, val))
+
+            err_last = err
+            vec_x, vec_r, err = trial
+            it += 1
+
+        time_stats = timers.get_totals()
+        if status is not None:
+            status['time_stats'] = time_stats
+            status['err0'] = err0
+            status['err'] = err
+            status['n_iter'] = it
+            status['ls_n_iter'] = lin_n_iter
+            status['n_fev'] = n_fev[0]
+            status['n_precond'] = n_precond
+            status['condition'] = condition
+
+        if conf.report_status:
+            output(f'cond: {condition}, iter: {it}, ls_iter: {lin_n_iter},'
+                   f' n_fev: {n_fev[0]}, n_precond: {n_precond},'
+                   f' err0: {err0:.8e}, err: {err:.8e}')
+            for key, val in time_stats.items():
+                output('%8s: %.8f [s]' % (key, val))
+            output('     sum: %.8f [s]' % sum(time_stats.values()))
+
+        return vec_x
+
+class AndersonFixedPoint(NonlinearSolver):
+    r"""
+    Solves a nonlinear system using the Anderson-accelerated fixed-point
+    iteration :math:`x = G(x)`.
+
+    The next iterate is the combination of the last `depth` + 1 map values
+    :math:`G(x^j)` minimizing the linearized fixed-point residual
+    :math:`G(x) - x` in the least squares sense, see [1]_. The fixed-point map
+    is, in this order of precedence:
+
+    - the user-defined function `fixed_point_fun`;
+    - a call of the inner nonlinear solver `nls`, for example the Oseen
+      solver with ``'i_max' : 1``, i.e. :math:`G(x)` is the solution of the
+      linearized problem;
+    - the modified Newton step :math:`G(x) = x - M^{-1} f(x)` with the
+      tangent matrix :math:`M` updated only every `mtx_update` iterations.
+
+    The convergence is tested on :math:`||f(x)||` for the modified Newton step
+    and on :math:`||G(x) - x||` otherwise.
+
+    .. [1] H. F. Walker, P. Ni, Anderson acceleration for fixed-point
+           iterations, SIAM J. Numer. Anal. 49, 1715 (2011).
+    """
+    name = 'nls.anderson'
+
+    _parameters = [
+        ('i_max', 'int', 50, False,
+         'The maximum number of iterations.'),
+        ('eps_a', 'float', 1e-10, False,
+         'The absolute tolerance for the residual.'),
+        ('eps_r', 'float', 1.0, False,
+         'The relative tolerance for the residual.'),
+        ('eps_mode', "'and' or 'or'", 'and', False,
+         """The logical operator to use for combining the absolute and relative
+            tolerances."""),
+        ('macheps', 'float', nm.finfo(nm.float64).eps, False,
+         'The float considered to be machine "zero".'),
+        ('depth', 'int', 5, False,
+         """The number of previous iterations used in the acceleration. Zero
+            means the plain (damped) fixed-point iteration."""),
+        ('beta', '0.0 < float <= 1.0', 1.0, False,
+         'The mixing (damping) parameter.'),
+        ('max_cond', 'float', 1e10, False,
+         """The maximum condition number of the least squares problem - the
+            oldest iterations are dropped until it is satisfied."""),
+        ('safeguard', 'float', 2.0, False,
+         """If the residual of an accelerated iterate grows more than
+            `safeguard` times, the iterate is replaced by the plain
+            fixed-point step and the acceleration is restarted."""),
+        ('fixed_point_fun', 'function(x, context)', None, False,
+         'The user-defined fixed-point map :math:`G(x)`.'),
+        ('nls', 'dict', None, False,
+         """The configuration of the inner nonlinear solver, whose single call
+            is the fixed-point map. Its tolerances should be tighter than
+            those of this solver, so that each call updates the
+            solution."""),
+        ('mtx_update', 'int', 0, False,
+         """For the modified Newton step map: if > 0, the tangent matrix is
+            updated every `mtx_update` iterations. Otherwise, it is evaluated
+            only in the first iteration."""),
+        ('ls_red_warp', '0.0 < float < 1.0', 0.1, False,
+         """The reduction factor of the plain fixed-point step in case of
+            failed map evaluation (e.g. the "warp violation" error caused by a
+            negative volume element resulting from too large
+            deformations)."""),
+        ('ls_min', '0.0 < float < 1.0', 1e-5, False,
+         'The minimum plain fixed-point step reduction factor.'),
+    ]
+
+    def __init__(self, conf, **kwargs):
+        NonlinearSolver.__init__(self, conf, **kwargs)
+
+        self.inner_nls = None
+
+    def get_inner_nls(self, fun, fun_grad, lin_solver):
+        """
+        Create the inner nonlinear solver, if not already created.
+        """
+        from sfepy.base.base import structify
+        from sfepy.solvers import Solver
+
+        if self.inner_nls is None:
+            self.inner_status = {}
+            self.inner_nls = Solver.any_from_conf(
+                structify(self.conf.nls), fun=fun, fun_grad=fun_grad,
+                lin_solver=lin_solver, context=self.context,
+                status=self.inner_status,
+            )
+
+        return self.inner_nls
+
+    @standard_nls_call
+    def __call__(self, vec_x0, conf=None, fun=None, fun_grad=None,
+                 lin_solver=None, iter_hook=None, status=None):
+        """
+        Nonlinear system solver call.
+
+        Parameters
+        ----------
+        vec_x0 : array
+            The initial guess vector :math:`x_0`.
+        conf : Struct instance, optional
+            The solver configuration parameters,
+        fun : function, optional
+            The function :math:`f(x)` whose zero is sought - the residual.
+        fun_grad : function, optional
+            The gradient of :math:`f(x)` - the tangent matrix.
+        lin_solver : LinearSolver instance, optional
+            The linear solver.
+        iter_hook : function, optional
+            User-supplied function to call before each iteration.
+        status : dict-like, optional
+            The user-supplied object to hold convergence statistics.
+        """
+        conf = get_default(conf, self.conf)
+        fun = get_default(fun, self.fun)
+        fun_grad = get_default(fun_grad, self.fun_grad)
+        lin_solver = get_default(lin_solver, self.lin_solver)
+        iter_hook = get_default(iter_hook, self.iter_hook)
+        status = get_default(status, self.status)
+
+        timers = Timers(['residual', 'matrix', 'solve'])
+
+        if conf.fixed_point_fun is not None:
+            def eval_map(vec_x, it):
+                timers.solve.start()
+                vec_g = conf.fixed_point_fun(vec_x, self.context)
+                timers.solve.stop()
+                return vec_g, nla.norm(vec_g - vec_x)
+
+        elif conf.nls is not None:
+            inner_nls = self.get_inner_nls(fun, fun_grad, lin_solver)
+            def eval_map(vec_x, it):
+                timers.solve.start()
+                vec_g = inner_nls(vec_x)
+                timers.solve.stop()
+                return vec_g, nla.norm(vec_g - vec_x)
+
+        else:
+            state = {'mtx' : None, 'it' : 0}
+            def eval_map(vec_x, it):
+                timers.residual.start()
+                vec_r = fun(vec_x)
+                timers.residual.stop()
+
+                is_new = ((state['mtx'] is None)
+                          or ((conf.mtx_update > 0)
+                              and (it - state['it'] >= conf.mtx_update)))
+                if is_new:
+                    timers.matrix.start()
+                    state['mtx'] = fun_grad(vec_x)
+                    state['it'] = it
+                    timers.matrix.stop()
+
+                timers.solve.start()
+                vec_dx = lin_solver(vec_r, mtx=state['mtx'])
+                timers.solve.stop()
+                return vec_x - vec_dx, nla.norm(vec_r)
+
+        vec_x = vec_x0.copy()
+        vec_g, err = eval_map(vec_x, 0)
+        vec_f = vec_g - vec_x
+        err0 = err
+
+        dfs, dgs = [], []
+        n_fev = 1
+        n_restart = 0
+        it = 0
+        while 1:
+            if iter_hook is not None:
+                iter_hook(self.context, self, vec_x, it, err, err0)
+
+            condition = conv_test(conf, it, err, err0)
+            if condition >= 0:
+                break
+
+            vec_x1 = None
+            if len(dfs):
+                while 1:
+                    mtx_df = nm.column_stack(dfs)
+                    gamma, _, _, svals = nla.lstsq(mtx_df, vec_f, rcond=None)
+                    if ((len(dfs) > 1)
+                        and (svals[0] > conf.max_cond * svals[-1])):
+                        dfs.pop(0)
+                        dgs.pop(0)
+                        continue
+
+                    break
+
+                vec_x1 = (vec_g - nm.column_stack(dgs) @ gamma
+                          - (1.0 - conf.beta) * (vec_f - mtx_df @ gamma))
+                try:
+                    vec_g1, err1 = eval_map(vec_x1, it + 1)
+
+                except ValueError:
+                    vec_x1 = None
+
+                else:
+                    if err1 > conf.safeguard * err:
+                        vec_x1 = None
+
+                n_fev += 1
+                if vec_x1 is None:
+                    output('anderson: iter %d, restarting' % it)
+                    n_restart += 1
+                    dfs, dgs = [], []
+
+            red = conf.beta
+            while vec_x1 is None:
+                vec_x1 = vec_x + red * vec_f
+                try:
+                    vec_g1, err1 = eval_map(vec_x1, it + 1)
+
+                except ValueError:
+                    red *= conf.ls_red_warp
+                    if red < conf.ls_min:
+                        output('giving up!')
+                        raise
+
+                    output('residual computation failed for iter %d'
+                           ' (new step: %e)!' % (it, red))
+                    vec_x1 = None
+
+                n_fev += 1
+
+            vec_f1 = vec_g1 - vec_x1
+            if conf.depth > 0:
+                dfs.append(vec_f1 - vec_f)
+                dgs.append(vec_g1 - vec_g)
+                if len(dfs) > conf.depth:
+                    dfs.pop(0)
+                    dgs.pop(0)
+
+            vec_x, vec_g, vec_f, err = vec_x1, vec_g1, vec_f1, err1
+            it += 1
+
+        time_stats = timers.get_totals()
+        if status is not None:
+            status['time_stats'] = time_stats
+            status['err0'] = err0
+            status['err'] = err
+            status['n_iter'] = it
+            status['n_fev'] = n_fev
+            status['n_restart'] = n_restart
+            status['condition'] = condition
+
+        if conf.report_status:
+            output(f'cond: {condition}, iter: {it}, n_fev: {n_fev},'
+                   f' n_restart: {n_restart}, err0: {err0:.8e},'
+                   f' err: {err:.8e}')
+            for key, val in time_stats.items():
+                output('%8s: %.8f [s]' % (key, val))
+            output('     sum: %.8f [s]' % sum(time_stats.values()))
+
+        return vec_x
+
 class ScipyRoot(NonlinearSolver):
     """
     Interface to ``scipy.optimize.root()``.
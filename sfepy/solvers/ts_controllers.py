@@ -85,8 +85,45 @@ class ElastodynamicsBasicTSC(TimeStepController):
          'The order of the solver error estimate.'),
         ('guess_dt0', 'bool', False, False,
          'Guess a good initial step size from initial conditions.'),
+        ('dt_ladder', 'float > 1', None, False,
+         """If given, the new step sizes are rounded to the geometric
+            sequence :math:`\\Delta t_0 q^k`, :math:`k \\in \\mathbb{Z}`, where
+            :math:`\\Delta t_0` is the initial step size and :math:`q` is the
+            `dt_ladder` value. The step sizes are rounded to the nearest
+            member of the sequence after accepted steps and down after
+            rejected steps. The limited set of step sizes allows reusing
+            the cached effective matrices of linear problems, see the
+            `matrix_cache_size` option of the elastodynamics solvers."""),
     ]
 
+    def __init__(self, conf, **kwargs):
+        TimeStepController.__init__(self, conf=conf, **kwargs)
+
+        if (self.conf.dt_ladder is not None) and (self.conf.dt_ladder <= 1.0):
+            raise ValueError(
+                f'dt_ladder must be > 1! (is {self.conf.dt_ladder})'
+            )
+        self.dt0 = None
+
+    def quantize_dt(self, new_dt, status):
+        """
+        Round `new_dt` to the geometric ladder of step sizes, if `dt_ladder`
+        is set. After a rejected step, `new_dt` is rounded down.
+        """
+        ratio = self.conf.dt_ladder
+        if (ratio is None) or (self.dt0 is None):
+            return new_dt
+
+        k = nm.log(new_dt / self.dt0) / nm.log(ratio)
+        if status.result == 'accept':
+            k = nm.round(k)
+
+        else:
+            # The tolerance ensures that steps on the ladder are kept.
+            k = nm.floor(k + 1e-8)
+
+        return self.dt0 * ratio**k
+
     @staticmethod
     def get_scaled_errors(dt, vec0, vec1, eps_as, eps_rs, unpack):
         u_eps_a, v_eps_a = eps_as
@@ -119,7 +156,8 @@ class ElastodynamicsBasicTSC(TimeStepController):
         """
         conf = self.conf
         if not conf.guess_dt0:
-            return ts.dt
+            self.dt0 = ts.dt
+            return self.dt0
 
         error_order = conf.error_order
         eps_a = min(*conf.eps_a)
@@ -138,6 +176,7 @@ class ElastodynamicsBasicTSC(TimeStepController):
               else (0.01 / md1d2) ** (1 / error_order))
 
         dt0 = min(100 * h0, h1)
+        self.dt0 = dt0
         return dt0
 
     def __call__(self, ts, vec0, vec1, unpack, **kwargs):
@@ -165,7 +204,7 @@ class ElastodynamicsBasicTSC(TimeStepController):
             new_dt = dt * max(fmin, fsafety / emax**(1.0 / error_order))
             status.result = 'reject'
 
-        return new_dt, status
+        return self.quantize_dt(new_dt, status), status
 
 class ElastodynamicsPIDTSC(ElastodynamicsBasicTSC):
     """
@@ -231,7 +270,7 @@ class ElastodynamicsPIDTSC(ElastodynamicsBasicTSC):
         self.emax00 = self.emax0
         self.emax0 = emax
 
-        return new_dt, status
+        return self.quantize_dt(new_dt, status), status
 
 class ElastodynamicsLinearTSC(ElastodynamicsBasicTSC):
     """
@@ -297,4 +336,4 @@ class ElastodynamicsLinearTSC(ElastodynamicsBasicTSC):
                 self.count += 1
                 new_dt = dt
 
-        return new_dt, status
+        return self.quantize_dt(new_dt, status), status
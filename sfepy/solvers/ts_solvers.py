@@ -3,6 +3,7 @@ Time stepping solvers.
 """
 from inspect import signature
 from functools import partial
+from collections import OrderedDict
 import os.path as osp
 import numpy as nm
 
@@ -572,6 +573,17 @@ class ElastodynamicsBaseTS(TimeSteppingSolver):
          """The mapping of variables with keys 'u', 'du', 'ddu' and 'extra',
             and values corresponding to the names of the actual variables.
             See `var_names` returned from :func:`transform_equations_ed()`"""),
+        ('matrix_cache_size', 'int', 0, False,
+         """If `is_linear` is True and this is > 0, keep up to the given
+            number of effective matrices together with their linear solver
+            instances (holding the matrix factorizations, if the linear
+            solver uses `use_presolve`) for previously used time steps. They
+            are reused when a time step controller returns to a cached time
+            step, see also the `dt_ladder` option of the elastodynamics time
+            step controllers."""),
+        ('dt_rtol', 'float', 1e-10, False,
+         """The relative tolerance for considering two time steps equal in
+            the effective matrix cache."""),
     ]
 
     def __init__(self, conf, nls=None, tsc=None, context=None, **kwargs):
@@ -597,6 +609,8 @@ class ElastodynamicsBaseTS(TimeSteppingSolver):
         self.verbose = self.conf.verbose
         self.constant_matrices = None
         self.matrix = None
+        self.matrix_cache = OrderedDict()
+        self.n_matrix_reuse = 0
 
     def get_matrices(self, nls, vec, unpack=None):
         if self.conf.is_linear and self.constant_matrices is not None:
@@ -693,6 +707,67 @@ class ElastodynamicsBaseTS(TimeSteppingSolver):
         if clear_constant_matrices:
             self.constant_matrices = None
 
+    def get_dt_key(self, dt):
+        """
+        Return the effective matrix cache key of the time step `dt`.
+        """
+        return int(nm.round(nm.log(dt) / nm.log1p(self.conf.dt_rtol)))
+
+    def get_cached_data(self, nls):
+        """
+        Return the time step dependent data stored in the effective matrix
+        cache.
+        """
+        return (self.matrix, nls.lin_solver)
+
+    def set_cached_data(self, nls, data):
+        """
+        Set the time step dependent data. If `data` is None, new (empty) data
+        are set.
+        """
+        if data is None:
+            lin_solver = nls.lin_solver.copy()
+            lin_solver.clear()
+            data = (None, lin_solver)
+
+        self.matrix, nls.lin_solver = data
+
+    def change_time_step(self, nls, dt, new_dt):
+        """
+        Update the time step dependent data on the time step change from `dt`
+        to `new_dt`.
+
+        If the effective matrix cache is used, the current data are stored
+        under `dt` and the data of `new_dt` are restored, if available.
+        Otherwise, the linear solver is cleared.
+        """
+        conf = self.conf
+        if not (conf.is_linear and (conf.matrix_cache_size > 0)):
+            self.clear_lin_solver(
+                clear_constant_matrices=conf.has_time_derivatives,
+            )
+            return
+
+        cache = self.matrix_cache
+        key = self.get_dt_key(dt)
+        cache[key] = self.get_cached_data(nls)
+        cache.move_to_end(key)
+        while len(cache) > conf.matrix_cache_size:
+            cache.popitem(last=False)
+
+        if conf.has_time_derivatives:
+            self.constant_matrices = None
+
+        new_key = self.get_dt_key(new_dt)
+        data = cache.get(new_key)
+        if data is not None:
+            cache.move_to_end(new_key)
+            self.n_matrix_reuse += 1
+            output('reusing cached effective matrix for dt:', new_dt,
+                   verbose=self.verbose)
+
+        self.set_cached_data(nls, data)
+
     @standard_ts_call
     def __call__(self, vec0=None, nls=None, init_fun=None, prestep_fun=None,
                  poststep_fun=None, status=None, **kwargs):
@@ -707,6 +782,10 @@ class ElastodynamicsBaseTS(TimeSteppingSolver):
         vec, unpack, pack = self.get_initial_vec(
             nls, vec0, init_fun, prestep_fun, poststep_fun)
 
+        self.matrix_cache.clear()
+        self.n_matrix_reuse = 0
+        ts_status = status
+
         ts = self.ts
         dt0 = self.tsc.get_initial_dt(ts, vec, unpack=unpack)
         if not isinstance(self.tsc, FixedTSC):
@@ -735,9 +814,7 @@ class ElastodynamicsBaseTS(TimeSteppingSolver):
                 output('dt:', ts.dt, 'new dt:', new_dt, 'status:', status,
                        verbose=self.verbose)
                 if new_dt != ts.dt:
-                    self.clear_lin_solver(
-                        clear_constant_matrices=self.conf.has_time_derivatives,
-                    )
+                    self.change_time_step(nls, ts.dt, new_dt)
 
                 if status.result == 'accept':
                     break
@@ -756,6 +833,9 @@ class ElastodynamicsBaseTS(TimeSteppingSolver):
 
             vec = vect
 
+        if ts_status is not None:
+            ts_status['n_matrix_reuse'] = self.n_matrix_reuse
+
         return vec
 
 class VelocityVerletTS(ElastodynamicsBaseTS):
@@ -942,6 +1022,147 @@ class CentralDifferenceTS(ElastodynamicsBaseTS):
 
         return vect
 
+class ExplicitLumpedTS(ElastodynamicsBaseTS):
+    r"""
+    Solve elastodynamics problems by the explicit central difference
+    (velocity-Verlet) method with a lumped (diagonal) mass matrix.
+
+    The lumped mass matrix :math:`M^L` is computed once from the mass matrix
+    block, so no linear solver is needed. In each time step, only the terms of
+    the internal force and damping equations are evaluated, once, with the
+    mid-step velocity :math:`v_{n+1/2} = v_n + \frac{\Delta t}{2} a_n`:
+
+    .. math::
+        u_{n+1} = u_n + \Delta t v_{n+1/2} \\
+        a_{n+1} = - (M^L)^{-1} (r_K(u_{n+1}) + r_C(v_{n+1/2})) \\
+        v_{n+1} = v_{n+1/2} + \frac{\Delta t}{2} a_{n+1}
+
+    For an undamped problem it is equivalent to :class:`CentralDifferenceTS`
+    with a diagonal mass matrix. The DOF vector updates are done in place
+    using two alternating preallocated vectors.
+
+    The mass matrix is assumed to be constant. The 'row_sum' lumping sums the
+    mass matrix rows, the 'hrz' lumping scales the mass matrix diagonal to
+    preserve the total mass. Element-wise HRZ lumping is available in
+    :class:`MassTerm <sfepy.terms.terms_mass.MassTerm>` - both modes then
+    return its diagonal.
+    """
+    name = 'ts.explicit_lumped'
+
+    _parameters = [
+        ('lumping', "'row_sum' or 'hrz'", 'row_sum', False,
+         'The mass matrix lumping mode.'),
+    ] + ElastodynamicsBaseTS._common_parameters
+
+    def __init__(self, conf, nls=None, tsc=None, context=None, **kwargs):
+        ElastodynamicsBaseTS.__init__(self, conf, nls=nls, tsc=tsc,
+                                      context=context, **kwargs)
+        self.lumped_mass = None
+        self.buffers = None
+
+    def get_lumped_mass(self, nls, vec, unpack):
+        """
+        Return the lumped mass matrix diagonal, computed in the first call.
+        """
+        if self.lumped_mass is not None:
+            return self.lumped_mass
+
+        iue, iu, ie, iv, ia = unpack.indices
+        M = self.get_matrices(nls, vec, unpack)[0][iu, iu]
+
+        if self.conf.lumping == 'row_sum':
+            ml = nm.asarray(M.sum(axis=1)).ravel()
+
+        elif self.conf.lumping == 'hrz':
+            diag = M.diagonal()
+            ml = diag * (M.sum() / diag.sum())
+
+        else:
+            raise ValueError('unknown lumping mode! (%s)' % self.conf.lumping)
+
+        if (ml <= 0.0).any():
+            raise ValueError('non-positive lumped mass matrix entries! (try'
+                             ' lumping="hrz")')
+
+        output_array_stats(ml, 'lumped mass', verbose=self.verbose)
+
+        self.lumped_mass = ml
+        self.inv_lumped_mass = 1.0 / ml
+        return ml
+
+    def select_term(self, term):
+        """
+        Select the internal force and damping terms, i.e. skip the inertia
+        terms and the dummy `dw_zero` terms.
+        """
+        if term.name == 'dw_zero':
+            return False
+
+        var = term.get_virtual_variable()
+        return (var is None) or (var.primary_var_name
+                                 != self.conf.var_names['ddu'])
+
+    def eval_force(self, nls, vec, unpack, out):
+        """
+        Evaluate the internal force and damping residual :math:`r_K(u) +
+        r_C(v)` in the state `vec` into `out`.
+        """
+        iue, iu, ie, iv, ia = unpack.indices
+
+        vec_r = nls.fun(vec, select_term=self.select_term)
+        nm.add(vec_r[iu], vec_r[iv], out=out)
+
+        return out
+
+    def get_initial_vec(self, nls, vec0, init_fun, prestep_fun, poststep_fun):
+        # The buffers could hold a vector returned by a previous call.
+        self.lumped_mass = None
+        self.buffers = None
+        return ElastodynamicsBaseTS.get_initial_vec(
+            self, nls, vec0, init_fun, prestep_fun, poststep_fun,
+        )
+
+    def get_a0(self, nls, u0, e0, v0, unpack):
+        vec = nm.r_[u0, e0, v0, nm.zeros_like(v0)]
+        self.get_lumped_mass(nls, vec, unpack)
+
+        a0 = self.eval_force(nls, vec, unpack, nm.empty_like(u0))
+        a0 *= -self.inv_lumped_mass
+        output_array_stats(a0, 'initial acceleration', verbose=self.verbose)
+        return a0
+
+    def step(self, ts, vec, nls, pack, unpack, **kwargs):
+        """
+        Solve a single time step.
+        """
+        dt = ts.dt
+        ml = self.get_lumped_mass(nls, vec, unpack)
+
+        if (self.buffers is None) or (self.buffers[0].shape != vec.shape):
+            self.buffers = (nm.empty_like(vec), nm.empty_like(vec))
+            self.work = nm.empty_like(ml)
+        # Write to the buffer not holding the previous step state.
+        vect = self.buffers[0] if vec is not self.buffers[0] else self.buffers[1]
+
+        ut, vt, at = unpack(vec)
+        utp, vtp, atp = unpack(vect)
+
+        # Mid-step velocity.
+        nm.multiply(at, 0.5 * dt, out=vtp)
+        vtp += vt
+        nm.multiply(vtp, dt, out=utp)
+        utp += ut
+        atp.fill(0.0)
+
+        self.eval_force(nls, vect, unpack, self.work)
+        nm.multiply(self.work, -1.0, out=atp)
+        atp *= self.inv_lumped_mass
+
+        nm.multiply(atp, 0.5 * dt, out=self.work)
+        vtp += self.work
+
+        return vect
+
 class NewmarkTS(ElastodynamicsBaseTS):
     r"""
     Solve elastodynamics problems by the Newmark method.
@@ -1305,6 +1526,15 @@ class BatheTS(ElastodynamicsBaseTS):
         self.ls1 = self.ls2 = None
         self.matrix1 = None
 
+    def get_cached_data(self, nls):
+        return (self.matrix, self.matrix1, self.ls1, self.ls2)
+
+    def set_cached_data(self, nls, data):
+        if data is None:
+            data = (None, None, None, None)
+
+        self.matrix, self.matrix1, self.ls1, self.ls2 = data
+
     def step(self, ts, vec, nls, pack, unpack, prestep_fun):
         """
         Solve a single time step.
@@ -57,5 +57,6 @@ class ETHTerm(Term):
 
         return out
 
-    def advance_eth_data(self, ts, data):
+    @staticmethod
+    def advance_eth_data(ts, data):
         data.history[:] = data.decay * (data.history + data.values)
@@ -352,6 +352,32 @@ def test_ed_solvers(problem, output_dir):
     assert ok
     assert nm.isclose(e0, 1.8e-4, atol=0, rtol=1e-12)
 
+def test_matrix_cache(problem, output_dir):
+    from sfepy.base.base import IndexedStruct
+
+    tsc_conf = problem.solver_confs['tscedb'].copy()
+    tsc_conf.dt_ladder = 2.0
+
+    vecs, n_steps, n_reuses = [], [], []
+    for size in [0, 4]:
+        tss_conf = problem.solver_confs['tsn'].copy()
+        tss_conf.matrix_cache_size = size
+
+        status = IndexedStruct()
+        problem.init_solvers(tsc_conf=tsc_conf, ts_conf=tss_conf,
+                             status=status, force=True)
+        vecs.append(problem.solve(status=status, save_results=False)().copy())
+        n_steps.append(status.n_step)
+        n_reuses.append(status.n_matrix_reuse)
+        tst.report('cache size: %d, time: %.2f [s], steps: %d, reused: %d'
+                   % (size, status.time, status.n_step, status.n_matrix_reuse))
+
+    problem.tsc_conf = None
+
+    assert n_steps[0] == n_steps[1]
+    assert (n_reuses[0] == 0) and (n_reuses[1] > 0)
+    assert nm.allclose(vecs[0], vecs[1], atol=1e-10, rtol=0)
+
 def test_rmm_solver(problem, output_dir):
     from sfepy.base.base import IndexedStruct
 
@@ -438,3 +464,47 @@ def test_active_only(output_dir):
     variables_t = pb.solve(save_results=False)
 
     assert nm.allclose(variables_f(), variables_t(), atol=1e-7, rtol=0)
+
+def test_explicit_lumped(output_dir):
+    """
+    With a diagonal mass matrix, the explicit lumped mass solver gives the
+    same results as the central difference solver.
+    """
+    import sys
+    from sfepy.base.base import IndexedStruct
+    from sfepy.discrete import Problem
+    from sfepy.base.conf import ProblemConf
+
+    define_dict = define(dims=(0.1, 0.02), shape=(11, 3), mass_beta=1.0)
+    define_dict['equations'] = {
+        'balance_of_forces' :
+        """de_mass.i.Omega(solid.rho, solid.lumping, solid.beta, ddv, ddu)
+         + dw_zero.i.Omega(dv, du)
+         + dw_lin_elastic.i.Omega(solid.D, v, u) = 0""",
+    }
+    define_dict['solvers']['tsel'] = ('ts.explicit_lumped', {
+        't0' : 0.0,
+        't1' : 15e-6,
+        'dt' : 1e-7,
+        'n_step' : None,
+        'var_names' : define_dict['var_names'],
+        'verbose' : 0,
+    })
+    conf = ProblemConf.from_dict(define_dict, sys.modules[__name__])
+
+    pb = Problem.from_conf(conf)
+    pb.tsc_conf = None
+
+    vecs = {}
+    for key in ['tscd', 'tsel']:
+        status = IndexedStruct()
+        pb.init_solvers(ts_conf=pb.solver_confs[key], status=status,
+                        force=True)
+        vecs[key] = pb.solve(status=status, save_results=False)().copy()
+        tst.report('%s: %d steps in %.2f [s]'
+                   % (key, status.n_step, status.time))
+
+    assert nm.isfinite(vecs['tsel']).all()
+    for ii in range(3):
+        vcd, vel = [nm.split(vecs[key], 3)[ii] for key in ['tscd', 'tsel']]
+        assert nm.linalg.norm(vcd - vel) < 1e-12 * nm.linalg.norm(vcd)
@@ -184,3 +184,174 @@ def test_eigenvalue_solvers(data):
                    % (row[1], row[0], row[2], row[3]))
 
     assert ok
+
+def test_factor_reuse(data):
+    import scipy.sparse as sps
+    from sfepy.base.base import Struct
+
+    n_dof = data.mtx.shape[0]
+    mtx_d = sps.diags(nm.linspace(0.0, 1.0, n_dof))
+    mtx_b = sps.identity(n_dof, format='csr')
+    ts = nm.linspace(0.0, 1e-3, 4)
+
+    confs = {
+        'eigsh' : Struct(name='evp', kind='eig.scipy', method='eigsh',
+                         which='LM', sigma=0.0, factor_reuse=1e-2,
+                         warm_start=True),
+        'eigsh-sm' : Struct(name='evp', kind='eig.scipy', method='eigsh',
+                            factor_reuse=1e-2),
+        'lobpcg' : Struct(name='evp', kind='eig.scipy_lobpcg', i_max=100,
+                          eps_a=1e-8, largest=False, factor_reuse=1e-2),
+    }
+    ok = True
+    for key, conf in confs.items():
+        eig_solver = Solver.any_from_conf(conf)
+        for it, t in enumerate(ts):
+            mtx_a = data.mtx + t * mtx_d
+            status = {}
+            eigs, vecs = eig_solver(mtx_a, mtx_b, n_eigs=5,
+                                    eigenvectors=True, status=status)
+            eigs0 = nm.linalg.eigvalsh(mtx_a.toarray())[:5]
+            _ok = nm.allclose(eigs, eigs0, rtol=0.0, atol=1e-8)
+            tst.report('%s t: %.1e ok: %s factorizations: %d reuses: %d'
+                       % (key, t, _ok, status['n_factor'],
+                          status['n_reuse']))
+            ok = ok and _ok
+
+        ok = ok and (status['n_reuse'] == len(ts) - 1)
+
+    assert ok
+
+    eig_solver = Solver.any_from_conf(Struct(name='evp', kind='eig.scipy',
+                                             method='eigsh', which='LR',
+                                             factor_reuse=1e-2))
+    with pytest.raises(ValueError):
+        eig_solver(data.mtx, mtx_b, n_eigs=5)
+
+def test_eig_batch(data, output_dir):
+    import os.path as op
+    import scipy.sparse as sps
+    from sfepy.base.ioutils import read_dict_hdf5
+    from sfepy.solvers.eigen import eig, eig_batch
+
+    n_dof = data.mtx.shape[0]
+    mtx_d = sps.diags(nm.linspace(0.0, 1.0, n_dof))
+    mtx_b = sps.identity(n_dof, format='csr')
+    ts = nm.linspace(0.0, 1e-1, 5)
+    coefs = nm.c_[nm.ones_like(ts), ts**2]
+
+    filename = op.join(output_dir, 'eig_batch.h5')
+    eigs, vecs = eig_batch([(data.mtx, mtx_d), mtx_b], [coefs, None],
+                           n_eigs=5, eigenvectors=True, chunk_size=2,
+                           filename=filename)
+    assert eigs.shape == (len(ts), 5)
+    assert vecs.shape == (len(ts), n_dof, 5)
+
+    ok = True
+    for it, t in enumerate(ts):
+        eigs0 = eig(data.mtx + t**2 * mtx_d, mtx_b, n_eigs=5,
+                    eigenvectors=False, solver_kind='eig.sgscipy')
+        _ok = nm.allclose(eigs[it], eigs0, rtol=0.0, atol=1e-12)
+        tst.report('t: %.2e ok: %s' % (t, _ok))
+        ok = ok and _ok
+
+    out = read_dict_hdf5(filename)
+    ok = ok and nm.array_equal(out['eigs'], eigs)
+    ok = ok and nm.array_equal(out['coefs']['0'], coefs)
+
+    assert ok
+
+def test_matrix_combination():
+    import scipy.sparse as sps
+    from sfepy.solvers.eigen import MatrixCombination
+
+    # The row * n_col keys of the matrix entries overflow int32.
+    n_dof = 60000
+    mtx_a = sps.diags([nm.ones(n_dof - 1), nm.arange(n_dof, dtype=nm.float64)],
+                      [-1, 0], format='csr')
+    mtx_b = sps.diags([nm.ones(n_dof - 1), nm.ones(n_dof)], [1, 0],
+                      format='csr')
+    assert mtx_a.indices.dtype == nm.int32
+
+    mtx = MatrixCombination([mtx_a, mtx_b])([1.0, 2.0])
+    assert abs(mtx - (mtx_a + 2.0 * mtx_b)).max() == 0.0
+
+def test_warm_start(data, output_dir, monkeypatch):
+    import sys
+    import scipy.sparse as sps
+    import scipy.sparse.linalg as sla
+    from sfepy.base.base import Struct
+    from sfepy.base.conf import ProblemConf
+    from sfepy.applications import EVPSolverApp
+
+    n_dof = data.mtx.shape[0]
+    mtx_d = sps.diags(nm.linspace(0.0, 1.0, n_dof))
+    ts = nm.linspace(0.0, 1e-2, 4)
+
+    n_calls = {'factorized' : 0, 'spsolve' : 0}
+    def _count(fun):
+        def _fun(*args, **kwargs):
+            n_calls[fun.__name__] += 1
+            return fun(*args, **kwargs)
+        return _fun
+    monkeypatch.setattr(sla, 'factorized', _count(sla.factorized))
+    monkeypatch.setattr(sla, 'spsolve', _count(sla.spsolve))
+
+    n_iters = {}
+    for warm_start in [False, True]:
+        # The preconditioner factorizes each matrix once.
+        conf = Struct(name='evp', kind='eig.scipy_lobpcg', i_max=100,
+                      eps_a=1e-8, largest=False, warm_start=warm_start,
+                      precond_solver=('ls.scipy_direct',
+                                      {'use_presolve' : True}))
+        eig_solver = Solver.any_from_conf(conf)
+        n_iters[warm_start] = []
+        n_calls.update(factorized=0, spsolve=0)
+        for t in ts:
+            mtx_a = data.mtx + t * mtx_d
+            status = {}
+            eigs = eig_solver(mtx_a, n_eigs=5, eigenvectors=False,
+                              status=status)
+            eigs0 = nm.linalg.eigvalsh(mtx_a.toarray())[:5]
+            assert nm.allclose(eigs, eigs0, rtol=0.0, atol=1e-8)
+            n_iters[warm_start].append(status['n_iter'])
+
+        tst.report('warm start: %s, iterations: %s, calls: %s'
+                   % (warm_start, n_iters[warm_start], n_calls))
+        assert n_calls == {'factorized' : len(ts), 'spsolve' : 0}
+
+    assert n_iters[True][0] == n_iters[False][0]
+    assert sum(n_iters[True][1:]) < 0.75 * sum(n_iters[False][1:])
+
+    # The direct solver pre-factorizes the matrix by default.
+    eig_solver = Solver.any_from_conf(
+        Struct(name='evp', kind='eig.scipy_lobpcg', i_max=100, eps_a=1e-8,
+               largest=False, precond_solver=('ls.scipy_direct', {}))
+    )
+    n_calls.update(factorized=0, spsolve=0)
+    eig_solver(data.mtx, n_eigs=5, eigenvectors=False)
+    assert eig_solver.precond_ls.conf.use_presolve
+    assert n_calls == {'factorized' : 1, 'spsolve' : 0}
+
+    # The solver instance is kept by the application.
+    define = dict(globals())
+    define.update({
+        'equations' : {'lhs' : 'dw_laplace.i.Omega(s, t)'},
+        'options' : {'evps' : 'evp2', 'n_eigs' : 5, 'evp_warm_start' : True,
+                     'output_dir' : output_dir},
+    })
+    conf = ProblemConf.from_dict(define, sys.modules[__name__])
+    app = EVPSolverApp(conf, Struct(output_filename_trunk=None,
+                                    save_ebc=False, save_ebc_nodes=False,
+                                    save_regions=False,
+                                    save_regions_as_groups=False,
+                                    save_field_meshes=False,
+                                    solve_not=False), 'evp:')
+    pb, evp = app()
+    eig_solver = app.eig_solver
+    assert eig_solver.conf.warm_start
+    assert eig_solver.last_vecs.shape == (n_dof, 5)
+
+    pb, evp2 = app()
+    assert app.eig_solver is eig_solver
+    assert nm.allclose(evp2.eigs, evp.eigs, rtol=0.0, atol=1e-8)
@@ -191,3 +191,55 @@ def test_solving(data, output_dir):
     ok = ok and _ok
 
     assert ok
+
+def test_dof_reordering(data):
+    from sfepy.discrete import (FieldVariable, Material, Problem, Equation,
+                                Equations, Integral)
+    from sfepy.discrete.conditions import Conditions, EssentialBC
+    from sfepy.terms import Term
+    from sfepy.solvers.ls import ScipyDirect
+    from sfepy.solvers.nls import Newton
+    from sfepy.mechanics.matcoefs import stiffness_from_lame
+    from sfepy.linalg.sparse import get_bandwidth
+
+    m = Material('m', D=stiffness_from_lame(data.dim, 1.0, 1.0))
+    f = Material('f', val=[[0.02], [0.01]])
+    integral = Integral('i', order=3)
+
+    ok = True
+    vecs, bandwidths = {}, {}
+    for method in [None, 'rcm', 'morton']:
+        u = FieldVariable('u', 'unknown', data.field)
+        v = FieldVariable('v', 'test', data.field, primary_var_name='u')
+
+        fix_u = EssentialBC('fix_u', data.gamma1, {'u.all' : 0.0})
+        shift_u = EssentialBC('shift_u', data.gamma2, {'u.0' : 0.1})
+
+        t1 = Term.new('dw_lin_elastic(m.D, v, u)',
+                      integral, data.omega, m=m, v=v, u=u)
+        t2 = Term.new('dw_volume_lvf(f.val, v)',
+                      integral, data.omega, f=f, v=v)
+        eqs = Equations([Equation('balance', t1 + t2)])
+
+        pb = Problem('elasticity', equations=eqs)
+        pb.conf.options['dof_reordering'] = method
+        pb.set_bcs(ebcs=Conditions([fix_u, shift_u]))
+        pb.set_solver(Newton({}, lin_solver=ScipyDirect({})))
+
+        state = pb.solve(save_results=False)
+        vecs[method] = state.get_state(reduced=False)
+        bandwidths[method] = get_bandwidth(pb.mtx_a)
+        tst.report(method, 'bandwidth:', bandwidths[method])
+
+        _ok = state.has_ebc()
+        if not _ok:
+            tst.report('EBCs violated!')
+        ok = ok and _ok
+
+        _ok = nm.allclose(vecs[method], vecs[None], rtol=0.0, atol=1e-12)
+        tst.report('same solution:', _ok)
+        ok = ok and _ok
+
+    ok = ok and (bandwidths['rcm'] < bandwidths[None])
+
+    assert ok
@@ -94,3 +94,87 @@ def test_chunk_micro():
     tst.report('merging chunks:', ok)
 
     assert ok
+
+def test_shared_arrays(monkeypatch):
+    from sfepy.base.base import Struct
+    import sfepy.homogenization.multiproc as mp
+
+    monkeypatch.setattr(mp, 'shared_min_nbytes', 80)
+
+    small = nm.arange(3.0)
+    corr = Struct(name='corr', states={'u' : nm.random.rand(4, 5)},
+                  coefs=[nm.arange(20), small], label='a')
+    deps = {'corr' : corr, 'cache' : (nm.ones(100, dtype=nm.int32), None)}
+
+    shared = mp.share_arrays(deps)
+    handles = list(mp.iter_shared_arrays(shared))
+    tst.report('shared arrays:', len(handles))
+    assert len(handles) == 3
+    assert shared['corr'].coefs[1] is small
+    assert isinstance(deps['corr'].states['u'], nm.ndarray)
+
+    view = mp.SharedDictView(shared)
+    for copy_data in [False, True]:
+        corr2 = (view['corr'] if not copy_data
+                 else mp.unshare_arrays(shared['corr'], copy_data=True))
+        assert nm.array_equal(corr2.states['u'], corr.states['u'])
+        assert nm.array_equal(corr2.coefs[0], corr.coefs[0])
+        assert corr2.label == 'a'
+        assert corr2.states['u'].flags.writeable == copy_data
+    assert nm.array_equal(view['cache'][0], deps['cache'][0])
+
+    corr2 = mp.unshare_arrays(shared['corr'], copy_data=True)
+    del view
+    mp.release_shared_arrays(shared.values())
+    mp.close_shared_blocks()
+    assert nm.array_equal(corr2.states['u'], corr.states['u'])
+    for handle in handles:
+        try:
+            handle.get_array()
+
+        except FileNotFoundError:
+            pass
+
+        else:
+            assert False
+
+def test_schedule_tasks():
+    import time
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    coefs = {'A' : {'requires' : ['a', 'c']},
+             'B' : {'requires' : ['c']}}
+    requirements = {'a' : {},
+                    'b' : {},
+                    'c' : {'requires' : ['b']}}
+    sorted_names = hwm.get_sorted_dependencies(requirements, coefs, None)
+
+    finished = []
+    lock = threading.Lock()
+    def wfun(name):
+        # 'a' is slow - the tasks depending only on 'b' should not wait for
+        # it.
+        time.sleep(0.5 if name == 'a' else 0.01)
+        with lock:
+            finished.append(name)
+        return name.upper(), {}, (threading.current_thread().name, 0.1)
+
+    worker = hwm()
+    dependencies = {}
+    with ThreadPoolExecutor(2) as workers:
+        worker.schedule_tasks(workers, wfun, sorted_names, requirements, coefs,
+                              dependencies)
+    tst.report('finished tasks:', finished)
+
+    assert sorted(dependencies.keys()) == sorted(sorted_names)
+    assert all(dependencies[key] == key.upper() for key in sorted_names)
+    for name in sorted_names:
+        reqs = (coefs[name[2:]] if name.startswith('c.')
+                else requirements[name]).get('requires', [])
+        for req in reqs:
+            assert finished.index(req) < finished.index(name)
+
+    assert finished.index('c.B') < finished.index('a')
+    assert finished[-1] == 'c.A'
+    assert sum(worker.utilization.values()) > 0.0
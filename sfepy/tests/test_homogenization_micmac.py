@@ -0,0 +1,223 @@
+import os
+import os.path as op
+from functools import partial
+import numpy as nm
+import pytest
+
+import sfepy.base.testing as tst
+
+micro_filename = 'examples/homogenization/linear_homogenization.py'
+
+def test_micro_hash():
+    from sfepy.homogenization.micmac import get_micro_conf, get_micro_hash
+    import sfepy
+
+    filename = op.join(sfepy.base_dir, micro_filename)
+    conf = get_micro_conf(filename, None, None)
+    key = get_micro_hash(conf)
+    assert key == get_micro_hash(get_micro_conf(filename, None, None))
+    assert key != get_micro_hash(conf, define_args={'a' : 1})
+
+    mat = conf.materials['material_mat__0']
+    mat.values['D'] = {k : v * 2 for k, v in mat.values['D'].items()}
+    assert key != get_micro_hash(conf)
+
+    # Callables differing only by constants, defaults, closures or partial
+    # arguments.
+    def get_fun(val):
+        return lambda ts, coors, mode=None, **kwargs: {'E' : val}
+
+    funs = [
+        (lambda ts, coors, mode=None, **kwargs: {'E' : 1.0},
+         lambda ts, coors, mode=None, **kwargs: {'E' : 1000.0}),
+        (lambda ts, coors, mode=None, val=1.0, **kwargs: {'E' : val},
+         lambda ts, coors, mode=None, val=2.0, **kwargs: {'E' : val}),
+        (get_fun(1.0), get_fun(2.0)),
+        (partial(max, 1), partial(max, 2)),
+    ]
+    for fun1, fun2 in funs:
+        mat.function = fun1
+        key1 = get_micro_hash(conf)
+        mat.function = fun2
+        key2 = get_micro_hash(conf)
+        assert key1 != key2
+        assert key2 == get_micro_hash(conf)
+
+    class Fun:
+        def __call__(self, ts, coors, mode=None, **kwargs):
+            return {'E' : 1.0}
+
+    with pytest.raises(ValueError):
+        get_micro_hash(conf, define_args={'fun' : Fun()})
+
+def test_coefs_cache(output_dir, monkeypatch):
+    import sfepy.homogenization.micmac as mm
+    import sfepy
+
+    filename = op.join(sfepy.base_dir, micro_filename)
+    cache_dir = op.join(output_dir, 'coefs_cache')
+
+    n_calls = [0]
+    call = mm.HomogenizationApp.call
+    def _call(self, *args, **kwargs):
+        n_calls[0] += 1
+        return call(self, *args, **kwargs)
+    monkeypatch.setattr(mm.HomogenizationApp, 'call', _call)
+
+    coefs = []
+    for ii in range(2):
+        mm.homogen_app_cache.clear()
+        coefs.append(mm.get_homog_coefs_linear(
+            None, None, None, micro_filename=filename,
+            output_dir=output_dir, cache_dir=cache_dir,
+            cache_correctors=True,
+        ))
+    tst.report('homogenization calls:', n_calls[0])
+    assert n_calls[0] == 1
+    assert sorted(coefs[0].keys()) == sorted(coefs[1].keys())
+    assert nm.array_equal(coefs[0]['D'], coefs[1]['D'])
+
+    key = mm.get_micro_hash(mm.get_micro_conf(filename, None, output_dir))
+    cache = mm.CoefsCache(cache_dir)
+    _, corrs = cache.load(key, correctors=True)
+    assert 'corrs_rs' in corrs
+    assert hasattr(corrs['corrs_rs'], 'get_output')
+
+    # The size-based eviction keeps the last saved entry only.
+    size = os.stat(cache.get_filename(key)).st_size
+    cache = mm.CoefsCache(cache_dir, max_size=size)
+    cache.save('0' * 64, cache.load(key)[0])
+    assert os.listdir(cache_dir) == ['0' * 64 + '.h5']
+
+    mm.homogen_app_cache.clear()
+
+def test_cluster_micro_states():
+    from sfepy.homogenization.micmac import (cluster_micro_states,
+                                             interpolate_cluster_values)
+
+    centers = nm.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    labels0 = nm.array([2, 0, 1, 0, 2, 1, 1, 0])
+    shifts = 1e-4 * nm.arange(len(labels0))[:, None]
+    features = [centers[labels0] + shifts, nm.ones((len(labels0), 3))]
+
+    reps, labels, dist, scales = cluster_micro_states(features, 1e-3,
+                                                      fixed=[5])
+    tst.report('representatives:', reps, 'labels:', labels)
+    assert len(reps) == 3
+    assert 5 in reps
+    assert nm.all(nm.diff(reps) > 0)
+    for ic in range(3):
+        assert len(nm.unique(labels0[labels == ic])) == 1
+    assert nm.all(dist <= 1e-3)
+    assert nm.all(dist[reps] == 0.0)
+
+    # Linear values are interpolated within the clusters.
+    vals = {'a' : features[0][reps].sum(axis=1)}
+    out = interpolate_cluster_values(vals, features, scales, reps, labels,
+                                     1e-3)
+    assert nm.array_equal(out['a'][reps], vals['a'])
+    assert nm.allclose(out['a'], vals['a'][labels], atol=2e-3)
+
+def test_clustered_nonlinear(output_dir, monkeypatch):
+    from sfepy.base.base import Struct
+    import sfepy.homogenization.micmac as mm
+    import sfepy
+
+    filename = op.join(sfepy.base_dir,
+                       'examples/homogenization/nonlinear_homogenization.py')
+    problem = Struct(conf=Struct(options=Struct(micro_filename=filename)))
+
+    mtx_e = nm.array([[0.01, 0.0], [0.0, -0.005]])
+    mtx_e = nm.array([mtx_e, 2 * mtx_e, mtx_e * (1 + 1e-7), 2 * mtx_e])
+    n_micro = len(mtx_e)
+
+    coefs = {}
+    for tol in [None, 1e-4]:
+        conf = mm.get_micro_conf(filename, None, output_dir)
+        conf.options.store_micro_idxs = [1]
+        app = mm.HomogenizationApp(conf, Struct(output_filename_trunk=None),
+                                   'micro:', n_micro=n_micro)
+        mm.homogen_app_cache[filename] = app
+
+        coefs[tol] = mm.get_homog_coefs_nonlinear(
+            Struct(step=0), nm.zeros_like(mtx_e), 'qp',
+            {'mtx_e' : mtx_e.copy()}, problem=problem, iteration=0,
+            output_dir=output_dir, cluster_tol=tol, cluster_check=1,
+        )
+        mm.homogen_app_cache.clear()
+
+    stats = app.cluster_stats
+    tst.report('clustering statistics:', stats)
+    assert stats.n_cluster == 2
+    assert stats.n_solve == 3
+    assert stats.max_error < 1e-6
+    assert sorted(app.micro_state_cache.keys()) == ['coors_1_t000',
+                                                    'id_1_t000']
+    for key, val in coefs[None].items():
+        assert nm.allclose(coefs[1e-4][key], val, rtol=1e-6, atol=0.0)
+
+    # A failed subset solve keeps the full micro data and options.
+    def _call(self, *args, **kwargs):
+        raise RuntimeError('micro solve failed')
+    monkeypatch.setattr(mm.HomogenizationEngine, '__call__', _call)
+
+    micro_states, macro_data = app.micro_states, app.macro_data
+    with pytest.raises(RuntimeError):
+        app(ret_all=True, micro_idxs=[0, 1], micro_map=[0, 1, 0, 1])
+    assert app.micro_states is micro_states
+    assert app.macro_data is macro_data
+    assert len(app.micro_states['coors']) == n_micro
+    assert app.he.app_options.store_micro_idxs == [1]
+
+def test_recovery_streaming(output_dir, monkeypatch):
+    import sfepy.homogenization.micmac as mm
+    from sfepy.homogenization.recovery import (recover_micro_hook,
+                                               read_recovery_data)
+    from sfepy.discrete.fem.meshio import MeshIO
+    import sfepy
+
+    filename = op.join(sfepy.base_dir, micro_filename)
+    # The recovery hook uses the correctors loaded from files.
+    for regenerate in [True, False]:
+        mm.homogen_app_cache.clear()
+        mm.get_homog_coefs_linear(None, None, None, micro_filename=filename,
+                                  output_dir=output_dir,
+                                  regenerate=regenerate)
+    # Compare the streamed data with the merged output in HDF5.
+    mm.homogen_app_cache[filename][1].problem.output_format = 'h5'
+
+    centers = nm.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0],
+                        [1.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    strain = 1e-3 * nm.arange(30, dtype=nm.float64).reshape((5, 6, 1))
+
+    # A failure while streaming does not leave the output file open.
+    import sfepy.homogenization.recovery as rec
+    def _append(*args, **kwargs):
+        raise RuntimeError('append failed')
+    with monkeypatch.context() as mp:
+        mp.setattr(rec, 'append_recovery_data', _append)
+        with pytest.raises(RuntimeError):
+            recover_micro_hook(filename, centers, {'strain' : strain}, 0.1,
+                               output_dir=output_dir, chunk_size=2)
+
+    for chunk_size in [None, 2]:
+        recover_micro_hook(filename, centers, {'strain' : strain}, 0.1,
+                           output_dir=output_dir, chunk_size=chunk_size)
+    mm.homogen_app_cache.clear()
+
+    name = op.join(output_dir, 'matrix_fiber.recovered')
+    io = MeshIO.any_from_filename(name + '_ALL.h5')
+    data = io.read_data(0)
+    rec = read_recovery_data(name + '.h5')['ALL']
+    assert nm.array_equal(rec.recovery_ids, nm.arange(5))
+    assert rec.coors.shape[0] == 5
+    for key, val in rec.data.items():
+        _ok = nm.allclose(val.data.reshape(-1),
+                          data[key].data.reshape(-1), rtol=1e-6)
+        tst.report(key, val.mode, val.data.shape, _ok)
+        assert _ok
+
+    rec = read_recovery_data(name + '.h5', recovery_ids=[3, 1])['ALL']
+    assert nm.array_equal(rec.recovery_ids, [1, 3])
+    assert nm.allclose(rec.coors[1] - rec.coors[0], centers[3] - centers[1])
+    assert rec.data['u_mic'].data.shape[0] == 2
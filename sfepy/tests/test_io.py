@@ -50,3 +50,206 @@ def test_recursive_dict_hdf5(output_dir):
     tst.report('%s' % test2)
 
     assert_(test == test2)
+
+def test_async_output(output_dir):
+    from sfepy.base.conf import ProblemConf, get_standard_keywords
+    from sfepy.discrete import Problem
+    from sfepy.discrete.fem.meshio import MeshIO
+    from sfepy import base_dir
+
+    required, other = get_standard_keywords()
+    conf = ProblemConf.from_file(base_dir + '/examples/diffusion/time_poisson.py',
+                                 required, other)
+
+    filenames = {}
+    for async_output in [False, 2]:
+        conf.options.async_output = async_output
+        pb = Problem.from_conf(conf)
+        trunk = 'time_poisson_async_%s' % async_output
+        pb.setup_output(output_dir=output_dir, output_filename_trunk=trunk,
+                        output_format='h5')
+        pb.solve()
+        assert pb.output_writer is None
+        filenames[async_output] = pb.get_output_name()
+
+    ios = {key : MeshIO.any_from_filename(val)
+           for key, val in filenames.items()}
+    steps = ios[False].read_times()[0]
+    assert nm.all(steps == ios[2].read_times()[0])
+    assert len(steps) > 1
+
+    for step in steps:
+        out0, out1 = [io.read_data(step) for io in ios.values()]
+        for key, val in out0.items():
+            assert nm.array_equal(val.data, out1[key].data)
+
+def test_background_writer():
+    from sfepy.base.ioutils import BackgroundWriter
+
+    calls = []
+    def fun(ii, fail=False):
+        if fail:
+            raise ValueError('failed call %d' % ii)
+        calls.append(ii)
+
+    writer = BackgroundWriter(max_size=2)
+    for ii in range(10):
+        writer.put(fun, ii)
+    writer.flush()
+    assert calls == list(range(10))
+
+    try:
+        writer.put(fun, 10, fail=True)
+        writer.put(fun, 11)
+        writer.close()
+
+    except ValueError as exc:
+        assert str(exc) == 'failed call 10'
+
+    else:
+        assert False
+
+    assert calls == list(range(10))
+
+def test_h5_options(output_dir):
+    from sfepy.base.conf import ProblemConf, get_standard_keywords
+    from sfepy.base.ioutils import pt
+    from sfepy.discrete import Problem
+    from sfepy.discrete.fem.meshio import MeshIO
+    from sfepy import base_dir
+
+    required, other = get_standard_keywords()
+    conf = ProblemConf.from_file(base_dir + '/examples/diffusion/time_poisson.py',
+                                 required, other)
+
+    ios = {}
+    for key, h5_options, interval in [
+            ('ref', {}, 1),
+            ('zlib', {'compression' : 'zlib', 'complevel' : 9}, 1),
+            ('f32', {'chunks' : 10, 'float32' : ['T']}, 3),
+    ]:
+        conf.options.h5_options = h5_options
+        conf.options.save_step_interval = interval
+        pb = Problem.from_conf(conf)
+        pb.setup_output(output_dir=output_dir,
+                        output_filename_trunk='time_poisson_' + key,
+                        output_format='h5')
+        pb.solve()
+        ios[key] = MeshIO.any_from_filename(pb.get_output_name())
+
+    steps = ios['ref'].read_times()[0]
+    assert nm.all(steps == ios['zlib'].read_times()[0])
+    assert nm.all(ios['f32'].read_times()[0] == [0, 3, 6, 9, 10])
+
+    with pt.open_file(ios['zlib'].filename, mode='r') as fd:
+        node = fd.root.step1.__T.data
+        assert isinstance(node, pt.CArray)
+        assert node.filters.complib == 'zlib'
+
+    for step in steps:
+        out0 = ios['ref'].read_data(step)['T']
+        out1 = ios['zlib'].read_data(step)['T']
+        assert nm.array_equal(out0.data, out1.data)
+        if step in [0, 3, 6, 9, 10]:
+            out2 = ios['f32'].read_data(step)['T']
+            assert out2.data.dtype == nm.float32
+            assert nm.allclose(out0.data, out2.data, rtol=1e-6, atol=0)
+
+def test_h5_time_layout(output_dir):
+    from sfepy.base.conf import ProblemConf, get_standard_keywords
+    from sfepy.discrete import Problem
+    from sfepy.discrete.fem.meshio import MeshIO
+    from sfepy import base_dir
+
+    required, other = get_standard_keywords()
+    conf = ProblemConf.from_file(base_dir + '/examples/diffusion/time_poisson.py',
+                                 required, other)
+
+    ios = {}
+    for layout in ['step', 'time']:
+        conf.options.h5_options = {'layout' : layout, 'time_chunks' : 4}
+        pb = Problem.from_conf(conf)
+        pb.setup_output(output_dir=output_dir,
+                        output_filename_trunk='time_poisson_' + layout,
+                        output_format='h5')
+        pb.solve()
+        ios[layout] = MeshIO.any_from_filename(pb.get_output_name())
+
+    steps, times, nts = ios['step'].read_times()
+    steps1, times1, nts1 = ios['time'].read_times()
+    assert nm.all(steps == steps1)
+    assert nm.allclose(times, times1) and nm.allclose(nts, nts1)
+    assert ios['time'].read_last_step() == steps[-1]
+
+    for step in steps:
+        out0 = ios['step'].read_data(step)['T']
+        out1 = ios['time'].read_data(step)['T']
+        assert nm.array_equal(out0.data, out1.data)
+        assert out0.dofs == out1.dofs
+        assert out0.mode == out1.mode
+        assert out0.field_name == out1.field_name
+
+    indx = [20, 3, 7, 3]
+    mode, nname = ios['time'].read_data_header('T')
+    assert mode == ios['step'].read_data_header('T')[0]
+    th0 = ios['step'].read_time_history(nname, indx[:3])
+    th1 = ios['time'].read_time_history(nname, indx[:3])
+    for ii in indx[:3]:
+        assert nm.array_equal(th0[ii], th1[ii])
+
+    for sel in [None, steps[::3]]:
+        hsteps0, hdata0 = ios['step'].read_data_history('T', indx, steps=sel)
+        hsteps1, hdata1 = ios['time'].read_data_history('T', indx, steps=sel)
+        assert nm.all(hsteps0 == hsteps1)
+        assert hdata1.shape == (len(hsteps1), len(indx), 1)
+        assert nm.array_equal(hdata0, hdata1)
+        assert nm.array_equal(hdata1[:, 1], hdata1[:, 3])
+
+    hsteps, hdata = ios['time'].read_data_history('T')
+    assert nm.array_equal(hdata[-1], ios['step'].read_data(steps[-1])['T'].data)
+
+def test_restart_checkpoints(output_dir):
+    import os
+    import glob
+    from sfepy.base.conf import ProblemConf, get_standard_keywords
+    from sfepy.discrete import Problem
+    from sfepy import base_dir
+
+    required, other = get_standard_keywords()
+    conf = ProblemConf.from_file(
+        base_dir + '/examples/linear_elasticity/linear_viscoelastic.py',
+        required, other, define_args={'verbose' : False},
+    )
+    del conf.options.post_process_hook
+    conf.options.output_format = 'vtk'
+
+    def solve(**options):
+        conf.options.update(options)
+        pb = Problem.from_conf(conf)
+        pb.setup_output(output_dir=output_dir,
+                        output_filename_trunk='viscoelastic')
+        vec = pb.solve(save_results=options.get('async_output', False))()
+        return pb, vec
+
+    _, vec_ref = solve()
+
+    # Checkpoints of all steps, keep the last three.
+    pb, vec = solve(save_restart=-3, restart_interval=0.0, async_output=2)
+    assert nm.array_equal(vec_ref, vec)
+
+    filenames = sorted(glob.glob(op.join(output_dir,
+                                         'viscoelastic.restart-*')))
+    assert [op.basename(ii) for ii in filenames] == [
+        'viscoelastic.restart-%02d.h5' % ii for ii in [18, 19, 20]
+    ]
+
+    # Restart from the checkpoint with the fading memory history data.
+    _, vec = solve(save_restart=None, async_output=False,
+                   load_restart=filenames[0])
+    assert nm.allclose(vec_ref, vec, rtol=1e-12, atol=1e-14)
+
+    # A large wall-clock interval - no checkpoint is due.
+    for filename in filenames:
+        os.remove(filename)
+    solve(save_restart=-3, restart_interval=3600.0, load_restart=None)
+    assert not glob.glob(op.join(output_dir, 'viscoelastic.restart-*'))
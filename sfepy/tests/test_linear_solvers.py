@@ -144,6 +144,22 @@ solvers = {
               'eps_a'   : 1e-12,
               'eps_r'   : 1e-12,}
     ),
+    'i30' : ('ls.additive_schwarz',
+             {'method' : 'gmres',
+              'n_parts' : 4,
+              'overlap' : 2,
+              'i_max'   : 1000,
+              'eps_a'   : 1e-12,
+              'eps_r'   : 1e-12,}
+    ),
+    'i31' : ('ls.additive_schwarz',
+             {'method' : 'cg',
+              'n_parts' : 4,
+              'restricted' : False,
+              'i_max'   : 1000,
+              'eps_a'   : 1e-12,
+              'eps_r'   : 1e-12,}
+    ),
 
     'newton' : ('nls.newton', {
         'i_max'      : 1,
@@ -302,3 +318,90 @@ def test_ls_reuse(problem):
         tst.report('sol0 == 2 * sol2:', _ok); ok = ok and _ok
 
     assert ok
+
+@pytest.fixture(scope='module')
+def lobatto_system():
+    import numpy as nm
+    from scipy.sparse.linalg import spsolve
+    import sfepy
+    from sfepy.base.base import Struct
+    from sfepy.discrete.fem import Mesh, FEDomain, Field
+    from sfepy.discrete import (FieldVariable, Material, Integral, Equation,
+                                Equations, Problem)
+    from sfepy.discrete.conditions import Conditions, EssentialBC
+    from sfepy.terms import Term
+
+    mesh = Mesh.from_file('meshes/2d/square_quad.mesh',
+                          prefix_dir=sfepy.data_dir)
+    domain = FEDomain('domain', mesh)
+    omega = domain.create_region('Omega', 'all')
+    gamma = domain.create_region('Gamma', 'vertices of surface', 'facet')
+
+    field = Field.from_args('fu', nm.float64, 1, omega, approx_order=4,
+                            poly_space_basis='lobatto')
+
+    u = FieldVariable('u', 'unknown', field)
+    v = FieldVariable('v', 'test', field, primary_var_name='u')
+
+    m = Material('m', val=1.0)
+    integral = Integral('i', order=8)
+    t1 = Term.new('dw_laplace(m.val, v, u)', integral, omega, m=m, v=v, u=u)
+    t2 = Term.new('dw_volume_lvf(m.val, v)', integral, omega, m=m, v=v)
+    eqs = Equations([Equation('eq', t1 - t2)])
+
+    pb = Problem('lobatto', equations=eqs)
+    pb.set_bcs(ebcs=Conditions([EssentialBC('fix', gamma, {'u.0' : 0.0})]))
+    pb.time_update()
+    pb.update_materials()
+
+    ev = pb.get_evaluator()
+    state0 = pb.get_initial_state()
+    state0.apply_ebc()
+    vec0 = state0.get_state(pb.active_only)
+    rhs = -ev.eval_residual(vec0)
+    mtx = ev.eval_tangent_matrix(vec0)
+
+    sol0 = spsolve(mtx, rhs)
+
+    return Struct(problem=pb, field=field, mtx=mtx, rhs=rhs, sol0=sol0)
+
+def test_pmg(lobatto_system):
+    import numpy as nm
+    from sfepy.base.base import Struct
+    from sfepy.solvers import Solver
+
+    ls = lobatto_system
+
+    orders = ls.field.get_node_orders()
+    assert orders.min() == 1
+    assert orders.max() == 4
+
+    for conf in [{'accel' : 'cg', 'eps_r' : 1e-12},
+                 {'accel' : None, 'eps_r' : 1e-12, 'i_max' : 300},
+                 {'smoother' : 'gauss_seidel', 'orders' : [2, 1],
+                  'eps_r' : 1e-12}]:
+        conf.update({'kind' : 'ls.pmg', 'verbose' : True})
+        solver = Solver.any_from_conf(Struct(**conf), context=ls.problem)
+        status = {}
+        sol = solver(ls.rhs, mtx=ls.mtx, status=status)
+        tst.report(conf, 'iterations:', status['n_iter'])
+        assert status['n_iter'] < conf.get('i_max', 100)
+        assert nm.allclose(sol, ls.sol0, atol=1e-7, rtol=0)
+
+def test_static_condensation(lobatto_system):
+    import numpy as nm
+    from sfepy.base.base import Struct
+    from sfepy.solvers import Solver
+
+    ls = lobatto_system
+
+    for conf in [{}, {'ls' : {'kind' : 'ls.scipy_iterative', 'method' : 'cg',
+                              'eps_a' : 1e-12, 'eps_r' : 1e-12,
+                              'i_max' : 1000}}]:
+        conf.update({'kind' : 'ls.static_condensation', 'verbose' : True})
+        solver = Solver.any_from_conf(Struct(**conf), context=ls.problem)
+        sol = solver(ls.rhs, mtx=ls.mtx)
+        n_cell = ls.field.bubble_dofs.shape[0]
+        assert len(solver.cdata.ii) == 9 * n_cell
+        assert solver.cdata.mtx_s.shape[0] == ls.mtx.shape[0] - 9 * n_cell
+        assert nm.allclose(sol, ls.sol0, atol=1e-10, rtol=0)
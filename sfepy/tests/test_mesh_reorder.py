@@ -0,0 +1,62 @@
+import numpy as nm
+
+import sfepy.base.testing as tst
+
+def test_hilbert_codes():
+    from sfepy.linalg.geometry import get_hilbert_codes
+
+    ok = True
+    for dim in [2, 3]:
+        grid = nm.indices((8,) * dim).reshape((dim, -1)).T.astype(nm.float64)
+        codes = get_hilbert_codes(grid, n_bits=3)
+        _ok = nm.all(nm.sort(codes) == nm.arange(8**dim))
+        # The consecutive points along the curve are neighbours.
+        steps = nm.abs(nm.diff(grid[nm.argsort(codes)], axis=0)).sum(axis=1)
+        _ok = _ok and nm.all(steps == 1)
+        tst.report('%dD Hilbert curve ok:' % dim, _ok)
+        ok = ok and _ok
+
+    assert ok
+
+def test_mesh_reorder():
+    from sfepy.discrete.fem.mesh import Mesh
+    from sfepy.linalg.sparse import get_bandwidth
+    from sfepy import data_dir
+
+    mesh = Mesh.from_file(data_dir + '/meshes/3d/cylinder.mesh')
+    mesh.nodal_bcs = {'bottom' : nm.where(mesh.coors[:, 2] < 1e-8)[0]}
+    desc = mesh.descs[0]
+    conn = mesh.get_conn(desc)
+    volumes = mesh.cmesh.get_volumes(3)
+
+    ok = True
+    for vertex_method, cell_method in [('rcm', 'vertices'),
+                                       ('morton', 'morton'),
+                                       ('hilbert', 'hilbert'),
+                                       (None, None)]:
+        rmesh = mesh.reorder(vertex_method, cell_method)
+        vperm = rmesh.vertex_perm
+        cperm = rmesh.cell_perms[desc]
+
+        _ok = (nm.allclose(rmesh.coors, mesh.coors[vperm])
+               and nm.all(rmesh.cmesh.vertex_groups
+                          == mesh.cmesh.vertex_groups[vperm])
+               and nm.all(vperm[rmesh.get_conn(desc)] == conn[cperm])
+               and nm.all(rmesh.cmesh.cell_groups
+                          == mesh.cmesh.cell_groups[cperm])
+               and nm.allclose(rmesh.cmesh.get_volumes(3), volumes[cperm])
+               and nm.all(nm.sort(vperm[rmesh.nodal_bcs['bottom']])
+                          == mesh.nodal_bcs['bottom']))
+        tst.report(vertex_method, cell_method, 'consistent:', _ok)
+        ok = ok and _ok
+
+    graph = mesh.create_conn_graph(verbose=False)
+    rmesh = Mesh.from_file(data_dir + '/meshes/3d/cylinder.mesh',
+                           reorder='rcm')
+    rgraph = rmesh.create_conn_graph(verbose=False)
+    _ok = get_bandwidth(rgraph) < get_bandwidth(graph)
+    tst.report('RCM bandwidth: %d -> %d'
+               % (get_bandwidth(graph), get_bandwidth(rgraph)))
+    ok = ok and _ok
+
+    assert ok
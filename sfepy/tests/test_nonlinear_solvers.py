@@ -0,0 +1,250 @@
+import numpy as nm
+import pytest
+
+import sfepy.base.testing as tst
+
+newton = {
+    'kind' : 'nls.newton',
+    'i_max' : 20,
+    'eps_a' : 1e-10,
+    'eps_r' : 1.0,
+    'macheps' : 1e-16,
+    'lin_red' : None,
+    'ls_on' : 1.1,
+}
+
+solvers = {
+    'newton-contraction' : {
+        'kind' : 'nls.newton',
+        'i_max' : 20,
+        'eps_a' : 1e-10,
+        'eps_r' : 1.0,
+        'macheps' : 1e-16,
+        'lin_red' : None,
+        'ls_on' : 1.1,
+        'jacobian_reuse' : 'contraction',
+        'reuse_rate' : 0.2,
+    },
+    'newton-broyden' : {
+        'kind' : 'nls.newton',
+        'i_max' : 20,
+        'eps_a' : 1e-10,
+        'eps_r' : 1.0,
+        'macheps' : 1e-16,
+        'lin_red' : None,
+        'ls_on' : 1.1,
+        'jacobian_reuse' : 'broyden',
+    },
+    'jfnk-tangent' : {
+        'kind' : 'nls.jfnk',
+        'i_max' : 20,
+        'eps_a' : 1e-10,
+        'eps_r' : 1.0,
+        'macheps' : 1e-16,
+        'eta_max' : 1e-3,
+        'precond' : 'tangent',
+    },
+    'jfnk-tangent-lgmres' : {
+        'kind' : 'nls.jfnk',
+        'i_max' : 20,
+        'eps_a' : 1e-10,
+        'eps_r' : 1.0,
+        'macheps' : 1e-16,
+        'method' : 'lgmres',
+        'precond' : 'tangent',
+        'keep_precond' : True,
+        'precond_update' : 3,
+    },
+    'jfnk-diagonal' : {
+        'kind' : 'nls.jfnk',
+        'i_max' : 20,
+        'eps_a' : 1e-10,
+        'eps_r' : 1.0,
+        'macheps' : 1e-16,
+        'lin_i_max' : 500,
+        'precond' : 'diagonal',
+    },
+}
+
+@pytest.fixture(scope='module')
+def problem():
+    from sfepy.base.conf import ProblemConf, get_standard_keywords
+    from sfepy.discrete import Problem
+    import sfepy
+
+    required, other = get_standard_keywords()
+    conf = ProblemConf.from_file(
+        sfepy.base_dir + '/examples/large_deformation/hyperelastic.py',
+        required, other,
+    )
+    del conf.options.post_process_hook
+    conf.solvers['solvers_ts'].n_step = 3
+    pb = Problem.from_conf(conf)
+
+    return pb
+
+def _solve(pb, nls_conf):
+    from sfepy.base.base import IndexedStruct, Struct
+
+    status = IndexedStruct(nls_status=tst.NLSStatus(conditions=[]))
+    pb.init_solvers(status=status, nls_conf=Struct(name='nls', **nls_conf),
+                    force=True)
+    state = pb.solve(status=status, save_results=False)
+
+    stats = {key : sum(step.get(key, 0) for step in status.step_stats)
+             for key in ['n_iter', 'ls_n_iter', 'n_fev', 'n_precond',
+                         'n_mtx', 'n_lin_solve']}
+    ok = tst.check_conditions(nm.array(status.nls_status.conditions))
+
+    return state(), stats, ok
+
+def test_nonlinear_solvers(problem):
+    vec_ref, stats, ok = _solve(problem, newton)
+    tst.report('newton: iterations: %d, matrix evaluations: %d'
+               % (stats['n_iter'], stats['n_mtx']))
+    n_mtx_ref = stats['n_mtx']
+
+    for key, conf in solvers.items():
+        vec, stats, _ok = _solve(problem, conf)
+        if conf['kind'] == 'nls.newton':
+            tst.report('%s: iterations: %d, matrix evaluations: %d,'
+                       ' linear solves: %d'
+                       % (key, stats['n_iter'], stats['n_mtx'],
+                          stats['n_lin_solve']))
+            _ok = _ok and (stats['n_mtx'] < n_mtx_ref)
+
+        else:
+            tst.report('%s: iterations: %d, Krylov iterations: %d,'
+                       ' residual evaluations: %d, preconditioner updates: %d'
+                       % (key, stats['n_iter'], stats['ls_n_iter'],
+                          stats['n_fev'], stats['n_precond']))
+        _ok = _ok and tst.compare_vectors(vec_ref, vec, label1='newton',
+                                          label2=key, allowed_error=1e-6)
+        ok = ok and _ok
+
+    assert ok
+
+def _create_problem(filename, ebcs=None):
+    from sfepy.base.conf import ProblemConf, get_standard_keywords
+    from sfepy.discrete import Problem
+    import sfepy
+
+    required, other = get_standard_keywords()
+    conf = ProblemConf.from_file(sfepy.base_dir + filename, required, other)
+    if ebcs is not None:
+        for key, val in ebcs.items():
+            conf.ebcs[key].dofs = val
+
+    return Problem.from_conf(conf)
+
+def test_anderson():
+    from sfepy.base.base import IndexedStruct, Struct
+
+    # Mild boundary conditions, so that the modified Newton step is a
+    # contraction.
+    pb = _create_problem('/examples/diffusion/poisson_nonlinear_material.py',
+                         ebcs={'ebc_T1__0' : {'T.0' : 1.0},
+                               'ebc_T2__1' : {'T.0' : -1.0}})
+    vec_ref = pb.solve(save_results=False)()
+
+    ok = True
+    n_iters = {}
+    for depth in [0, 5]:
+        status = IndexedStruct(nls_status=IndexedStruct())
+        nls_conf = Struct(name='anderson', kind='nls.anderson', depth=depth,
+                          i_max=100, eps_a=1e-10)
+        pb.init_solvers(status=status, nls_conf=nls_conf, force=True)
+        vec = pb.solve(status=status, save_results=False)()
+
+        nls_status = status.nls_status
+        n_iters[depth] = nls_status.n_iter
+        tst.report('depth: %d, iterations: %d, restarts: %d'
+                   % (depth, nls_status.n_iter, nls_status.n_restart))
+        _ok = nls_status.condition == 0
+        _ok = _ok and tst.compare_vectors(vec_ref, vec, label1='newton',
+                                          label2='anderson',
+                                          allowed_error=1e-8)
+        ok = ok and _ok
+
+    ok = ok and (n_iters[5] < n_iters[0] / 2)
+
+    assert ok
+
+@pytest.mark.slow
+def test_anderson_oseen():
+    from sfepy.base.base import IndexedStruct, Struct
+
+    pb = _create_problem('/examples/navier_stokes/stabilized_navier_stokes.py')
+    vec_ref = pb.solve(save_results=False)()
+
+    oseen = pb.solver_confs['oseen'].to_dict()
+    oseen.pop('name')
+    # A single linearized solve per map evaluation.
+    oseen.update(i_max=1, eps_a=1e-14)
+
+    status = IndexedStruct(nls_status=IndexedStruct())
+    nls_conf = Struct(name='anderson', kind='nls.anderson', depth=3,
+                      i_max=20, eps_a=1e-8, nls=oseen)
+    pb.init_solvers(status=status, nls_conf=nls_conf, force=True)
+    vec = pb.solve(status=status, save_results=False)()
+
+    nls_status = status.nls_status
+    tst.report('iterations: %d, Oseen calls: %d'
+               % (nls_status.n_iter, nls_status.n_fev))
+    ok = nls_status.condition == 0
+    # The stopping criteria differ - use a relative tolerance.
+    ok = ok and tst.compare_vectors(vec_ref, vec, label1='oseen',
+                                    label2='anderson(oseen)',
+                                    allowed_error=1e-5 * nm.linalg.norm(vec))
+
+    assert ok
+
+def test_reuse_trial_state(problem, monkeypatch):
+    from sfepy.terms.terms_hyperelastic_base import HyperElasticFamilyData
+
+    n_calls = [0]
+    init_data_struct = HyperElasticFamilyData.init_data_struct
+    def _init_data_struct(self, *args, **kwargs):
+        n_calls[0] += 1
+        return init_data_struct(self, *args, **kwargs)
+
+    monkeypatch.setattr(HyperElasticFamilyData, 'init_data_struct',
+                        _init_data_struct)
+
+    vecs, n_computed = {}, {}
+    for reuse in [False, True]:
+        problem.conf.options.reuse_trial_state = reuse
+        n_calls[0] = 0
+        vecs[reuse], stats, ok = _solve(problem, newton)
+        n_computed[reuse] = n_calls[0]
+        tst.report('reuse: %s, iterations: %d, family data computations: %d'
+                   % (reuse, stats['n_iter'], n_computed[reuse]))
+        assert ok
+
+    del problem.conf.options.reuse_trial_state
+
+    assert nm.array_equal(vecs[False], vecs[True])
+    assert n_computed[True] < n_computed[False]
+
+def test_reuse_trial_state_mesh_update(problem):
+    problem.time_update()
+    problem.update_materials()
+    vec = problem.get_initial_state().get_state(reduced=True)
+    vec += 1e-4 * nm.sin(nm.arange(len(vec)))
+
+    coors0 = problem.get_mesh_coors().copy()
+
+    problem.conf.options.reuse_trial_state = True
+    ev = problem.get_evaluator()
+    ev.eval_residual(vec)
+    # The caches computed for the original mesh must not be reused.
+    problem.set_mesh_coors(1.5 * coors0, update_fields=True)
+    vec_r = ev.eval_residual(vec).copy()
+
+    ev.reuse_caches = False
+    vec_r0 = ev.eval_residual(vec)
+
+    problem.set_mesh_coors(coors0, update_fields=True)
+    del problem.conf.options.reuse_trial_state
+
+    assert nm.allclose(vec_r, vec_r0, rtol=1e-12, atol=0.0)
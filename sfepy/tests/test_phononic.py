@@ -0,0 +1,65 @@
+import numpy as nm
+
+import sfepy.base.testing as tst
+
+def _create_mass():
+    from sfepy.base.base import Struct
+    from sfepy.homogenization.coefs_phononic import AcousticMassTensor
+
+    mass = AcousticMassTensor.__new__(AcousticMassTensor)
+    mass.eigs = nm.array([1.0, 4.0, 9.0])
+    mass.eigenmomenta = nm.array([[1.0, 0.2], [0.1, 0.7], [0.5, 0.5]])
+    mass.dv_info = Struct(average_density=2.0, total_volume=1.0)
+
+    return mass
+
+def test_mass_tensor_batch():
+    mass = _create_mass()
+
+    freqs = nm.linspace(0.1, 3.5, 50)
+    mtxs = mass.evaluate(freqs)
+    ok = all(nm.allclose(mtxs[ii], mass.evaluate(freq), rtol=1e-14)
+             for ii, freq in enumerate(freqs))
+    ok = ok and nm.array_equal(mtxs, mtxs.transpose((0, 2, 1)))
+    tst.report('batch evaluation ok:', ok)
+
+    try:
+        mass.evaluate(nm.array([0.5, 2.0]))
+
+    except ValueError:
+        _ok = True
+
+    else:
+        _ok = False
+    tst.report('resonance detected:', _ok)
+
+    assert ok and _ok
+
+def test_find_zeros():
+    from sfepy.homogenization.coefs_phononic import (get_callback, find_zero,
+                                                     find_zeros)
+    mass = _create_mass()
+    mtx_b = nm.array([[2.0, 0.5], [0.5, 1.0]])
+
+    ok = True
+    for b in [None, mtx_b]:
+        callback = get_callback(mass.evaluate, 'eig.sgscipy', mtx_b=b,
+                                mode='find_zero')
+        f0s = nm.array([0.01, 1.01, 2.01, 3.01])
+        f1s = nm.array([0.99, 1.99, 2.99, 3.99])
+
+        freqs = nm.linspace(0.2, 0.8, 5)
+        ok = ok and nm.allclose(callback(freqs),
+                                [callback(freq) for freq in freqs])
+
+        for mode in [0, 1]:
+            zeros = find_zeros(f0s, f1s, callback, 1e-8, 1e-10, mode)
+            for ii in range(len(f0s)):
+                zero = find_zero(f0s[ii], f1s[ii], callback, 1e-8, 1e-10,
+                                 mode)
+                _ok = ((zeros[0][ii] == zero[0])
+                       and nm.isclose(zeros[1][ii], zero[1], rtol=1e-12))
+                tst.report(mode, ii, zero, _ok)
+                ok = ok and _ok
+
+    assert ok
@@ -0,0 +1,117 @@
+import sys
+
+import numpy as nm
+import pytest
+
+import sfepy.base.testing as tst
+
+pars = {'c1' : 1.0, 'c2' : 1.0, 'f' : 1.0}
+
+def get_pars(ts, coors, mode=None, **kwargs):
+    if mode == 'qp':
+        val = nm.ones((coors.shape[0], 1, 1), dtype=nm.float64)
+        return {'c1' : pars['c1'] * val, 'c2' : pars['c2'] * val,
+                'f' : pars['f'] * val}
+
+@pytest.fixture(scope='module')
+def problem():
+    from sfepy.base.conf import ProblemConf
+    from sfepy.discrete import Problem
+    from sfepy import data_dir
+
+    define = {
+        'filename_mesh' : data_dir + '/meshes/2d/square_quad.mesh',
+        'regions' : {
+            'Omega' : 'all',
+            'Omega1' : 'cells by get_omega1',
+            'Omega2' : ('r.Omega -c r.Omega1', 'cell'),
+            'Left' : ('vertices in (x < -0.499)', 'facet'),
+            'Right' : ('vertices in (x > 0.499)', 'facet'),
+        },
+        'materials' : {'m' : 'get_pars'},
+        'fields' : {'temperature' : ('real', 1, 'Omega', 1)},
+        'variables' : {
+            't' : ('unknown field', 'temperature', 0),
+            's' : ('test field', 'temperature', 't'),
+        },
+        'ebcs' : {
+            'fix1' : ('Left', {'t.0' : 0.0}),
+            'fix2' : ('Right', {'t.0' : 1.0}),
+        },
+        'integrals' : {'i' : 2},
+        'equations' : {
+            'eq' : """dw_laplace.i.Omega1(m.c1, s, t)
+                    + dw_laplace.i.Omega2(m.c2, s, t)
+                    = dw_volume_lvf.i.Omega(m.f, s)""",
+        },
+        'solvers' : {
+            'ls' : ('ls.scipy_direct', {}),
+            'newton' : ('nls.newton', {'i_max' : 1, 'eps_a' : 1e-10}),
+        },
+        'functions' : {
+            'get_pars' : (get_pars,),
+            'get_omega1' : (lambda coors, domain=None:
+                            nm.where(coors[:, 1] < 0.1)[0],),
+        },
+    }
+    conf = ProblemConf.from_dict(define, sys.modules[__name__])
+    pb = Problem.from_conf(conf)
+
+    return pb
+
+def set_parameters(pb, mu):
+    pars.update(c1=mu[0], c2=mu[1], f=mu[2])
+
+def get_coefs(mu):
+    return {('eq', 0) : mu[0], ('eq', 1) : mu[1], ('eq', 2) : mu[2]}
+
+def test_pod_basis():
+    from sfepy.discrete.rom import get_pod_basis
+
+    rng = nm.random.default_rng(0)
+    snapshots = rng.normal(size=(20, 3)) @ rng.normal(size=(3, 8))
+    basis, svals = get_pod_basis(snapshots, eps=1e-10)
+    assert basis.shape == (20, 3)
+    assert nm.allclose(basis.T @ basis, nm.eye(3))
+    assert nm.allclose(basis @ (basis.T @ snapshots), snapshots)
+
+    basis, svals = get_pod_basis(snapshots, eps=1e-10, n_max=2)
+    assert basis.shape == (20, 2)
+
+def test_pod_galerkin(problem):
+    from sfepy.discrete.rom import PODGalerkinROM
+
+    rom = PODGalerkinROM(problem, set_parameters, get_coefs, eps=1e-10,
+                         eps_r=1e-6)
+    rng = nm.random.default_rng(12345)
+    for mu in rng.uniform(0.5, 2.0, size=(6, 3)):
+        rom.add_snapshot(mu)
+    rom.project(mu0=[1.0, 1.0, 1.0])
+    n_mode = rom.basis.shape[1]
+    tst.report('POD modes:', n_mode, 'terms:', rom.keys)
+    assert len(rom.keys) == 3
+
+    ok = True
+    for mu in rng.uniform(0.5, 2.0, size=(4, 3)):
+        status = {}
+        vec = rom.solve(mu, status=status)()
+        vec0 = rom.solve_full(mu)()
+        err = nm.linalg.norm(vec - vec0) / nm.linalg.norm(vec0)
+        tst.report('mu:', mu, 'ROM: %s, residual: %.2e, error: %.2e'
+                   % (status['rom'], status['err'], err))
+        ok = ok and status['rom'] and (err < 1e-6)
+
+    assert ok
+    assert rom.n_rom == 4
+
+    # A parameter outside of the snapshot range triggers the fallback with
+    # the basis enrichment for the strongly reduced basis.
+    rom.n_max = 2
+    rom.project()
+    status = {}
+    mu = [0.1, 5.0, 3.0]
+    vec = rom.solve(mu, status=status)()
+    tst.report('fallback residual: %.2e' % status['err'])
+    assert not status['rom']
+    assert len(rom.snapshots) == 7
+    assert nm.allclose(vec, rom.solve_full(mu)(), rtol=0.0, atol=1e-12)